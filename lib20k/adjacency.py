@@ -0,0 +1,76 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# The adjacency table lists, for each node, the neighbours that steam
+# can flow to (as used by Steam_Model.Think) and the pipes that the
+# resulting currents are written to. Steam can only flow through working
+# pipes between working nodes, so the table depends on which buildings
+# are broken as well as on the topology. It is rebuilt when pipes or
+# nodes are added or removed, when a building becomes broken or working,
+# or when a pipe's resistance changes (see Health_Changed).
+
+from .primitives import *
+from .game_types import *
+from . import map_items, network, steam_model
+
+# Neighbour steam models with pipe resistances, then each of the
+# node's pipes with True if the node is at the n1 end
+Adjacency_Entry = Tuple[List[Tuple["steam_model.Steam_Model", float]],
+                        List[Tuple["map_items.Pipe", bool]]]
+
+
+class Adjacency:
+    def __init__(self) -> None:
+        self.version = -1
+        self.table: Dict[map_items.Node, Adjacency_Entry] = dict()
+
+        # The state of each building when the table was built
+        self.broken: Dict[map_items.Building, bool] = dict()
+        self.resistance: Dict[map_items.Pipe, float] = dict()
+
+    def Health_Changed(self, item: "map_items.Building") -> None:
+        was_broken = self.broken.get(item, None)
+        if ( was_broken is None ):
+            return # not in the table
+
+        if (( was_broken != item.Is_Broken() )
+        or ( isinstance(item, map_items.Pipe)
+            and ( self.resistance[ item ] != item.resistance ))):
+            self.version = -1
+
+    def Get(self, net: "network.Network", node: "map_items.Node") -> Adjacency_Entry:
+        if ( self.version != net.topology_version ):
+            self.__Build(net)
+            self.version = net.topology_version
+
+        entry = self.table.get(node, None)
+        if ( entry is None ):
+            entry = self.__Make_Entry(node) # not on the map
+        return entry
+
+    def __Build(self, net: "network.Network") -> None:
+        self.table = dict()
+        self.broken = dict()
+        self.resistance = dict()
+        for node in net.node_list:
+            self.broken[ node ] = node.Is_Broken()
+        for pipe in net.pipe_list:
+            self.broken[ pipe ] = pipe.Is_Broken()
+            self.resistance[ pipe ] = pipe.resistance
+        for node in net.node_list:
+            self.table[ node ] = self.__Make_Entry(node)
+
+    def __Make_Entry(self, node: "map_items.Node") -> Adjacency_Entry:
+        nl: List[Tuple[steam_model.Steam_Model, float]] = []
+        exits: List[Tuple[map_items.Pipe, bool]] = []
+        for p in node.Exits():
+            if ( p.n1 == node ):
+                other = p.n2
+            else:
+                other = p.n1
+            if (( not p.Is_Broken() ) and ( not other.Is_Broken() )):
+                nl.append((other.steam, p.resistance))
+            exits.append((p, p.n1 == node))
+        return (nl, exits)
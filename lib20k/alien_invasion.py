@@ -96,7 +96,7 @@ class Alien_Season(Quiet_Season):
         # Make a wave of bug-eyed monsters. Here's where they start:
         num_aliens = self.net.demo.randint(2,2 + int(self.alien_tech_level))
         alien_angle = self.net.demo.random() * TWO_PI
-        (cx,cy) = GRID_CENTRE
+        (cx,cy) = self.net.Get_Centre()
         alien_radius = cx + cy
 
         # Here's where they end up
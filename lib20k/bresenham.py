@@ -6,12 +6,17 @@
 from .game_types import *
 
 
-# Line drawing algorithm. Produces a list. This is useful for all sorts
-# of linear interpolations.
+# Line drawing algorithm. Generates the points on a line. This is useful
+# for all sorts of linear interpolations.
 #
 # Page 78, Computer Graphics Principles and Practice (2nd. Ed), Foley et al.
+#
+# Storm damage depends on the exact points generated (see Storm_Pipe_Grid)
+# so the quirks of the original version are preserved: the first point is
+# generated twice, and a final point may be added after overshooting
+# the end by one.
 
-def Line(arg1: GridPosition, arg2: GridPosition) -> List[GridPosition]:
+def Line(arg1: GridPosition, arg2: GridPosition) -> typing.Iterator[GridPosition]:
     (x1,y1) = arg1
     (x2,y2) = arg2
 
@@ -19,42 +24,52 @@ def Line(arg1: GridPosition, arg2: GridPosition) -> List[GridPosition]:
     y1 = int(y1)
     x2 = int(x2)
     y2 = int(y2)
-    dx = x2 - x1
-    dy = y2 - y1
 
-    if ( abs(dx) < abs(dy) ):
-        # Gradient is steeper than 1. Correct this.
-        return [ (x,y) for (y,x) in Line((y1,x1),(y2,x2)) ]
+    # Lines with a gradient steeper than 1 are drawn with x and y swapped
+    steep = ( abs(x2 - x1) < abs(y2 - y1) )
+    if ( steep ):
+        (x1, y1, x2, y2) = (y1, x1, y2, x2)
 
-    if ( dx < 0 ):
-        # Line is reversed. Correct this.
-        l = Line((x2,y2),(x1,y1))
-        l.reverse()
-        return l
+    # Reversed lines are drawn the other way, and then generated backwards
+    reverse = ( x2 < x1 )
+    if ( reverse ):
+        (x1, y1, x2, y2) = (x2, y2, x1, y1)
 
+    dx = x2 - x1
+    dy = y2 - y1
     if ( dy < 0 ):
         direction = -1
         dy = - dy
     else:
         direction = 1
 
-    d = ( 2 * dy ) - dx
-    incr_e = 2 * dy
-    incr_ne = 2 * ( dy - dx )
-    y = y1
-    l = [(x1,y)]
-
-    for x in range(x1, x2 + 1):
-        if ( d <= 0 ):
-            d += incr_e # move east
+    # The decision variable d starts at ( 2 * dy ) - dx and moves northeast
+    # whenever it is positive, so after k steps, the number of northeast
+    # moves is ceil((( 2 * dy * k ) - dx ) / ( 2 * dx )).
+    def Point(i: int) -> GridPosition:
+        if ( i == 0 ):
+            return (x1, y1)
+        elif ( i > dx + 1 ):
+            return (x2, y2)
+        elif ( dx == 0 ):
+            return (x1, y1)
         else:
-            d += incr_ne # move northeast
-            y += direction
-        l.append((x,y))
-
-    if ( y != y2 ):
-        l.append((x2,y2))
+            ne = - (( dx - ( 2 * dy * i )) // ( 2 * dx ))
+            return (x1 + i - 1, y1 + ( direction * ne ))
 
-    return l
+    # The last step overshoots the end if 2 * dy > dx
+    size = dx + 2
+    if ( 2 * dy > dx ):
+        size += 1
 
+    if ( reverse ):
+        order = range(size - 1, -1, -1)
+    else:
+        order = range(size)
 
+    for i in order:
+        (x, y) = Point(i)
+        if ( steep ):
+            yield (y, x)
+        else:
+            yield (x, y)
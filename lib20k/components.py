@@ -0,0 +1,70 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# The component index splits the network into components: groups of
+# nodes that are connected by pipes (working or not). Steam can't flow
+# between components, so each one can be simulated separately, and a
+# component with no steam maker and no city can be left alone.
+#
+# The index is rebuilt when the network's topology_version changes.
+
+from .primitives import *
+from .game_types import *
+from . import map_items, network
+
+
+class Component:
+    def __init__(self, nodes: "List[map_items.Node]") -> None:
+        self.nodes = nodes              # in node_list order
+
+        # Does the component have a source of steam, or the city?
+        self.active = any([ isinstance(node, (map_items.City_Node, map_items.Well_Node))
+                            for node in nodes ])
+
+
+class Component_Index:
+    def __init__(self) -> None:
+        self.version = -1
+        self.components: List[Component] = []
+        self.component_of: Dict[map_items.Node, Component] = dict()
+
+    def Get_Components(self, net: "network.Network") -> List[Component]:
+        self.__Update(net)
+        return self.components
+
+    def Get_Component(self, net: "network.Network",
+                      item: "map_items.Building") -> Optional[Component]:
+        self.__Update(net)
+        if ( isinstance(item, map_items.Pipe) ):
+            item = item.n1
+        return self.component_of.get(typing.cast(map_items.Node, item), None)
+
+    def __Update(self, net: "network.Network") -> None:
+        if ( self.version == net.topology_version ):
+            return
+
+        self.version = net.topology_version
+        self.components = []
+        self.component_of = dict()
+        order = dict([ (node, i) for (i, node) in enumerate(net.node_list) ])
+        seen: typing.Set[map_items.Node] = set()
+        for start in net.node_list:
+            if ( start in seen ):
+                continue
+
+            nodes = [ start ]
+            seen.add(start)
+            for node in nodes:
+                for pipe in node.pipes:
+                    for other in pipe.Exits():
+                        if (( other not in seen ) and ( other in order )):
+                            seen.add(other)
+                            nodes.append(other)
+
+            nodes.sort(key=lambda node: order[ node ])
+            component = Component(nodes)
+            for node in nodes:
+                self.component_of[ node ] = component
+            self.components.append(component)
@@ -0,0 +1,174 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# The connection map records the distance (in hops) from the city
+# to every building that is connected to it. Nodes and pipes both count
+# as hops, so the city's pipes are 1 hop away, the nodes at the other end
+# are 2 hops away, and so on. Health doesn't matter: work can be
+# delivered through unfinished or damaged buildings.
+#
+# The map is updated as pipes are added and buildings are destroyed,
+# so there is no need to flood the whole network to find out what is
+# connected. The buildings whose distance changed are remembered, so the
+# work scheduler only has to look at those.
+
+import heapq
+import collections
+
+from .primitives import *
+from .game_types import *
+from . import map_items
+
+# Position of a building in the order of work (see Get_Order)
+Order_Key = Tuple[int, float, GridPosition, int]
+
+
+class Connection_Map:
+    def __init__(self) -> None:
+        self.hub: Optional[map_items.Building] = None
+        self.hops: Dict[map_items.Building, int] = dict()
+        self.order: Optional[List[map_items.Building]] = None
+
+        # Buildings with the same distance and position are
+        # ordered by when they were connected
+        self.serial: Dict[map_items.Building, int] = dict()
+        self.next_serial = 0
+
+        # Buildings connected, disconnected or moved since Take_Changes
+        self.changed: typing.Set[map_items.Building] = set()
+
+        # Changed whenever the map is built from scratch
+        self.version = 0
+
+    def Set_Hub(self, hub: "map_items.Building") -> None:
+        # Build the map from scratch
+        self.hub = hub
+        self.hops = dict()
+        self.serial = dict()
+        self.changed = set()
+        self.order = None
+        self.version += 1
+        self.__Set_Hops(hub, 0)
+        self.__Relax(hub)
+
+    def Is_Connected(self, item: "map_items.Building") -> bool:
+        return item in self.hops
+
+    def Get_Hops(self, item: "map_items.Building") -> Optional[int]:
+        return self.hops.get(item, None)
+
+    def Get_Key(self, item: "map_items.Building") -> Optional[Order_Key]:
+        # Sort key for Get_Order (None if not connected)
+        h = self.hops.get(item, None)
+        if h is None:
+            return None
+        assert self.hub is not None
+        return (h, item.Manhattan_Distance_From(self.hub), item.pos, self.serial[ item ])
+
+    def Get_Order(self) -> "List[map_items.Building]":
+        # All connected buildings, nearest first: this is the order in
+        # which work is done. Buildings the same number of hops away
+        # are sorted by Manhattan distance and then position.
+        if self.order is None:
+            assert self.hub is not None
+            hub = self.hub
+            self.order = sorted(self.hops, key=lambda item:
+                    (self.hops[ item ], item.Manhattan_Distance_From(hub), item.pos,
+                     self.serial[ item ]))
+        return self.order
+
+    def Take_Changes(self) -> "typing.Set[map_items.Building]":
+        # Buildings connected, disconnected or moved since the last call
+        changed = self.changed
+        self.changed = set()
+        return changed
+
+    def Add_Pipe(self, pipe: "map_items.Pipe") -> None:
+        # A new pipe can only bring buildings closer to the city.
+        hops = [ self.hops[ n ] for n in pipe.Exits() if n in self.hops ]
+        if len(hops) == 0:
+            return # not connected to anything
+
+        self.__Set_Hops(pipe, min(hops) + 1)
+        self.order = None
+        self.__Relax(pipe)
+
+    def Remove(self, item: "map_items.Building") -> None:
+        # A building is destroyed. Buildings that depended on it
+        # to reach the city may now be further away, or disconnected.
+        h = self.hops.pop(item, None)
+        if h is None:
+            return # not connected (or already removed)
+
+        del self.serial[ item ]
+        self.order = None
+        self.changed.add(item)
+
+        # Find the orphans: buildings that no longer have a neighbour
+        # that is one hop closer to the city. Orphans are found level by
+        # level, since only an orphan can make the next level an orphan.
+        orphans: typing.Set[map_items.Building] = set()
+        level = set([ x for x in item.Exits() if self.hops.get(x, None) == h + 1 ])
+        while len(level) != 0:
+            next_level: typing.Set[map_items.Building] = set()
+            for x in level:
+                parent = self.hops[ x ] - 1
+                if any([ (( self.hops.get(y, None) == parent )
+                          and ( y not in orphans )) for y in x.Exits() ]):
+                    continue # still supported
+
+                orphans.add(x)
+                for y in x.Exits():
+                    if self.hops.get(y, None) == parent + 2:
+                        next_level.add(y)
+            level = next_level
+
+        if len(orphans) == 0:
+            return
+
+        # Orphans next to the rest of the network get new distances,
+        # which spread to the other orphans. Anything not reached is
+        # disconnected.
+        for x in orphans:
+            del self.hops[ x ]
+            del self.serial[ x ]
+        self.changed.update(orphans)
+
+        todo: List[Tuple[int, int, map_items.Building]] = []
+        for x in orphans:
+            hops = [ self.hops[ y ] for y in x.Exits() if y in self.hops ]
+            if len(hops) != 0:
+                todo.append((min(hops) + 1, len(todo), x))
+
+        heapq.heapify(todo)
+        count = len(todo)
+        while len(todo) != 0:
+            (d, _, x) = heapq.heappop(todo)
+            if x in self.hops:
+                continue
+            self.__Set_Hops(x, d)
+            for y in x.Exits():
+                if ( y in orphans ) and ( y not in self.hops ):
+                    heapq.heappush(todo, (d + 1, count, y))
+                    count += 1
+
+    def __Relax(self, start: "map_items.Building") -> None:
+        # Breadth-first search from a building whose distance has
+        # just been reduced, updating any buildings that are now closer.
+        todo = collections.deque([ start ])
+        while len(todo) != 0:
+            x = todo.popleft()
+            d = self.hops[ x ] + 1
+            for y in x.Exits():
+                if d < self.hops.get(y, d + 1):
+                    self.__Set_Hops(y, d)
+                    todo.append(y)
+
+    def __Set_Hops(self, item: "map_items.Building", d: int) -> None:
+        if item not in self.hops:
+            self.serial[ item ] = self.next_serial
+            self.next_serial += 1
+        self.hops[ item ] = d
+        self.changed.add(item)
@@ -0,0 +1,92 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# A dirty region is the part of a surface that has to be drawn again.
+#
+# Areas are added by marking the square tiles of TILE_SIZE pixels that
+# they cover, so adding an area takes the same time however many areas
+# have been added before, and overlapping areas are merged exactly.
+# Get_Rects turns the marked tiles back into rectangles: each row of
+# tiles is split into runs, and runs which are the same in the rows
+# above and below are joined into one rectangle. The rectangles don't
+# overlap, and they cover at most one tile more than the areas in each
+# direction.
+
+import pygame
+
+from .primitives import *
+from .game_types import *
+
+TILE_SIZE = 32
+
+
+class Dirty_Region:
+    def __init__(self) -> None:
+        self.tiles: typing.Set[Tuple[int, int]] = set()
+        self.rect_list: Optional[List[RectType]] = None
+
+    def Add(self, area: RectType) -> None:
+        if ( area.width <= 0 ) or ( area.height <= 0 ):
+            return
+
+        x1 = area.left // TILE_SIZE
+        x2 = (( area.right - 1 ) // TILE_SIZE ) + 1
+        for y in range(area.top // TILE_SIZE,
+                       (( area.bottom - 1 ) // TILE_SIZE ) + 1):
+            for x in range(x1, x2):
+                self.tiles.add((x, y))
+
+        self.rect_list = None
+
+    def Clear(self) -> None:
+        self.tiles = set()
+        self.rect_list = None
+
+    def Is_Empty(self) -> bool:
+        return len(self.tiles) == 0
+
+    def Get_Rects(self) -> List[RectType]:
+        if ( self.rect_list is not None ):
+            return self.rect_list
+
+        rows: Dict[int, List[int]] = dict()
+        for (x, y) in self.tiles:
+            rows.setdefault(y, []).append(x)
+
+        # Rectangles which reach the bottom of the previous row,
+        # by the run of tiles they cover
+        above: Dict[Tuple[int, int], RectType] = dict()
+        previous_y = None
+        rect_list: List[RectType] = []
+
+        for y in sorted(rows):
+            if ( previous_y != y - 1 ):
+                above = dict()
+
+            row = sorted(rows[ y ])
+            here: Dict[Tuple[int, int], RectType] = dict()
+            start = row[ 0 ]
+            for i in range(len(row)):
+                if (( i + 1 ) < len(row)) and ( row[ i + 1 ] == row[ i ] + 1 ):
+                    continue
+
+                run = (start, row[ i ] + 1)
+                r = above.get(run, None)
+                if ( r is None ):
+                    r = pygame.Rect(start * TILE_SIZE, y * TILE_SIZE,
+                                    ( run[ 1 ] - start ) * TILE_SIZE, TILE_SIZE)
+                    rect_list.append(r)
+                else:
+                    r.height += TILE_SIZE
+
+                here[ run ] = r
+                if (( i + 1 ) < len(row)):
+                    start = row[ i + 1 ]
+
+            above = here
+            previous_y = y
+
+        self.rect_list = rect_list
+        return rect_list
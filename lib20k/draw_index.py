@@ -0,0 +1,117 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# The draw index finds the wells, pipes and nodes that might be seen
+# in an area of the map, so that Draw_Game doesn't need to look at
+# everything on a large map.
+#
+# The map is divided into square buckets of BUCKET_SIZE grid squares.
+# Wells and nodes are put in the bucket containing them; pipes are put
+# in every bucket containing a grid square on their path (see
+# intersect.Line_To_Grid_Positions). Items come out in the order they
+# were added, which is the order of the network's lists, so things are
+# drawn on top of each other in the same way. The same area is drawn in
+# every frame, so the results of the last few queries are kept until
+# an item is added or removed.
+
+from .primitives import *
+from .game_types import *
+from . import map_items
+
+BUCKET_SIZE = 8
+CACHE_SIZE = 4
+
+
+class Bucket_Grid:
+    def __init__(self) -> None:
+        self.buckets: Dict[GridPosition, List[map_items.Item]] = dict()
+        self.keys: Dict[map_items.Item, List[GridPosition]] = dict()
+        self.serial: Dict[map_items.Item, int] = dict()
+        self.next_serial = 0
+
+        # Results of recent queries, by bucket range
+        self.cache: Dict[Tuple[int, int, int, int], List[map_items.Item]] = dict()
+
+    def Add(self, item: "map_items.Item", cells: List[GridPosition]) -> None:
+        keys = sorted(set([ (x // BUCKET_SIZE, y // BUCKET_SIZE) for (x, y) in cells ]))
+        for key in keys:
+            self.buckets.setdefault(key, []).append(item)
+        self.keys[ item ] = keys
+        self.serial[ item ] = self.next_serial
+        self.next_serial += 1
+        self.cache.clear()
+
+    def Remove(self, item: "map_items.Item") -> None:
+        for key in self.keys.pop(item, []):
+            bucket = self.buckets[ key ]
+            bucket.remove(item)
+            if ( len(bucket) == 0 ):
+                del self.buckets[ key ]
+        self.serial.pop(item, None)
+        self.cache.clear()
+
+    def Get(self, area: RectType) -> "List[map_items.Item]":
+        # Items in the buckets overlapping the area (in grid squares).
+        # The list may be shared with other callers: don't change it.
+        bx1 = area.left // BUCKET_SIZE
+        by1 = area.top // BUCKET_SIZE
+        bx2 = ( area.right - 1 ) // BUCKET_SIZE
+        by2 = ( area.bottom - 1 ) // BUCKET_SIZE
+        key = (bx1, by1, bx2, by2)
+        out = self.cache.pop(key, None)
+        if ( out is not None ):
+            self.cache[ key ] = out # most recently used
+            return out
+
+        found: typing.Set[map_items.Item] = set()
+        if (( bx2 - bx1 + 1 ) * ( by2 - by1 + 1 ) <= len(self.buckets) ):
+            for bx in range(bx1, bx2 + 1):
+                for by in range(by1, by2 + 1):
+                    found.update(self.buckets.get((bx, by), []))
+        else:
+            # The area is larger than the part of the map in use
+            for ((bx, by), bucket) in self.buckets.items():
+                if (( bx1 <= bx <= bx2 ) and ( by1 <= by <= by2 )):
+                    found.update(bucket)
+
+        out = sorted(found, key=lambda item: self.serial[ item ])
+        self.cache[ key ] = out
+        if ( len(self.cache) > CACHE_SIZE ):
+            # Forget the least recently used query
+            del self.cache[ next(iter(self.cache)) ]
+        return out
+
+
+class Draw_Index:
+    def __init__(self) -> None:
+        self.wells = Bucket_Grid()
+        self.pipes = Bucket_Grid()
+        self.nodes = Bucket_Grid()
+
+    def Add_Well(self, well: "map_items.Well") -> None:
+        self.wells.Add(well, [ well.pos ])
+
+    def Add_Node(self, node: "map_items.Node") -> None:
+        self.nodes.Add(node, [ node.pos ])
+
+    def Add_Pipe(self, pipe: "map_items.Pipe", path: List[GridPosition]) -> None:
+        self.pipes.Add(pipe, path)
+
+    def Remove(self, item: "map_items.Item") -> None:
+        if ( isinstance(item, map_items.Pipe) ):
+            self.pipes.Remove(item)
+        elif ( isinstance(item, map_items.Node) ):
+            self.nodes.Remove(item)
+        else:
+            self.wells.Remove(item)
+
+    def Get_Wells(self, area: RectType) -> "List[map_items.Well]":
+        return typing.cast(List[map_items.Well], self.wells.Get(area))
+
+    def Get_Pipes(self, area: RectType) -> "List[map_items.Pipe]":
+        return typing.cast(List[map_items.Pipe], self.pipes.Get(area))
+
+    def Get_Nodes(self, area: RectType) -> "List[map_items.Node]":
+        return typing.cast(List[map_items.Node], self.nodes.Get(area))
@@ -9,34 +9,54 @@
 import pygame, math
 
 
-from . import resource
+from . import resource, compatibility
 from .primitives import *
 from .game_types import *
 from .grid import Get_Grid_Size, Grid_To_Scr
 
 
 class Abstract_Draw_Obj:
-    def Draw(self, output: SurfaceType, gpos: GridPosition, sxsy: SurfacePosition) -> None:
-        pass  # NO-COV
+    def Draw(self, output: SurfaceType, gpos: GridPosition, sxsy: SurfacePosition) -> Optional[RectType]:
+        return None  # NO-COV
 
-DrawObjKey = Tuple[Images, int]
+# Image, size in grid squares, size of a grid square in pixels
+DrawObjKey = Tuple[Images, int, int]
 cache: Dict[DrawObjKey, Abstract_Draw_Obj] = dict()
 frame = 0
 
+# Objects are kept for this many sizes of grid square, so that
+# going back to a recent window size or zoom level doesn't make them again
+CACHE_SQUARE_SIZES = 4
+
+# Brightness of the lights in each frame of the animation
+LIGHT_LEVELS = [ 0, 0, 50, 100, 150, 200, 250, 250, 150 ]
+
 class Draw_Obj(Abstract_Draw_Obj):
     def __init__(self, img_name: Images, grid_size: int) -> None:
         Abstract_Draw_Obj.__init__(self)
-        self.key: DrawObjKey = (img_name, grid_size)
+        self.img_name = img_name
+        self.grid_size = grid_size
 
-    def Draw(self, output: SurfaceType, gpos: GridPosition, sxsy: SurfacePosition) -> None:
-        item = cache.get(self.key, None)
+    def Draw(self, output: SurfaceType, gpos: GridPosition, sxsy: SurfacePosition) -> Optional[RectType]:
+        # The size of a grid square changes when a large map is zoomed
+        key: DrawObjKey = (self.img_name, self.grid_size, Get_Grid_Size())
+        item = cache.get(key, None)
         if item is None:
-            cache[self.key] = item = Make_Cache_Item(self.key)
-        item.Draw(output, gpos, sxsy)
+            cache[key] = item = Make_Cache_Item(key)
+        return item.Draw(output, gpos, sxsy)
 
 def Flush_Draw_Obj_Cache() -> None:
+    # Forget the objects made for all but the most recent sizes
     global cache
-    cache.clear()
+    sizes: List[int] = []
+    for (img_name, grid_size, square_size) in reversed(list(cache.keys())):
+        if square_size not in sizes:
+            sizes.append(square_size)
+
+    keep = sizes[ :CACHE_SQUARE_SIZES ]
+    for key in list(cache.keys()):
+        if key[ 2 ] not in keep:
+            del cache[ key ]
 
 def Next_Frame() -> None:
     global frame
@@ -46,13 +66,13 @@ def Make_Cache_Item(key: DrawObjKey) -> Abstract_Draw_Obj:
     class Real_Draw_Obj(Abstract_Draw_Obj):
         def __init__(self, key: DrawObjKey) -> None:
             Abstract_Draw_Obj.__init__(self)
-            (img_name, grid_size) = key
+            (img_name, grid_size, square_size) = key
 
             img = resource.Load_Image(img_name)
             (w, h) = img.get_rect().bottomright
-            new_width = Get_Grid_Size() * grid_size
+            new_width = square_size * grid_size
             new_height = ( new_width * h ) // w
-            assert type(Get_Grid_Size()) == int
+            assert type(square_size) == int
             assert type(grid_size) == int
             assert type(new_width) == int
             assert type(new_height) == int
@@ -63,29 +83,51 @@ def Make_Cache_Item(key: DrawObjKey) -> Abstract_Draw_Obj:
             r.center = (0,0)
             self.offset_x = r.left
             self.offset_y = r.top
-            self.frames = []
-            for c in [ 0, 0, 50, 100, 150, 200, 250, 250, 150 ]:
-                self.frames.append(self.__Colour_Substitute(c, img))
+            self.frames = Colour_Substitute(img, LIGHT_LEVELS)
 
-        def Draw(self, output: SurfaceType, gpos: GridPosition, sxsy: SurfacePosition) -> None:
+        def Draw(self, output: SurfaceType, gpos: GridPosition, sxsy: SurfacePosition) -> Optional[RectType]:
             (sx, sy) = sxsy
             global frame
 
             (x,y) = Grid_To_Scr(gpos)
             x += self.offset_x - sx
             y += self.offset_y - sy
-            output.blit(self.frames[ ( frame // 2 ) % len(self.frames) ], (x,y))
-
-        def __Colour_Substitute(self, sub, image):
-            out = image.copy()
-            (w,h) = image.get_rect().bottomright
-
-            for y in range(h):
-                for x in range(w):
-                    (r,g,b,a) = out.get_at((x,y))
-                    if (( r > 200 ) and ( g < 30 ) and ( b < 30 )): # threshold
-                        out.set_at((x,y), (sub, 0, 0, a))
-            return out
+            return output.blit(self.frames[ ( frame // 2 ) % len(self.frames) ], (x,y))
 
     return Real_Draw_Obj(key)
 
+def Colour_Substitute(image: SurfaceType, levels: List[int]) -> List[SurfaceType]:
+    # The lights are the bright red pixels of the image. For each level,
+    # a copy of the image is made with the lights set to (level, 0, 0),
+    # keeping their alpha. Copies with the same level are shared.
+    if not compatibility.PYGAME_TWO:    # NO-COV
+        return [ Colour_Substitute_Per_Pixel(image, sub) for sub in levels ]
+
+    # Red > 200, green < 30, blue < 30, any alpha
+    lights = pygame.mask.from_threshold(image, (228, 0, 0, 128), (28, 30, 30, 129))
+
+    # The image with no colour, only alpha
+    dark = image.copy()
+    dark.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_MULT)
+
+    out: Dict[int, SurfaceType] = dict()
+    for sub in levels:
+        if sub not in out:
+            lit = dark.copy()
+            lit.fill((sub, 0, 0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+            out[ sub ] = lights.to_surface(image.copy(), setsurface=lit, unsetcolor=None)
+
+    return [ out[ sub ] for sub in levels ]
+
+def Colour_Substitute_Per_Pixel(image: SurfaceType, sub: int) -> SurfaceType:
+    # Slow version of Colour_Substitute for pygame 1.9
+    out = image.copy()
+    (w,h) = image.get_rect().bottomright
+
+    for y in range(h):
+        for x in range(w):
+            (r,g,b,a) = out.get_at((x,y))
+            if (( r > 200 ) and ( g < 30 ) and ( b < 30 )): # threshold
+                out.set_at((x,y), (sub, 0, 0, a))
+    return out
+
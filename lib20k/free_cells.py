@@ -0,0 +1,77 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# Free cells are the empty grid squares where a new well could appear:
+# at least a minimum distance from the centre of the map. They are kept
+# in two lists (left and right of the centre, because the tutorial only
+# puts wells on the right). A square is removed from its list by moving
+# the last square of the list into its place, so adding and removing
+# squares, and choosing one at random, take the same time however large
+# and crowded the map is.
+#
+# The ground grid keeps the lists up to date (see Ground_Grid.Set_Free_Cells).
+
+import math
+
+from .primitives import *
+from .game_types import *
+from . import game_random
+
+
+class Free_Cells:
+    def __init__(self, centre: GridPosition, min_distance: float) -> None:
+        self.centre = centre
+        self.min_distance = min_distance
+        self.left: List[GridPosition] = []
+        self.right: List[GridPosition] = []
+        self.index: Dict[GridPosition, int] = dict()
+
+    def Is_Allowed(self, gpos: GridPosition) -> bool:
+        (x, y) = gpos
+        (cx, cy) = self.centre
+        return math.hypot(x - cx, y - cy) >= self.min_distance
+
+    def __List(self, gpos: GridPosition) -> List[GridPosition]:
+        (x, y) = gpos
+        (cx, cy) = self.centre
+        if ( x < cx ):
+            return self.left
+        return self.right
+
+    def Add(self, gpos: GridPosition) -> None:
+        if (( gpos in self.index ) or ( not self.Is_Allowed(gpos) )):
+            return
+        cells = self.__List(gpos)
+        self.index[ gpos ] = len(cells)
+        cells.append(gpos)
+
+    def Remove(self, gpos: GridPosition) -> None:
+        i = self.index.pop(gpos, None)
+        if ( i is None ):
+            return
+        cells = self.__List(gpos)
+        last = cells.pop()
+        if ( last != gpos ):
+            cells[ i ] = last
+            self.index[ last ] = i
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def Choose(self, demo: "game_random.Game_Random",
+               right_only: bool = False) -> Optional[GridPosition]:
+        # A random free cell, or None if there are none left.
+        # If right_only, the cell is right of the centre.
+        num_left = 0
+        if ( not right_only ):
+            num_left = len(self.left)
+        total = num_left + len(self.right)
+        if ( total == 0 ):
+            return None
+
+        i = demo.randint(0, total - 1)
+        if ( i < num_left ):
+            return self.left[ i ]
+        return self.right[ i - num_left ]
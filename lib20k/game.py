@@ -11,12 +11,10 @@ import pygame, sys, time, pickle, random, os, math
 from . import draw_effects, stats, mail, gametime, events
 from . import menu, save_menu, save_game, config, resource
 from . import review, sound, tutor, draw_obj, compatibility
-from . import game_random, grid, alien_invasion
+from . import game_random, grid, simulation, present
 from .primitives import *
 from .game_types import *
 from .quiet_season import Quiet_Season
-from .quakes import Quake_Season
-from .storms import Storm_Season
 from .steam_model import Steam_Model
 from .network import Network
 from .ui import User_Interface
@@ -27,13 +25,16 @@ FRAME_RATE = 35
 RT_FRAME_LENGTH = 1.0 / FRAME_RATE
 
 class Game_Data:
-    def __init__(self, demo: "game_random.Game_Random", challenge: MenuCommand) -> None:
+    def __init__(self, demo: "game_random.Game_Random", challenge: MenuCommand,
+                 map_size: GridPosition = GRID_SIZE,
+                 well_placement: WellPlacement = WellPlacement.RETRY) -> None:
         self.version = VERSION
+        self.save_format = SAVE_FORMAT
         self.sysinfo = config.Get_System_Info()
         teaching = ( challenge == MenuCommand.TUTORIAL )
 
         # Steam network initialisation
-        self.net = Network(demo, teaching)
+        self.net = Network(demo, teaching, map_size, well_placement)
 
         # Game variables
         self.season = Season.START
@@ -65,7 +66,12 @@ class Game:
     def __init__(self, event: events.Events, clock: ClockType,
               restore_pos: Optional[MenuCommand], challenge: Optional[MenuCommand],
               playback_mode: PlayMode, playback_file: Optional[str],
-              record_file: Optional[str]) -> None:
+              record_file: Optional[str],
+              steam_engine: SteamEngine = SteamEngine.OBJECTS,
+              steam_init: SteamInit = SteamInit.WARM_UP,
+              steam_sleep: bool = False,
+              map_size: GridPosition = GRID_SIZE,
+              well_placement: WellPlacement = WellPlacement.RETRY) -> None:
 
         self.clock = clock
         self.event = event
@@ -74,6 +80,11 @@ class Game:
         self.playback_file = playback_file
         self.record_file = record_file
         self.restore_pos = restore_pos
+        self.steam_engine = steam_engine
+        self.steam_init = steam_init
+        self.steam_sleep = steam_sleep
+        self.map_size = map_size
+        self.well_placement = well_placement
 
         # Initial black screen
         self.screen = self.event.resurface()
@@ -104,35 +115,19 @@ class Game:
             self.demo.begin_write(record_file, challenge)
 
         assert challenge is not None
-        self.g = g = Game_Data(self.demo, challenge)
+        self.g = g = Game_Data(self.demo, challenge,
+                        self.map_size, self.well_placement)
+        simulation.Start_Game(g, self.steam_engine, self.steam_init,
+                              self.steam_sleep)
+        grid.Set_Map_Size(g.net.map_size)
 
         # Fixed background in test modes (making screenshot comparisons easier)
         if (self.playback_mode != PlayMode.OFF) or self.event.is_testing: # NO-COV
             g.backdrop_rotation = 0
 
-        # Establish equilibrium with initial network.
-        DIFFICULTY.Set(MenuCommand.INTERMEDIATE)
-        i = 300
-        while i > 0:
-            g.net.Steam_Think()
-            if ( g.net.hub.Get_Pressure() >= PRESSURE_GOOD ):
-                i = 0
-            else:
-                i -= 1
-
-        assert g.net.hub.Get_Pressure() >= PRESSURE_GOOD
-
-        # Switch to the difficulty level requested by the user
-        DIFFICULTY.Set(challenge)
-
-        # always have at least one item in history
-        g.historian.append(review.Analyse_Network(g))
-
-        # initialise mail
-        mail.Initialise()
-        mail.Set_Day(g.game_time.Get_Day())
-
-        tutor.Off()
+        # Everything that happens to the game data as time passes
+        self.sim = simulation.Simulation(g, self.demo, RT_FRAME_LENGTH)
+        self.sim.screenshot = self.Screenshot
 
         # load pictures
         self.header_picture = resource.Load_Image(Images.headersm).convert()
@@ -140,6 +135,8 @@ class Game:
 
         # create user interface
         self.ui = User_Interface(self.g.net, self.demo)
+        self.presenter = present.Presenter()
+        self.global_stats_hash = 0
 
         # initialise the UI
         self.Recreate_UI()
@@ -151,7 +148,7 @@ class Game:
         (width, height) = self.size
         self.menu_margin = height
 
-        # Needed when resized
+        # Forget the images made for old sizes
         draw_obj.Flush_Draw_Obj_Cache()
 
         # Windows..
@@ -191,6 +188,7 @@ class Game:
         self.Special_Refresh()
 
         self.stats_surf.fill((0,0,0))
+        self.presenter.Update_All()
 
         # Background image for user interface
         img = self.back_picture
@@ -208,7 +206,11 @@ class Game:
         # which is at its maximum at MINIMUM_HEIGHT. This maximum is:
         border_size = (GRID_SIZE[0] - 1) / (MINIMUM_HEIGHT // GRID_SIZE[0])
         # Adding this to the grid size tells us how big to make the background
-        plus_size = int(grid.Float_Grid_To_Scr((GRID_SIZE[0] + border_size, 1))[0])
+        plus_size = int(((GRID_SIZE[0] + border_size) * grid.Get_Grid_Size())
+                        + ( grid.Get_Grid_Size() // 2 ))
+        if ( grid.Is_Large_Map() ):
+            # The background stays still while the map scrolls
+            plus_size = height
 
         self.ui.background = pygame.transform.smoothscale(img, (plus_size, plus_size))
 
@@ -220,6 +222,8 @@ class Game:
 
     def Special_Refresh(self) -> None:
         height = self.screen.get_rect().height
+        self.presenter.Update_All()
+        self.global_stats_hash = 0
 
         draw_effects.Tile_Texture(self.screen, Images.rivets,
                 pygame.Rect(self.menu_margin, 0,
@@ -237,17 +241,11 @@ class Game:
         draw_effects.Line_Edging(self.picture_surf, r, False)
         self.picture_surf.blit(self.scaled_header_picture, r.topleft)
 
-    def Special_Action(self, name: str) -> None:
-        if name == "ADVANCE":
-            New_Mail("SEASON ADVANCE CHEAT")
-            self.g.season_ends = 0
-
-        else:
-            assert name == "SCREENSHOT"
-            pygame.image.save(pygame.display.get_surface(),
-                              os.path.join("tmp", "sshot-%04d-%04d.png" % (
-                                        self.g.game_time.Get_Day(), self.screen.get_rect().height)))
-            New_Mail("SCREENSHOT CHEAT")
+    def Screenshot(self) -> None:
+        pygame.image.save(pygame.display.get_surface(),
+                          os.path.join("tmp", "sshot-%04d-%04d.png" % (
+                                    self.g.game_time.Get_Day(), self.screen.get_rect().height)))
+        New_Mail("SCREENSHOT CHEAT")
 
     def Main_Loop(self) -> bool:
         alarm_sound = sound.Persisting_Sound(Sounds.emergency)
@@ -302,6 +300,7 @@ class Game:
             tutor.On()
 
         cur_time = g.game_time.time()
+        mail_areas: List[RectType] = []
 
         # Main loop
         while ( loop_running ):
@@ -319,16 +318,13 @@ class Game:
 
             if not paused:
                 flash = not flash
-                g.game_time.Advance(RT_FRAME_LENGTH)
                 draw_obj.Next_Frame() # Flashing lights on the various items
 
+            self.sim.Begin_Frame(paused)
             cur_time = g.game_time.time()
-            mail.Set_Day(g.game_time.Get_Day())
 
-            if not paused:
-                self.demo.timestamp(g)
-
-            self.ui.Draw_Game(self.game_screen_surf, g.season_fx, paused)
+            self.presenter.Update_Areas(self.game_screen_surf,
+                    self.ui.Draw_Game(self.game_screen_surf, g.season_fx, paused))
 
             until_next: List[StatTuple]
             if ( g.challenge == MenuCommand.TUTORIAL ):
@@ -339,31 +335,23 @@ class Game:
                 until_next = [ ((128,128,128), 12, "(%d days until next season)" %
                             (( g.season_ends - cur_time ) + 1 )) ]
 
-            self.ui.Draw_Stats(self.stats_surf, typing.cast(List[StatTuple], [
+            self.presenter.Update_Area(self.stats_surf,
+                self.ui.Draw_Stats(self.stats_surf, typing.cast(List[StatTuple], [
                   ((128,0,128), 18, "Day %u" % g.game_time.Get_Day()),
                   ((128,128,0), 18, g.season_fx.name + " season") ]) +
                   until_next +
-                    g.season_fx.Get_Extra_Info())
-            self.ui.Draw_Controls(self.controls_surf)
+                    g.season_fx.Get_Extra_Info()))
+            self.presenter.Update_Area(self.controls_surf,
+                self.ui.Draw_Controls(self.controls_surf))
+
+            self.sim.Check_Pressure()
 
             stats_back = (0,0,0)
             supply = g.net.hub.Get_Steam_Supply()
             demand = g.net.hub.Get_Steam_Demand()
             if ( g.net.hub.Get_Pressure() < PRESSURE_DANGER ):
-                # You'll lose the game if you stay in this zone
-                # for longer than a timeout. Also, an
-                # alarm will sound.
-
-                if ( g.game_ends_at is None ):
-                    sound.FX(Sounds.steamcrit)
-                    g.warning_given = True
-
-                    New_Mail("Danger! The City needs more steam!", (255,0,0))
-                    g.game_ends_at = cur_time + DIFFICULTY.GRACE_TIME
-                    assert g.game_ends_at is not None
-                    New_Mail("Game will end on Day %u unless supplies are increased." % (
-                        int(g.game_ends_at) ), (255,0,0))
-
+                # The game will be lost unless this changes (see
+                # Simulation.Check_Pressure) and an alarm sounds.
                 if ( flash ):
                     demand_colour = (255, 0, 0)
                     if not paused:  # NO-COV
@@ -374,7 +362,6 @@ class Game:
 
             elif ( g.net.hub.Get_Pressure() < PRESSURE_WARNING ):
 
-                g.game_ends_at = None
                 if ( flash ):
                     demand_colour = (255, 100, 0)
                     if not paused:  # NO-COV
@@ -384,22 +371,16 @@ class Game:
                     stats_back = (50, 25, 0)
             else:
 
-                if ( g.warning_given ):
-                    sound.FX(Sounds.steamres)
-                    g.warning_given = False
-
                 if ( g.net.hub.Get_Pressure() < PRESSURE_OK ):
                     demand_colour = (128, 128, 0)
                 else:
                     demand_colour = (0, 128, 0)
 
-                g.game_ends_at = None
                 alarm_sound.Set(0.0)
 
             avw = g.net.hub.Get_Avail_Work_Units()
             wu_unused = avw - g.work_units_used
-            self.global_stats_surf.fill(stats_back)
-            stats.Draw_Stats_Window(self.global_stats_surf, [
+            global_stats: List[StatTuple] = [
                   (CITY_COLOUR, 18, "Work Units Available"),
                   (None, None, (wu_unused, (255,0,255),
                               avw, (0,0,0))),
@@ -409,94 +390,38 @@ class Game:
                   (demand_colour, 24, "%1.1f U : %1.1f U" % (
                             supply, demand)),
                   (CITY_COLOUR, 18, "City - Steam Pressure"),
-                  (None, None, g.net.hub.Get_Pressure_Meter())])
-
+                  (None, None, g.net.hub.Get_Pressure_Meter())]
+
+            # Like Draw_Stats, only drawn when something has changed
+            h = hash(str((stats_back, global_stats)))
+            if ( h != self.global_stats_hash ):
+                self.global_stats_surf.fill(stats_back)
+                stats.Draw_Stats_Window(self.global_stats_surf, global_stats)
+                self.global_stats_hash = h
+                self.presenter.Update_Area(self.global_stats_surf,
+                        self.global_stats_surf.get_rect())
+
+            # The tutor's message is over the game area, and is only
+            # changed when all of the game area is drawn again
             tutor.Draw(self.screen, g)
 
             if menu_open:
-                current_menu.Draw(self.screen)
+                self.presenter.Update_Area(self.screen,
+                        current_menu.Draw(self.screen))
                 alarm_sound.Set(0.0)
 
-            mail.Draw_Mail(self.game_screen_surf)
-            pygame.display.flip()
+            # Messages are removed again after they are shown, so
+            # where they were in the last frame has changed too
+            self.presenter.Update_Areas(self.game_screen_surf, mail_areas)
+            mail_areas = mail.Draw_Mail(self.game_screen_surf)
+            self.presenter.Update_Areas(self.game_screen_surf, mail_areas)
+            self.presenter.Present()
             mail.Undraw_Mail(self.game_screen_surf)
 
             if not paused:
-                g.season_fx.Per_Frame(RT_FRAME_LENGTH)
                 self.ui.Frame_Advance(RT_FRAME_LENGTH)
 
-            # Timing effects
-            if ( g.work_timer <= cur_time ):
-                # Fixed periodic effects
-                g.work_timer = cur_time + 0.1
-                g.wu_integral += wu_unused
-                g.work_units_used = g.net.Work_Pulse(g.net.hub.Get_Avail_Work_Units())
-
-                g.net.Steam_Think()
-                g.net.Expire_Popups()
-                mail.Expire_Messages()
-                tutor.Examine_Game(g)
-
-            if ( g.season_effect <= cur_time ):
-                # Seasonal periodic effects
-                g.season_effect = cur_time + g.season_fx.Get_Period()
-                g.season_fx.Per_Period()
-
-            if ((( not tutor.Permit_Season_Change() ) and ( g.season == Season.QUIET ))
-            or ( g.challenge == MenuCommand.PEACEFUL )):
-                # Never-ending season
-                g.season_ends = cur_time + 2.0
-
-            elif ( g.season_ends <= cur_time ):
-                # Season change
-                if (( g.season == Season.QUIET )
-                or ( g.season == Season.STORM )):
-                    g.season = Season.ALIEN
-                    g.season_fx = alien_invasion.Alien_Season(g.net, g.difficulty_level)
-                    sound.FX(Sounds.aliensappr)
-                elif ( g.season == Season.ALIEN ):
-                    g.season = Season.QUAKE
-                    g.season_fx = Quake_Season(g.net, g.difficulty_level)
-                    if ( not tutor.Active() ): # hack...
-                        sound.FX(Sounds.quakewarn)
-                elif ( g.season == Season.QUAKE ):
-                    g.season = Season.STORM
-                    g.season_fx = Storm_Season(g.net, g.difficulty_level)
-                    g.difficulty_level *= 1.2 # 20% harder..
-                    sound.FX(Sounds.stormwarn)
-                else:
-                    assert g.season == Season.START
-                    g.season = Season.QUIET
-                    g.season_fx = Quiet_Season(g.net)
-
-                g.season_ends = cur_time + LENGTH_OF_SEASON
-                g.season_effect = cur_time + ( g.season_fx.Get_Period() / 2 )
-
-                # can't ever be PEACEFUL as seasons never end in peaceful mode
-                assert g.challenge != MenuCommand.PEACEFUL
-                New_Mail("The " + g.season_fx.name +
-                         " season has started.", (200,200,200))
-
-            just_ended = False
-            if (( g.game_ends_at is not None )
-            and ( g.game_ends_at <= cur_time )
-            and ( g.game_running )):
-                # Game over - you lose
-                New_Mail("The City ran out of steam.", (255,0,0))
-                New_Mail("Game Over!", (255,255,0))
-                sound.FX(Sounds.krankor)
-                just_ended = True
-
-            elif (( g.net.hub.tech_level >= DIFFICULTY.CITY_MAX_TECH_LEVEL )
-            and ( g.game_running )):
-                # Game over - you win!
-                g.win = True
-                New_Mail("The City is now fully upgraded!", (255,255,255))
-                New_Mail("You have won the game!", (255,255,255))
-                sound.FX(Sounds.applause)
-                just_ended = True
-
-            if ( just_ended ):
+            if ( self.sim.End_Frame(paused) ):
                 # Won or lost
                 current_menu = in_game_menu = menu.Menu(typing.cast(List[MenuItem], [
                     (None, None, []),
@@ -504,12 +429,7 @@ class Game:
                     exit_options)
                 in_game_menu.Select(None)
 
-                # final record from the game:
-                g.game_running = False
-                g.historian.append(review.Analyse_Network(g))
-
-            if not paused:
-                self.demo.do_user_actions(self.ui, self)
+            self.sim.User_Actions(self.ui, paused)
 
             # Events
             if paused:
@@ -533,6 +453,14 @@ class Game:
                     if e.state == compatibility.APPINPUTFOCUS:  # NO-COV
                         has_input_focus = (e.gain != 0)
 
+                elif (( e.type == pygame.MOUSEBUTTONDOWN )
+                and ( e.button in ( 4, 5 ) )
+                and ( not menu_open )
+                and ( self.game_screen_rect.collidepoint(e.pos) )
+                and ( self.ui.Game_Mouse_Wheel(e.pos, 1 if e.button == 4 else -1) )):
+                    # Mouse wheel zooms a large map
+                    pass
+
                 elif (( e.type == pygame.MOUSEBUTTONDOWN )
                 or ( e.type == pygame.MOUSEMOTION )):
                     if (( e.type == pygame.MOUSEBUTTONDOWN )
@@ -569,9 +497,10 @@ class Game:
                     if ( self.event.is_testing ):  # NO-COV
                         # Cheats.
                         if ( e.key == pygame.K_F10 ):
-                            self.demo.Special_Action("ADVANCE", self)
+                            self.demo.Special_Action("ADVANCE", self.sim)
                         elif ( e.key == pygame.K_F9 ):
                             self.screen.fill((255,255,255))
+                            self.presenter.Update_All()
                         elif ( e.key == pygame.K_F8 ):
                             # Lose the game cheat
                             # Heh, worst cheat ever.
@@ -580,7 +509,7 @@ class Game:
                             g.net.Lose()
                         elif ( e.key == pygame.K_F7 ):
                             # Place screenshot marker in recording
-                            self.demo.Special_Action("SCREENSHOT", self)
+                            self.demo.Special_Action("SCREENSHOT", self.sim)
                         elif ( e.key == pygame.K_F6 ):
                             # Immediate win
                             New_Mail("GAME END CHEAT (WIN)")
@@ -646,10 +575,7 @@ class Game:
                         current_menu = in_game_menu
                         self.ui.Reset()
 
-            if (( g.historian_time <= cur_time )
-            and ( not paused )):
-                g.historian.append(review.Analyse_Network(g))
-                g.historian_time = cur_time + 4
+            self.sim.Record_History(paused)
 
             if self.playback_mode == PlayMode.PLAYBACK:
                 test_resize_trigger += 1
@@ -670,27 +596,22 @@ class Game:
         return quit
 
     def Summary(self) -> None:
-        g = self.g
-        lev = dict()
-        lev[ MenuCommand.TUTORIAL ] = "a Tutorial"
-        lev[ MenuCommand.BEGINNER ] = "a Beginner"
-        lev[ MenuCommand.INTERMEDIATE ] = "an Intermediate"
-        lev[ MenuCommand.EXPERT ] = "an Expert"
-        lev[ MenuCommand.PEACEFUL ] = "a Peaceful"
-
-        assert g.challenge is not None
-        assert lev.get( g.challenge, None )
-        New_Mail("You are playing " + lev[ g.challenge ] + " game.")
-        New_Mail("Win the game by upgrading your city to tech level %u."
-                % DIFFICULTY.CITY_MAX_TECH_LEVEL )
+        self.sim.Summary()
 
 
     def Restore(self, cmd: MenuCommand) -> Game_Data:
         g = self.g
         (g2, result) = save_game.Load(g, cmd)
         if ( result is None ) and ( g2 is not None ):
-            self.g = g = g2
+            self.g = self.sim.g = g = g2
             self.ui.net = g.net
+            resize = ( grid.Get_Map_Size() != g.net.map_size )
+            grid.Set_Map_Size(g.net.map_size)
+            if ( resize ):
+                self.Recreate_UI() # new background
+            g.net.Set_Steam_Engine(self.steam_engine)
+            g.net.Set_Steam_Sleep(self.steam_sleep)
+            g.net.Set_Well_Placement(self.well_placement)
             mail.Initialise()
             mail.Set_Day(g.game_time.Get_Day())
             assert g.challenge is not None
@@ -16,6 +16,10 @@ from . import ui
 from .primitives import *
 from .game_types import *
 
+if typing.TYPE_CHECKING:
+    # Only for type annotations: simulation imports this module
+    from . import simulation
+
 READ_HEADER_NUMBER = 20210307
 WRITE_HEADER_NUMBER = 20210307
 
@@ -44,10 +48,10 @@ class Game_Random:
     def timestamp(self, g: "game.Game_Data") -> None:
         pass
 
-    def do_user_actions(self, ui: "ui.User_Interface", game: "game.Game") -> None:
+    def do_user_actions(self, ui: "ui.User_Interface", sim: "simulation.Simulation") -> None:
         pass
 
-    def Special_Action(self, name: str, game: "game.Game") -> None:       # NO-COV
+    def Special_Action(self, name: str, sim: "simulation.Simulation") -> None:       # NO-COV
         pass
 
     def Action(self, name, *objects) -> None:       # NO-COV
@@ -58,6 +62,10 @@ class Game_Random:
               currents: List[float]) -> None:
         pass
 
+    def Is_Tracing_Steam(self) -> bool:
+        # True if calls to Steam() are recorded or checked
+        return False
+
     def Pre_Save(self) -> None:
         self.rng = None
 
@@ -118,7 +126,7 @@ class Play_and_Record(Game_Random):
         self.rng = random.Random(seed)
         return MenuCommand(challenge)
 
-    def do_user_actions(self, ui: "ui.User_Interface", game: "game.Game") -> None:
+    def do_user_actions(self, ui: "ui.User_Interface", sim: "simulation.Simulation") -> None:
         if not self.play:
             return
 
@@ -134,7 +142,7 @@ class Play_and_Record(Game_Random):
             object_data = struct.unpack("<" + str(len(payload)) + "B", payload)
             if name.startswith("SPECIAL_"):
                 name = name[8:]
-                game.Special_Action(name)
+                sim.Special_Action(name)
             else:
                 ui.Playback_Action(name, *object_data)
             (name, payload) = self.peek_any()
@@ -165,9 +173,9 @@ class Play_and_Record(Game_Random):
             (x3, y3) = pipe.n2.pos
             self.read_and_write("P", "<BBBBd", x1, y1, x3, y3, pipe.current_n1_to_n2)
 
-    def Special_Action(self, name: str, game: "game.Game") -> None:       # NO-COV
+    def Special_Action(self, name: str, sim: "simulation.Simulation") -> None:       # NO-COV
         self.Action("SPECIAL_" + name)
-        game.Special_Action(name)
+        sim.Special_Action(name)
 
     def Action(self, name, *objects) -> None:       # NO-COV
         object_data = []
@@ -199,6 +207,9 @@ class Play_and_Record(Game_Random):
             (neighbour, resist) = neighbour_list[i]
             self.read_and_write("n", "<dd", resist, currents[i])
 
+    def Is_Tracing_Steam(self) -> bool:
+        return bool(self.play or self.record)
+
     def Pre_Save(self) -> None: # NO-COV
         Game_Random.Pre_Save(self)
         self.record = None
@@ -3,27 +3,42 @@
 # This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
 #
 
+# Conversion between grid positions and screen positions.
+#
+# The game area is a square of screen_height pixels. On a normal map
+# (GRID_SIZE) the whole map fits into it. On a large map, the game area
+# is a camera looking at part of the map: it can be scrolled, and zoomed
+# in steps of two between a view of the whole map and the normal scale.
+
 import pygame
 from . import game_types, primitives
 
 
 class Grid:
     def __init__(self) -> None:
+        self.screen_height = primitives.MINIMUM_HEIGHT
+        self.map_size = primitives.GRID_SIZE
+        self.zoom = 0
+        self.max_zoom = 0
+        self.origin = (0, 0)    # screen position of the top left of the map
         self.Set_Grid_Size(10)
 
     def Scr_To_Grid(self, xy: game_types.SurfacePosition) -> game_types.GridPosition:
         (x,y) = xy
-        return (x // self.size, y // self.size)
+        (ox,oy) = self.origin
+        return (( x + ox ) // self.size, ( y + oy ) // self.size)
 
     def Grid_To_Scr(self, xy: game_types.GridPosition) -> game_types.SurfacePosition:
         (x,y) = xy
-        return (( x * self.size ) + self.h_size,
-                ( y * self.size ) + self.h_size )
+        (ox,oy) = self.origin
+        return (( x * self.size ) + self.h_size - ox,
+                ( y * self.size ) + self.h_size - oy )
 
     def Float_Grid_To_Scr(self, xy: game_types.FloatGridPosition) -> game_types.FloatSurfacePosition:
         (x,y) = xy
-        return (( x * self.size ) + self.h_size,
-                ( y * self.size ) + self.h_size )
+        (ox,oy) = self.origin
+        return (( x * self.size ) + self.h_size - ox,
+                ( y * self.size ) + self.h_size - oy )
 
     def Grid_To_Scr_Rect(self, xy: game_types.GridPosition) -> game_types.RectType:
         (x,y) = xy
@@ -41,6 +56,85 @@ class Grid:
     def Get_Grid_Size(self) -> int:
         return self.size
 
+    def Set_Screen_Height(self, height: int) -> None:
+        self.screen_height = height
+        self.__Set_Zoom(self.zoom)
+
+    def Set_Map_Size(self, map_size: game_types.GridPosition) -> None:
+        # A new map is seen at the normal scale, looking at the centre
+        (w, h) = self.map_size = map_size
+        self.__Set_Zoom(None)
+        self.Look_At((w // 2, h // 2))
+
+    def Get_Map_Size(self) -> game_types.GridPosition:
+        return self.map_size
+
+    def Is_Large_Map(self) -> bool:
+        return ( self.map_size != primitives.GRID_SIZE )
+
+    def Zoom(self, steps: int, centre: game_types.Optional[game_types.SurfacePosition] = None) -> bool:
+        # Zoom in (steps > 0) or out, keeping the grid square at the
+        # screen position 'centre' in the same place. Returns True
+        # if the view changed.
+        old_zoom = self.zoom
+        if ( centre is None ):
+            centre = (self.screen_height // 2, self.screen_height // 2)
+        (cx, cy) = centre
+        (ox, oy) = self.origin
+        (fx, fy) = (( cx + ox ) / self.size, ( cy + oy ) / self.size)
+
+        self.__Set_Zoom(self.zoom + steps)
+        self.__Set_Origin((int(fx * self.size) - cx, int(fy * self.size) - cy))
+        return ( old_zoom != self.zoom )
+
+    def Scroll(self, dxdy: game_types.SurfacePosition) -> bool:
+        # Move the camera by (dx,dy) pixels. Returns True if it moved.
+        old_origin = self.origin
+        (dx, dy) = dxdy
+        (ox, oy) = self.origin
+        self.__Set_Origin((ox + dx, oy + dy))
+        return ( old_origin != self.origin )
+
+    def Look_At(self, xy: game_types.GridPosition) -> None:
+        (x, y) = xy
+        half = self.screen_height // 2
+        self.__Set_Origin(((x * self.size) + self.h_size - half,
+                           (y * self.size) + self.h_size - half))
+
+    def Get_Visible_Area(self, margin: int) -> game_types.RectType:
+        # Grid squares that may be seen on the screen, plus a margin
+        # for things that are drawn larger than one square
+        (x1, y1) = self.Scr_To_Grid((0, 0))
+        (x2, y2) = self.Scr_To_Grid((self.screen_height, self.screen_height))
+        return pygame.Rect(x1 - margin, y1 - margin,
+                           x2 - x1 + 1 + ( margin * 2 ),
+                           y2 - y1 + 1 + ( margin * 2 ))
+
+    def __Set_Zoom(self, zoom: game_types.Optional[int]) -> None:
+        # Zoom level 0 fits the whole map on the screen. Each level
+        # doubles the size of a grid square, and the last level is
+        # the normal scale.
+        (w, h) = self.map_size
+        assert w == h
+        fit = max(1, self.screen_height // h)
+        normal = max(1, self.screen_height // primitives.GRID_SIZE[1])
+        self.max_zoom = 0
+        while ( fit << self.max_zoom ) < normal:
+            self.max_zoom += 1
+        if ( zoom is None ):
+            zoom = self.max_zoom
+        self.zoom = max(0, min(zoom, self.max_zoom))
+        self.Set_Grid_Size(min(fit << self.zoom, normal))
+        self.__Set_Origin(self.origin)
+
+    def __Set_Origin(self, xy: game_types.SurfacePosition) -> None:
+        # The camera can't move beyond the edges of the map
+        (x, y) = xy
+        (w, h) = self.map_size
+        x = max(0, min(x, ( w * self.size ) - self.screen_height))
+        y = max(0, min(y, ( h * self.size ) - self.screen_height))
+        self.origin = (x, y)
+
 
 __grid = Grid()
 Grid_To_Scr_Rect = __grid.Grid_To_Scr_Rect
@@ -48,9 +142,13 @@ Grid_To_Scr = __grid.Grid_To_Scr
 Float_Grid_To_Scr = __grid.Float_Grid_To_Scr
 Scr_To_Grid = __grid.Scr_To_Grid
 Get_Grid_Size = __grid.Get_Grid_Size
+Set_Map_Size = __grid.Set_Map_Size
+Get_Map_Size = __grid.Get_Map_Size
+Is_Large_Map = __grid.Is_Large_Map
+Zoom = __grid.Zoom
+Scroll = __grid.Scroll
+Look_At = __grid.Look_At
+Get_Visible_Area = __grid.Get_Visible_Area
 
 def Set_Screen_Height(height: int) -> None:
-    (w, h) = primitives.GRID_SIZE
-    assert w == h
-    __grid.Set_Grid_Size(height // h)
-
+    __grid.Set_Screen_Height(height)
@@ -0,0 +1,113 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# The ground grid records the well or node on each grid square. It is
+# the dictionary from grid positions to items that Network.ground_grid
+# always was, so looking at one square is a dictionary lookup. Alongside
+# it, the type of the item on each square (GroundType) is kept in a flat
+# list with one entry per square, row by row, so questions about a
+# whole area (which squares are free?) are answered by looking at
+# slices of the rows.
+#
+# Only [] assignment and del keep the list up to date, so the grid must
+# not be changed in any other way (update, pop, setdefault...).
+#
+# Items can be placed outside the map, though the game never does so:
+# these are only in the dictionary.
+#
+# The grid may also keep a list of the free squares where a well could
+# appear (see free_cells.py).
+
+import pygame
+
+from .primitives import *
+from .game_types import *
+from . import map_items, free_cells
+
+
+class Ground_Grid(Dict[GridPosition, "map_items.Item"]):
+    def __init__(self, map_size: GridPosition = GRID_SIZE) -> None:
+        dict.__init__(self)
+        (w, h) = self.map_size = map_size
+        self.types: List[GroundType] = [ GroundType.EMPTY ] * ( w * h )
+
+        # Free squares for new wells (see Set_Free_Cells)
+        self.free: Optional[free_cells.Free_Cells] = None
+
+    def __reduce__(self) -> Tuple[typing.Any, ...]:
+        # Saved with the game: the items are put back with [] assignment,
+        # which rebuilds the list, and then the free squares are restored
+        return (Ground_Grid, (self.map_size, ), { "free" : self.free },
+                None, iter(list(self.items())))
+
+    def __Index(self, gpos: GridPosition) -> int:
+        # Index of the square in the list, or -1 if outside the map
+        (x, y) = gpos
+        (w, h) = self.map_size
+        if (( 0 <= x < w ) and ( 0 <= y < h )):
+            return ( y * w ) + x
+        return -1
+
+    def __setitem__(self, gpos: GridPosition, item: "map_items.Item") -> None:
+        dict.__setitem__(self, gpos, item)
+        i = self.__Index(gpos)
+        if ( i >= 0 ):
+            self.types[ i ] = Ground_Type(item)
+            if ( self.free is not None ):
+                self.free.Remove(gpos)
+
+    def __delitem__(self, gpos: GridPosition) -> None:
+        dict.__delitem__(self, gpos)
+        i = self.__Index(gpos)
+        if ( i >= 0 ):
+            self.types[ i ] = GroundType.EMPTY
+            if ( self.free is not None ):
+                self.free.Add(gpos)
+
+    def Set_Free_Cells(self, free: Optional[free_cells.Free_Cells]) -> None:
+        # Start (or stop) keeping a list of free squares
+        self.free = free
+        if ( free is not None ):
+            (w, h) = self.map_size
+            for gpos in self.Get_Free(pygame.Rect(0, 0, w, h)):
+                free.Add(gpos)
+
+    def Get_Type(self, gpos: GridPosition) -> GroundType:
+        i = self.__Index(gpos)
+        if ( i < 0 ):
+            return Ground_Type(self.get(gpos, None))
+        return self.types[ i ]
+
+    def __Rows(self, area: RectType) -> typing.Iterator[Tuple[int, int, int]]:
+        # For each row of the area within the map: y, first and last index + 1
+        (w, h) = self.map_size
+        x1 = max(0, area.left)
+        x2 = min(w, area.right)
+        if ( x1 >= x2 ):
+            return
+        for y in range(max(0, area.top), min(h, area.bottom)):
+            yield (y, ( y * w ) + x1, ( y * w ) + x2)
+
+    def Get_Free(self, area: RectType) -> List[GridPosition]:
+        # Empty squares in the area (and on the map), row by row
+        (w, h) = self.map_size
+        out: List[GridPosition] = []
+        for (y, i1, i2) in self.__Rows(area):
+            row = self.types[ i1:i2 ]
+            if ( GroundType.EMPTY in row ):
+                x1 = i1 - ( y * w )
+                out.extend([ (x1 + j, y) for (j, kind) in enumerate(row)
+                             if kind == GroundType.EMPTY ])
+        return out
+
+
+def Ground_Type(item: "Optional[map_items.Item]") -> GroundType:
+    if ( item is None ):
+        return GroundType.EMPTY
+    elif ( isinstance(item, map_items.Building) ):
+        return GroundType.BUILDING
+    elif ( isinstance(item, map_items.Well) ):
+        return GroundType.WELL
+    return GroundType.OTHER
@@ -3,7 +3,7 @@
 # This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
 #
 
-import math
+import math, functools
 from .game_types import *
 
 # Line intersection algorithm. Thanks to page 113 of
@@ -13,33 +13,48 @@ from .game_types import *
 # Note 2: Can't detect overlapping parallel lines.
 
 def Lines_Intersect(arg1: FloatGridLine, arg2: FloatGridLine) -> bool:
-    ((xa1, ya1), (xa2, ya2)) = arg1
+    return Lines_Intersect_Many(arg2, [ arg1 ])[ 0 ]
+
+def Lines_Intersect_Many(arg2: FloatGridLine, lines: List[FloatGridLine]) -> List[bool]:
+    """For each line in lines, return Lines_Intersect(line, arg2).
+    The fixed line is only unpacked once, which makes this a little
+    faster than calling Lines_Intersect for each line."""
     ((xb1, yb1), (xb2, yb2)) = arg2
-    xa = xa2 - xa1
-    ya = ya2 - ya1
     xb = xb2 - xb1
     yb = yb2 - yb1
 
-    a = ( xa * yb ) - ( xb * ya )
-    if ( a == 0.0 ):
-        return False
+    out: List[bool] = []
+    for ((xa1, ya1), (xa2, ya2)) in lines:
+        xa = xa2 - xa1
+        ya = ya2 - ya1
+
+        a = ( xa * yb ) - ( xb * ya )
+        if ( a == 0.0 ):
+            out.append(False)
+            continue
 
-    b = ((( xa * ya1 ) + ( xb1 * ya ) - ( xa1 * ya )) - ( xa * yb1 ))
-    tb = float(b) / float(a)
+        b = ((( xa * ya1 ) + ( xb1 * ya ) - ( xa1 * ya )) - ( xa * yb1 ))
+        tb = float(b) / float(a)
 
-    if (( tb <= 0.0 ) or ( tb >= 1.0 )):
-        return False # doesn't intersect
+        if (( tb <= 0.0 ) or ( tb >= 1.0 )):
+            out.append(False)
+            continue
+
+        if ( xa == 0.0 ):
+            # xa and ya can't both be zero - if they are, a == 0 too
+            ta = ( yb1 + ( yb * tb ) - ya1 ) / float(ya)
+        else:
+            ta = ( xb1 + ( xb * tb ) - xa1 ) / float(xa)
 
-    if ( xa == 0.0 ):
-        # xa and ya can't both be zero - if they are, a == 0 too
-        ta = ( yb1 + ( yb * tb ) - ya1 ) / float(ya)
-    else:
-        ta = ( xb1 + ( xb * tb ) - xa1 ) / float(xa)
+        # intersects at xb1 + ( xb * tb ), yb1 + ( yb * tb )
+        out.append(( ta > 0.0 ) and ( ta < 1.0 ))
 
-    if (( ta <= 0.0 ) or ( ta >= 1.0 )):
-        return False # doesn't intersect
+    return out
 
-    return True  # intersects at xb1 + ( xb * tb ), yb1 + ( yb * tb )
+# Distance_From_Point_To_Line and Intersects_Node are no longer used by
+# the game, which works with each pipe's Line_Geometry instead. They are
+# kept as the plain definitions that the unit tests check Line_Geometry
+# against, in the same way as GridRect is kept for Walk_Grid_Line.
 
 def Distance_From_Point_To_Line(gpos: FloatGridPosition, ab: GridLine) -> float:
     """Compute the distance from gpos to the nearest point on the line ab"""
@@ -56,6 +71,64 @@ def Intersects_Node(gpos: FloatGridPosition, ab: GridLine) -> bool:
     """Return true if line ab intersects a node in this grid square."""
     return Distance_From_Point_To_Line(gpos, ab) < 0.5
 
+class Line_Geometry:
+    """The geometry of a line between two grid squares (e.g. a pipe),
+    worked out once so that distances can be found quickly."""
+    def __init__(self, ab: GridLine) -> None:
+        ((x1, y1), (x2, y2)) = self.line = ab
+
+        # The line is a.x + b.y + c = 0, and the distance from it is
+        # |a.x + b.y + c| / length. For a grid position this is exactly
+        # the same as Distance_From_Point_To_Line.
+        self.a = y2 - y1
+        self.b = x1 - x2
+        self.c = ( x2 * y1 ) - ( x1 * y2 )
+        self.length = math.hypot(x2 - x1, y2 - y1)
+        self.length_squared = ( self.a * self.a ) + ( self.b * self.b )
+
+        # Bounding box (inclusive)
+        self.left = min(x1, x2)
+        self.right = max(x1, x2)
+        self.top = min(y1, y2)
+        self.bottom = max(y1, y2)
+
+    def Distance_To_Line(self, gpos: GridPosition) -> float:
+        (x0, y0) = gpos
+        return abs(( self.a * x0 ) + ( self.b * y0 ) + self.c ) / self.length
+
+    def Distance_To_Segment(self, gpos: GridPosition) -> float:
+        # The nearest point may be one of the ends
+        (x0, y0) = gpos
+        ((x1, y1), (x2, y2)) = self.line
+        along = (( x0 - x1 ) * ( x2 - x1 )) + (( y0 - y1 ) * ( y2 - y1 ))
+        if ( along <= 0 ):
+            return math.hypot(x0 - x1, y0 - y1)
+        elif ( along >= self.length_squared ):
+            return math.hypot(x0 - x2, y0 - y2)
+        else:
+            return self.Distance_To_Line(gpos)
+
+    def Near_Line_Many(self, points: List[GridPosition], radius: float = 0.5) -> List[bool]:
+        """For each point, return True if the line (extended beyond
+        its ends) passes less than radius away, as Intersects_Node does."""
+        (a, b, c, length) = (self.a, self.b, self.c, self.length)
+        return [ abs(( a * x0 ) + ( b * y0 ) + c ) / length < radius
+                    for (x0, y0) in points ]
+
+def Near_Segments_Many(gpos: GridPosition, lines: "List[Line_Geometry]",
+                       radius: float = 0.5) -> List[bool]:
+    """For each line segment, return True if it passes less than
+    radius from gpos."""
+    (x0, y0) = gpos
+    out: List[bool] = []
+    for line in lines:
+        if (( x0 + radius <= line.left ) or ( x0 - radius >= line.right )
+        or ( y0 + radius <= line.top ) or ( y0 - radius >= line.bottom )):
+            out.append(False)   # too far from the bounding box
+        else:
+            out.append(line.Distance_To_Segment(gpos) < radius)
+    return out
+
 # When checking for intersection with a grid square, check slightly
 # beyond the edges of the square, so as to catch edge cases and corner cases.
 # (These are, of course, *literally* edge cases and corner cases.)
@@ -144,23 +217,71 @@ class GridRect:
                 positions.extend(rect.RecursiveSubdivide(line))
             return positions
 
-def Line_To_Grid_Positions(line: GridLine) -> List[GridPosition]:
-    """Convert a line between two grid squares into a list of grid squares that
-    contain some part of the line."""
-    # line from pos1 to pos2
+def Walk_Grid_Line(line: GridLine) -> typing.Iterator[GridPosition]:
+    """Generate the grid squares that contain some part of the line,
+    from one end to the other. These are the squares found by
+    GridRect.RecursiveSubdivide on the bounding box of the line,
+    which is how they used to be found."""
+    # A square contains part of the line if the line crosses one of its
+    # edges, which are extended by EPSILON at each end (GridRect.Intersects).
+    # The edges are on the lines half way between grid positions. Walk
+    # along the line, visiting each crossing of one of these in turn: the
+    # squares on either side of the crossing are on the path if the
+    # crossing is less than 0.5 + EPSILON from their centres. At the i'th
+    # crossing of a vertical edge, the line has moved (2i + 1) * ny / (2 * nx)
+    # squares in the y direction, so that can be checked with integers.
     (pos1, pos2) = line
     (x1, y1) = pos1
     (x2, y2) = pos2
+    nx = abs(x2 - x1)
+    ny = abs(y2 - y1)
+    sx = 1 if x2 > x1 else -1
+    sy = 1 if y2 > y1 else -1
+    near = 1.0 + ( 2.0 * EPSILON )  # exact, as EPSILON is a power of two
+
+    seen: typing.Set[GridPosition] = set()
+    i = j = 0   # vertical and horizontal edges crossed so far
+    while ( i < nx ) or ( j < ny ):
+        squares: List[GridPosition] = []
+        if (( j >= ny )
+        or (( i < nx ) and ((( 2 * i ) + 1 ) * ny <= (( 2 * j ) + 1 ) * nx ))):
+            # Crossing the vertical edge between columns i and i + 1
+            q = (( 2 * i ) + 1 ) * ny
+            m = q // ( 2 * nx )
+            for row in ( m, m + 1 ):
+                if ( abs(q - ( 2 * nx * row )) < near * nx ):
+                    y = y1 + ( sy * row )
+                    squares.append((x1 + ( sx * i ), y))
+                    squares.append((x1 + ( sx * ( i + 1 )), y))
+            i += 1
+        else:
+            # Crossing the horizontal edge between rows j and j + 1
+            q = (( 2 * j ) + 1 ) * nx
+            m = q // ( 2 * ny )
+            for column in ( m, m + 1 ):
+                if ( abs(q - ( 2 * ny * column )) < near * ny ):
+                    x = x1 + ( sx * column )
+                    squares.append((x, y1 + ( sy * j )))
+                    squares.append((x, y1 + ( sy * ( j + 1 ))))
+            j += 1
+
+        for gpos in squares:
+            if not ( gpos in seen ):
+                seen.add(gpos)
+                yield gpos
+
+# Pipe paths are found again and again for the same pair of nodes
+# (e.g. when the player is choosing where to put a new pipe).
+LINE_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=LINE_CACHE_SIZE)
+def __Cached_Line(line: GridLine) -> Tuple[GridPosition, ...]:
+    return tuple(Walk_Grid_Line(line))
 
-    # make bounding box
-    left = min(x1, x2)
-    right = max(x1, x2) + 1
-    top = min(y1, y2)
-    bottom = max(y1, y2) + 1
-    bbox = GridRect((left, top), (right, bottom))
-
-    # Get minimal set of grid positions by repeated subdivision
-    return bbox.RecursiveSubdivide(line)
+def Line_To_Grid_Positions(line: GridLine) -> List[GridPosition]:
+    """Convert a line between two grid squares into a list of grid squares that
+    contain some part of the line."""
+    return list(__Cached_Line(line))
 
 def Intersects_Grid_Square(gpos: GridPosition, ab: GridLine) -> bool:
     """Return true if line ab intersects this grid square."""
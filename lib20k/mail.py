@@ -21,13 +21,18 @@ class Message:
         self.expiry_countdown = MSG_EXPIRY_TIME
         self.colour = colour
         self.area: RectType = pygame.Rect(0, 0, 1, 1)
-        self.Render()
+        self.undraw: SurfaceType = pygame.Surface((1, 1))
 
-    def Render(self) -> None:
+        # Rendered when first drawn, so that messages can be sent
+        # when there is no display (see simulation.py)
+        self.draw: Optional[SurfaceType] = None
+
+    def Render(self) -> SurfaceType:
         # Text drawn in legacy size 20
         # This will be scaled for the current screen size within the font module.
-        self.draw: SurfaceType = font.Get_Font(20).render(self.text, True, self.colour)
-        self.undraw: SurfaceType = pygame.Surface((1, 1))
+        if ( self.draw is None ):
+            self.draw = font.Get_Font(20).render(self.text, True, self.colour)
+        return self.draw
 
 class Mail:
     def __init__(self) -> None:
@@ -37,7 +42,7 @@ class Mail:
     def Render(self) -> None:
         # Render messages again after screen size change
         for msg in self.messages:
-            msg.Render()
+            msg.draw = None
 
     def Expire_Messages(self) -> None:
         # All messages tick downwards
@@ -52,20 +57,25 @@ class Mail:
         while ((len(self.messages) != 0) and (self.messages[0].expiry_countdown <= 0)):
             self.messages.pop(0)
 
-    def Draw_Mail(self, output: SurfaceType) -> None:
-        # Show current messages
+    def Draw_Mail(self, output: SurfaceType) -> List[RectType]:
+        # Show current messages, returning the areas they cover
         sr = output.get_rect()
         y = sr.height - MSG_MARGIN
+        areas: List[RectType] = []
 
         for msg in reversed(self.messages):
-            y -= msg.draw.get_rect().height
+            draw = msg.Render()
+            y -= draw.get_rect().height
 
-            r = msg.draw.get_rect()
+            r = draw.get_rect()
             r.topleft = (MSG_MARGIN, y)
             r = r.clip(sr)
             msg.area = r
             msg.undraw = output.subsurface(r).copy()
-            output.blit(msg.draw, r.topleft)
+            output.blit(draw, r.topleft)
+            areas.append(r)
+
+        return areas
 
     def Undraw_Mail(self, output: SurfaceType) -> None:
         for msg in self.messages:
@@ -92,8 +102,8 @@ def New_Mail(text: str, colour: Colour = (128,128,128)) -> None:
 def Expire_Messages() -> None:
     __mail.Expire_Messages()
 
-def Draw_Mail(output: SurfaceType) -> None:
-    __mail.Draw_Mail(output)
+def Draw_Mail(output: SurfaceType) -> List[RectType]:
+    return __mail.Draw_Mail(output)
 
 def Undraw_Mail(output: SurfaceType) -> None:
     __mail.Undraw_Mail(output)
@@ -10,6 +10,7 @@ import getopt, traceback, tempfile
 
 from . import game, font, save_menu, resource, menu, events
 from . import config, sound, alien_invasion, quakes, mail, version, compatibility
+from . import simulation
 from .primitives import *
 from .game_types import *
 from .game_random import PlaybackEOF
@@ -30,13 +31,25 @@ def Main(data_dir: str, args: List[str], event: events.Events) -> int:
                 args, "",
                 ["safe",
                     "no-sound", "playback=", "record=",
-                    "challenge=", "is-testing", "test-height="])
+                    "challenge=", "is-testing", "test-height=",
+                    "steam-engine=", "steam-init=", "steam-sleep",
+                    "map-size=", "well-placement=", "headless"])
     except getopt.GetoptError as e:
         print(e)
         print("""
 Options:
     --safe          Don't load previous configuration
     --no-sound      Disable sound
+    --steam-engine=objects|sequential|simultaneous
+                    Choose the steam simulation engine
+    --steam-init=warm-up|equilibrium
+                    Choose how steam is set up in a new game
+    --steam-sleep   Stop simulating parts of the network that have settled
+    --map-size=N    Play on a large map of N by N grid squares (50 to 500)
+    --well-placement=retry|free-list
+                    Choose how the positions of new wells are found
+    --headless      With --playback, play the recording as fast as possible
+                    without a display
 """)
         # Other options are really for development or testing
         return 0
@@ -75,6 +88,58 @@ Options:
             record_challenge = MenuCommand[opts.get("--challenge",
                                         "BEGINNER").upper()]
 
+    steam_engine = SteamEngine[opts.get("--steam-engine", "objects").upper()]
+    if (( steam_engine == SteamEngine.SIMULTANEOUS )
+    and ( playback_mode != PlayMode.OFF )):
+        # Recordings are only compatible with the original update order
+        print("The simultaneous steam engine can't be used with --playback or --record")
+        return 1
+
+    steam_init = SteamInit[opts.get("--steam-init", "warm-up").upper().replace("-", "_")]
+    if (( steam_init == SteamInit.EQUILIBRIUM )
+    and ( playback_mode != PlayMode.OFF )):
+        # Recordings begin with the warm-up
+        print("The equilibrium steam setup can't be used with --playback or --record")
+        return 1
+
+    steam_sleep = ( "--steam-sleep" in opts )
+    if ( steam_sleep and ( playback_mode != PlayMode.OFF )):
+        print("--steam-sleep can't be used with --playback or --record")
+        return 1
+
+    map_width = int(opts.get("--map-size", str(GRID_SIZE[0])))
+    if not ( GRID_SIZE[0] <= map_width <= MAXIMUM_MAP_SIZE[0] ):
+        print("--map-size must be between %d and %d" % (
+                GRID_SIZE[0], MAXIMUM_MAP_SIZE[0]))
+        return 1
+    map_size = (map_width, map_width)
+    if (( map_size != GRID_SIZE ) and ( playback_mode != PlayMode.OFF )):
+        # Recordings are made on the normal map
+        print("--map-size can't be used with --playback or --record")
+        return 1
+
+    well_placement = WellPlacement[opts.get("--well-placement", "retry").upper().replace("-", "_")]
+    if (( well_placement != WellPlacement.RETRY )
+    and ( playback_mode != PlayMode.OFF )):
+        # The random numbers used are different
+        print("--well-placement=free-list can't be used with --playback or --record")
+        return 1
+
+    if "--headless" in opts:
+        if ( playback_mode != PlayMode.PLAYBACK ):
+            print("--headless can only be used with --playback")
+            return 1
+
+        # No display, fonts or sounds
+        assert playback_file is not None
+        resource.No_Sound()
+        start = time.time()
+        frames = simulation.Playback(playback_file, game.Game_Data,
+                                     game.FRAME_RATE, steam_engine)
+        print("End of playback: %u frames in %1.1f seconds" % (
+                frames, time.time() - start), flush=True)
+        return 0
+
     pygame.init()
     pygame.font.init()
 
@@ -124,7 +189,12 @@ Options:
                     challenge=record_challenge, event=event,
                     playback_mode=playback_mode,
                     playback_file=playback_file,
-                    record_file=record_file).Main_Loop()
+                    record_file=record_file,
+                    steam_engine=steam_engine,
+                    steam_init=steam_init,
+                    steam_sleep=steam_sleep,
+                    map_size=map_size,
+                    well_placement=well_placement).Main_Loop()
         except PlaybackEOF:
             print("End of playback")
             return_code = 0
@@ -132,7 +202,8 @@ Options:
         quit = True
 
     while ( not quit ):
-        quit = Main_Menu_Loop(TITLE, clock, event)
+        quit = Main_Menu_Loop(TITLE, clock, event, steam_engine, steam_init,
+                              steam_sleep, map_size, well_placement)
 
     config.Save()
 
@@ -148,7 +219,12 @@ Options:
 
 
 def Main_Menu_Loop(name: str, clock: ClockType,
-                   event: events.Events) -> bool:
+                   event: events.Events,
+                   steam_engine: SteamEngine = SteamEngine.OBJECTS,
+                   steam_init: SteamInit = SteamInit.WARM_UP,
+                   steam_sleep: bool = False,
+                   map_size: GridPosition = GRID_SIZE,
+                   well_placement: WellPlacement = WellPlacement.RETRY) -> bool:
 
     current_menu: menu.Menu
     main_menu = menu.Toggle_Sound_Menu([
@@ -224,7 +300,12 @@ def Main_Menu_Loop(name: str, clock: ClockType,
                         challenge=MenuCommand.TUTORIAL, event=event,
                         playback_mode=PlayMode.OFF,
                         playback_file=None,
-                        record_file=None).Main_Loop()
+                        record_file=None,
+                        steam_engine=steam_engine,
+                        steam_init=steam_init,
+                        steam_sleep=steam_sleep,
+                        map_size=map_size,
+                        well_placement=well_placement).Main_Loop()
 
             elif ( cmd == MenuCommand.LOAD ):
                 current_menu = save_menu.Save_Menu(False)
@@ -264,7 +345,12 @@ def Main_Menu_Loop(name: str, clock: ClockType,
                         challenge=cmd, event=event,
                         playback_mode=PlayMode.OFF,
                         playback_file=None,
-                        record_file=None).Main_Loop()
+                        record_file=None,
+                        steam_engine=steam_engine,
+                        steam_init=steam_init,
+                        steam_sleep=steam_sleep,
+                        map_size=map_size,
+                        well_placement=well_placement).Main_Loop()
 
         else: # Load menu
             if ( cmd != None ):
@@ -276,7 +362,12 @@ def Main_Menu_Loop(name: str, clock: ClockType,
                         restore_pos=cmd, challenge=None, event=event,
                         playback_mode=PlayMode.OFF,
                         playback_file=None,
-                        record_file=None).Main_Loop()
+                        record_file=None,
+                        steam_engine=steam_engine,
+                        steam_init=steam_init,
+                        steam_sleep=steam_sleep,
+                        map_size=map_size,
+                        well_placement=well_placement).Main_Loop()
 
     return True
 
@@ -9,7 +9,7 @@
 import pygame, math
 
 
-from . import partial_vector, stats, resource, draw_obj, sound
+from . import partial_vector, stats, resource, draw_obj, sound, intersect
 from .primitives import *
 from .game_types import *
 from . import steam_model, draw_effects, network
@@ -24,7 +24,7 @@ class Item:
         self.emits_steam = False
         self.tutor_special = False
 
-    def Draw(self, output: SurfaceType) -> None:
+    def Draw(self, output: SurfaceType) -> Optional[RectType]:
         return None
 
     def Draw_Selected(self, output: SurfaceType, highlight: Colour) -> Optional[RectType]: # NO-COV
@@ -69,10 +69,10 @@ class Building(Item):
         self.was_once_complete = False
         self.max_health = 5 * HEALTH_UNIT
         self.base_colour = (255,255,255)
-        self.connection_value = 0
         self.popup_countdown = 0
         self.destroyed = False
         self.tech_level = 1
+        self.net: Optional[network.Network] = None # set when added
 
 
     def Prepare_To_Die(self) -> None:
@@ -85,12 +85,19 @@ class Building(Item):
         self.health -= x
         if ( self.health <= 0 ):
             self.Prepare_To_Die()
+            self.Health_Changed()
             return True
+        self.Health_Changed()
         return False
 
     def Begin_Upgrade(self) -> None:
         pass
 
+    def Health_Changed(self) -> None:
+        # Health, max_health or tech level changed: tell the network
+        if ( self.net is not None ):
+            self.net.Health_Changed(self)
+
     def Exits(self) -> "typing.Sequence[Building]":
         return []
 
@@ -117,6 +124,7 @@ class Building(Item):
                     sound.FX(Sounds.whoosh1)
                 self.complete = True
                 self.was_once_complete = True
+                self.Health_Changed()
 
     def Get_Popup_Items(self) -> List[BarMeterStatTuple]:
         return [ self.Get_Health_Meter() ]
@@ -209,24 +217,35 @@ class Node(Building):
             self.max_health += NODE_UPGRADE_WORK * HEALTH_UNIT
             self.complete = False
             self.steam.Capacity_Upgrade()
+            self.Health_Changed()
+
+    def Steam_Source(self) -> Optional[float]:
+        # Steam added (or removed) by this node on each tick, or None
+        return None
+
+    def Get_Steam_Rate(self) -> float:
+        # Steam added (or removed) by this node per unit time, if it
+        # is working (like Steam_Source, but without side effects)
+        return 0.0
 
     def Steam_Think(self, net: "network.Network") -> None:
-        nl: List[Tuple[steam_model.Steam_Model, float]] = []
-        for p in self.Exits():
-            if ( not p.Is_Broken() ):
-                if ( p.n1 == self ):
-                    if ( not p.n2.Is_Broken() ):
-                        nl.append((p.n2.steam, p.resistance))
-                else:
-                    if ( not p.n1.Is_Broken() ):
-                        nl.append((p.n1.steam, p.resistance))
+        source = self.Steam_Source()
+        if ( source is not None ):
+            self.steam.Source(source)
 
+        (nl, exits) = net.adjacency.Get(net, self)
         nd = self.steam.Think(nl, net)
-        for (p, current) in zip(self.Exits(), nd):
+        for ((p, from_n1), current) in zip(exits, nd):
             # current > 0 means outgoing flow
             if ( current > 0.0 ):
-                p.Flowing_From(self, current)
+                if ( from_n1 ):
+                    p.current_n1_to_n2 = current
+                else:
+                    p.current_n1_to_n2 = - current
 
+        self.Update_Draw_Obj()
+
+    def Update_Draw_Obj(self) -> None:
         if ( self.Is_Broken() ):
             self.draw_obj = self.draw_obj_incomplete
         else:
@@ -251,8 +270,8 @@ class Node(Building):
     def Get_Pressure(self) -> float:
         return self.steam.Get_Pressure()
 
-    def Draw(self, output: SurfaceType) -> None:
-        self.draw_obj.Draw(output, typing.cast(GridPosition, self.pos), (0,0))
+    def Draw(self, output: SurfaceType) -> Optional[RectType]:
+        return self.draw_obj.Draw(output, typing.cast(GridPosition, self.pos), (0,0))
 
     def Draw_Selected(self, output: SurfaceType, highlight: Colour) -> Optional[RectType]:
         size2 = draw_effects.Get_Scaled_Size(2)
@@ -293,6 +312,7 @@ class City_Node(Node):
                 ( CITY_UPGRADE_WORK + ( self.tech_level *
                 DIFFICULTY.CITY_UPGRADE_WORK_PER_LEVEL )) * HEALTH_UNIT )
             self.avail_work_units += 1 # Extra steam demand
+            self.Health_Changed()
         else:
             New_Mail("City is already being upgraded.")
             sound.FX(Sounds.error)
@@ -345,14 +365,16 @@ class City_Node(Node):
             return (self.city_upgrade_start - self.city_upgrade, (255,255,50),
                  self.city_upgrade_start, (64,64,64))
 
-    def Steam_Think(self, net: "network.Network") -> None:
+    def Steam_Source(self) -> Optional[float]:
         x = self.Get_Steam_Demand()
         self.total_steam += x
-        self.steam.Source(- x)
-        Node.Steam_Think(self, net)
+        return - x
 
-    def Draw(self, output: SurfaceType) -> None:
-        Node.Draw(self, output)
+    def Get_Steam_Rate(self) -> float:
+        return - self.Get_Steam_Demand()
+
+    def Draw(self, output: SurfaceType) -> Optional[RectType]:
+        return Node.Draw(self, output)
 
     def Get_Popup_Items(self) -> List[BarMeterStatTuple]:
         return [ self.Get_City_Upgrade_Meter() ,
@@ -385,14 +407,18 @@ class Well_Node(Node):
         self.production = 0
 
 
-    def Steam_Think(self, net: "network.Network") -> None:
+    def Steam_Source(self) -> Optional[float]:
         if ( not self.Needs_Work() ):
             self.production = (DIFFICULTY.BASIC_STEAM_PRODUCTION + (self.tech_level *
                     DIFFICULTY.STEAM_PRODUCTION_PER_LEVEL))
-            self.steam.Source(self.production)
+            return self.production
         else:
             self.production = 0
-        Node.Steam_Think(self, net)
+            return None
+
+    def Get_Steam_Rate(self) -> float:
+        return (DIFFICULTY.BASIC_STEAM_PRODUCTION + (self.tech_level *
+                DIFFICULTY.STEAM_PRODUCTION_PER_LEVEL))
 
     def Get_Information(self) -> List[StatTuple]:
         return Node.Get_Information(self) + [
@@ -417,6 +443,7 @@ class Pipe(Building):
 
         self.pos = ((x1 + x2) // 2, (y1 + y2) // 2)
         self.length = net.demo.hypot(x1 - x2, y1 - y2)
+        self.geometry = intersect.Line_Geometry((n1.pos, n2.pos))
         self.max_health = int(self.length + 1) * HEALTH_UNIT
         self.base_colour = (0,255,0)
         self.resistance: float = ( self.length + 2.0 ) * RESISTANCE_FACTOR
@@ -440,17 +467,11 @@ class Pipe(Building):
                         self.length * HEALTH_UNIT )
             self.complete = False
             self.resistance *= PIPE_UPGRADE_RESISTANCE_FACTOR
+            self.Health_Changed()
 
     def Exits(self) -> typing.Sequence[Node]:
         return [self.n1, self.n2]
 
-    def Flowing_From(self, node: Node, current: float) -> None:
-        if ( node == self.n1 ):
-            self.current_n1_to_n2 = current
-        else:
-            assert node == self.n2
-            self.current_n1_to_n2 = - current
-
     def Take_Damage(self, dmg_level=1) -> bool:
         # Pipes have health proportional to their length.
         # To avoid a rules loophole, damage inflicted on
@@ -458,7 +479,13 @@ class Pipe(Building):
         # a very soft target.
         return Building.Take_Damage(self, dmg_level * (self.length + 1.0))
 
-    def Draw(self, output: SurfaceType) -> None:
+    def Draw(self, output: SurfaceType) -> Optional[RectType]:
+        r = self.Draw_Body(output)
+        self.Draw_Dots(output)
+        return r
+
+    def Draw_Body(self, output: SurfaceType) -> RectType:
+        # The line, which only changes when the pipe is damaged or repaired
         (x1,y1) = Grid_To_Scr(self.n1.pos)
         (x2,y2) = Grid_To_Scr(self.n2.pos)
         size3 = draw_effects.Get_Scaled_Size(3)
@@ -466,22 +493,38 @@ class Pipe(Building):
         if ( self.Needs_Work() ):
             # Plain red line
             pygame.draw.line(output, (255,0,0), (x1,y1), (x2,y2), size3)
-            self.dot_drawing_offset = 0
-            return
+        else:
+            # Dark green backing line:
+            pygame.draw.line(output, self.BACKING_COLOUR, (x1,y1), (x2,y2), size3)
 
+        return self.Get_Screen_Rect()
 
-        # Dark green backing line:
-        colour = (32,128,20)
-        pygame.draw.line(output, colour, (x1,y1), (x2,y2), size3)
+    def Draw_Dots(self, output: SurfaceType) -> List[RectType]:
+        # The dots moving along the line, drawn on top of the body.
+        # Returns the areas which have changed: where the dots were
+        # (now covered up) and where they are now.
+        changed: List[RectType] = []
+        if ( self.Needs_Work() ):
+            self.dot_drawing_offset = 0
+            return changed
 
-        if ( self.current_n1_to_n2 == 0.0 ):
-            return
+        if (( self.current_n1_to_n2 == 0.0 )
+        and ( len(self.dot_positions) == 0 )):
+            return changed
 
+        (x1,y1) = Grid_To_Scr(self.n1.pos)
+        (x2,y2) = Grid_To_Scr(self.n2.pos)
+        size3 = draw_effects.Get_Scaled_Size(3)
         size1 = max(1, size3 // 3)
-        r = pygame.Rect(0,0,size1,size1)
         for pos in self.dot_positions:
+            r = pygame.Rect(0,0,size1,size1)
             r.center = (int(pos[0]), int(pos[1]))
-            output.fill(colour, r)
+            output.fill(self.BACKING_COLOUR, r)
+            changed.append(r)
+
+        if ( self.current_n1_to_n2 == 0.0 ):
+            self.dot_positions = []
+            return changed
 
         # Thanks to Acidd_UK for the following suggestion.
         dots = int(( self.length * 0.3 ) + 1.0)
@@ -498,8 +541,21 @@ class Pipe(Building):
                     self.SFACTOR) ]
 
         for pos in self.dot_positions:
+            r = pygame.Rect(0,0,size1,size1)
             r.center = (int(pos[0]), int(pos[1]))
             output.fill(colour, r)
+            changed.append(r)
+
+        return changed
+
+    def Get_Screen_Rect(self) -> RectType:
+        # The area covered by the line
+        size3 = draw_effects.Get_Scaled_Size(3)
+        r = pygame.Rect(Grid_To_Scr(self.n1.pos), (1, 1))
+        r.union_ip(pygame.Rect(Grid_To_Scr(self.n2.pos), (1, 1)))
+        return r.inflate(size3 * 2, size3 * 2)
+
+    BACKING_COLOUR = (32,128,20)
 
     # Tune these to alter the speed of the dots.
     SFACTOR = 512
@@ -518,6 +574,10 @@ class Pipe(Building):
     def Pre_Save(self) -> None:
         self.dot_positions = []
 
+    def Forget_Dots(self) -> None:
+        # The dots drawn last are no longer on the screen
+        self.dot_positions = []
+
     def Draw_Selected(self, output: SurfaceType, highlight: Colour) -> Optional[RectType]:
         p1 = Grid_To_Scr(self.n1.pos)
         p2 = Grid_To_Scr(self.n2.pos)
@@ -8,7 +8,7 @@
 import pygame, enum
 
 
-from . import stats, draw_effects, resource, render, sound, events, config
+from . import stats, draw_effects, resource, render, sound, events, config, present
 from .game_types import *
 from .primitives import *
 
@@ -94,7 +94,8 @@ class Menu:
         (self.surf_store, self.control_rects, _) = self.__Draw((width_hint, height_hint))
         self.bbox = pygame.Rect(0, 0, width_hint, height_hint)
 
-    def Draw(self, output: SurfaceType, centre: Optional[SurfacePosition] = None) -> None:
+    def Draw(self, output: SurfaceType, centre: Optional[SurfacePosition] = None) -> Optional[RectType]:
+        # Returns the area which has been drawn, if any
 
         # If the output window size has changed, recompute the size of the menu
         if output.get_rect().size != self.output_size:
@@ -103,7 +104,7 @@ class Menu:
 
         # Only redraw the menu if an update is required
         if not self.update_required:
-            return
+            return None
 
         self.update_required = False
 
@@ -126,6 +127,8 @@ class Menu:
             elif ( num == self.hover ):
                 pygame.draw.rect(output, (0, 180, 0), r, 1)
 
+        return self.bbox.copy()
+
 
     def __Draw(self, width_height_hint: SurfacePosition) -> Tuple[
             SurfaceType, List[ControlRectType], SurfacePosition]:
@@ -263,10 +266,11 @@ def Simple_Menu_Loop(screen: SurfaceType, current_menu: Menu,
     (x,y) = xy
     cmd = None
     quit = False
+    presenter = present.Presenter()
 
     while (( cmd is None ) and not quit ):
-        current_menu.Draw(screen, (x,y))
-        pygame.display.flip()
+        presenter.Update_Area(screen, current_menu.Draw(screen, (x,y)))
+        presenter.Present()
 
         e = event.wait()
         while ( e.type != pygame.NOEVENT ):
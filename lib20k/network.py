@@ -8,7 +8,10 @@
 
 import math
 
-from . import map_items, sound, game_random, intersect, pipe_grid
+from . import map_items, sound, game_random, intersect, pipe_grid, steam_solver
+from . import connection_map, work_scheduler, steam_model, steam_sleep
+from . import components, adjacency, draw_index, segment_index, ground_grid
+from . import free_cells
 from .primitives import *
 from .game_types import *
 from .mail import New_Mail
@@ -16,15 +19,49 @@ from .mail import New_Mail
 
 class Network:
     def __init__(self, demo: "game_random.Game_Random",
-                 teaching: bool) -> None:
+                 teaching: bool, map_size: GridPosition = GRID_SIZE,
+                 well_placement: WellPlacement = WellPlacement.RETRY) -> None:
         self.demo = demo
-        self.ground_grid: Dict[GridPosition, map_items.Item] = dict()
-        self.pipe_grid = pipe_grid.Pipe_Grid()
+        self.map_size = map_size
+        self.ground_grid = ground_grid.Ground_Grid(map_size)
         self.storm_pipe_grid = pipe_grid.Storm_Pipe_Grid()
         self.well_list: List[map_items.Well] = []
         self.node_list: List[map_items.Node] = []
         self.pipe_list: List[map_items.Pipe] = []
 
+        # Pipes by the positions of their ends (see Find_Pipe), and wells
+        # by position (see Find_Well)
+        self.pipe_ends: Dict[GridLine, List[map_items.Pipe]] = dict()
+        self.well_at: Dict[GridPosition, map_items.Well] = dict()
+
+        # Where are the pipes? (for finding pipes near something)
+        self.pipe_index = segment_index.Segment_Index()
+
+        # Which items are in each part of the map (for drawing)
+        self.draw_index = draw_index.Draw_Index()
+
+        # Changed whenever nodes or pipes are added or removed
+        self.topology_version = 0
+
+        # Groups of nodes connected by pipes (see Get_Components)
+        self.components = components.Component_Index()
+
+        # Where steam can flow from each node
+        self.adjacency = adjacency.Adjacency()
+
+        # Which buildings are connected to the city? (set up below)
+        self.connection_map = connection_map.Connection_Map()
+
+        # Which buildings need work?
+        self.work_scheduler = work_scheduler.Work_Scheduler(self.connection_map)
+
+        # Steam is simulated by the nodes themselves unless an
+        # array-backed solver is selected (see Set_Steam_Engine)
+        self.steam_solver: Optional[steam_solver.Steam_Solver] = None
+
+        # Settled parts of the network may sleep (see Set_Steam_Sleep)
+        self.steam_sleep: Optional[steam_sleep.Steam_Sleep] = None
+
         # UI updates required?
         self.dirty = False
 
@@ -32,12 +69,15 @@ class Network:
         self.popups: typing.Set[map_items.Building] = set([])
 
         # Wells are created. All wells must be at least a certain
-        # distance from the city.
-        for i in range(10):
+        # distance from the city. A large map gets the same number
+        # of wells per grid square as a normal one.
+        self.Set_Well_Placement(well_placement)
+        (mw, mh) = map_size
+        for i in range(( 10 * mw * mh ) // ( GRID_SIZE[0] * GRID_SIZE[1] )):
             self.Make_Well(teaching)
 
         # Get centre:
-        (x,y) = GRID_CENTRE
+        (x,y) = self.Get_Centre()
 
         # An additional bootstrap well, plus node, is created close to the city.
         wgpos = (x + 5,y + self.demo.randint(-3,3))
@@ -59,9 +99,7 @@ class Network:
 
         # Final setup
         self.hub: map_items.City_Node = cn # hub := city node
-
-        self.connection_value = 1
-        self.Work_Pulse(0) # used to make connection map
+        self.connection_map.Set_Hub(cn)
 
 
     def Add_Finished_Node(self, node: "map_items.Node") -> None:
@@ -78,19 +116,14 @@ class Network:
                 New_Mail("Item is destroyed.")
             return False
 
-        # There might be a pipe in the way. Then again,
-        # it may have been destroyed already.
-        for pipe in self.pipe_grid.Get_Pipes(gpos):
-            if ( pipe.Is_Destroyed() ):
-                continue
-
-            if intersect.Intersects_Node(gpos, (pipe.n1.pos, pipe.n2.pos)):
-                if ( not inhibit_effects ):
-                    New_Mail("Can't build there - pipe in the way!")
-                    sound.FX(Sounds.error)
-                return False
+        # There might be a pipe in the way.
+        if ( len(self.pipe_index.Get_Near_Point(gpos, 0.5)) != 0 ):
+            if ( not inhibit_effects ):
+                New_Mail("Can't build there - pipe in the way!")
+                sound.FX(Sounds.error)
+            return False
 
-        if ( isinstance(self.ground_grid.get(gpos, None), map_items.Building) ):
+        if ( self.ground_grid.Get_Type(gpos) == GroundType.BUILDING ):
             if ( not inhibit_effects ):
                 New_Mail("Can't build there - building in the way!")
                 sound.FX(Sounds.error)
@@ -98,10 +131,16 @@ class Network:
 
         if ( isinstance(item, map_items.Node) ):
             self.node_list.append(item)
+            self.draw_index.Add_Node(item)
             self.ground_grid[gpos] = item
+            self.topology_version += 1
+            item.net = self
+            self.Health_Changed(item)
 
         elif ( isinstance(item, map_items.Well) ):
             self.well_list.append(item)
+            self.well_at[gpos] = item
+            self.draw_index.Add_Well(item)
             self.ground_grid[gpos] = item
         else:
             return False # unknown type!
@@ -110,33 +149,34 @@ class Network:
 
     def Is_Connected(self, node: "map_items.Building") -> bool:
         assert isinstance(node, map_items.Building)
-        return ( node.connection_value == self.connection_value )
+        return self.connection_map.Is_Connected(node)
+
+    def Health_Changed(self, item: "map_items.Building") -> None:
+        # Called by a building after damage, work or an upgrade
+        self.work_scheduler.Add(item)
+        self.adjacency.Health_Changed(item)
+        if ( self.steam_solver is not None ):
+            self.steam_solver.Health_Changed(item)
+        if ( self.steam_sleep is not None ):
+            self.steam_sleep.Wake(self, item)
 
     def Work_Pulse(self, work_points: int) -> int:
-        # Connection map is built up. Process is
-        # recursive: a wavefront spreads out across the net.
-        #
-        # At the same time, find the first node that needs work doing,
-        # and do work at it.
+        # Work is done at the connected buildings that need it,
+        # nearest to the city first (see Work_Scheduler).
         used = 0
-        now: typing.Set[map_items.Building] = set([ self.hub ])
-        self.connection_value += 1
-        cv = self.connection_value
-        while ( len(now) != 0 ):
-            next: typing.Set[map_items.Building] = set([])
-            for node in sorted(now, key=lambda node:
-                            (node.Manhattan_Distance_From(self.hub), node.pos)):
-                if ( node.connection_value < cv ):
-                    if (( work_points > 0 ) and node.Needs_Work() ):
-                        node.Do_Work()
-                        self.Popup(node)
-                        work_points -= 1
-                        used += 1
-                    node.connection_value = cv
-                    next |= set(node.Exits())
-            now = next
+        for node in self.work_scheduler.Get_Work(work_points):
+            node.Do_Work()
+            node.Health_Changed() # more work may be needed
+            self.Popup(node)
+            used += 1
         return used
 
+    def Set_Work_Priority(self, priority: WorkPriority) -> None:
+        self.work_scheduler.Set_Priority(priority)
+
+    def Get_Work_Priority(self) -> WorkPriority:
+        return self.work_scheduler.Get_Priority()
+
     def Popup(self, node: "Optional[map_items.Building]") -> None:
         if ( node is not None ):
             self.popups.add(node)
@@ -148,10 +188,91 @@ class Network:
             if node.popup_countdown <= 0:
                 self.popups.discard(node)
 
+    def Set_Steam_Engine(self, engine: SteamEngine) -> None:
+        if ( engine == SteamEngine.OBJECTS ):
+            self.steam_solver = None
+        else:
+            self.steam_solver = steam_solver.Steam_Solver(engine)
+
+    def Get_Steam_Engine(self) -> SteamEngine:
+        if ( self.steam_solver is None ):
+            return SteamEngine.OBJECTS
+        return self.steam_solver.engine
+
+    def Get_Components(self) -> "List[components.Component]":
+        # Steam can't flow between components, so they can be
+        # simulated separately
+        return self.components.Get_Components(self)
+
+    def Set_Steam_Sleep(self, enable: bool) -> None:
+        # Sleeping only applies to the OBJECTS engine, and never
+        # when the steam is traced for a recording
+        if ( enable ):
+            self.steam_sleep = steam_sleep.Steam_Sleep()
+        else:
+            self.steam_sleep = None
+
+    def Is_Steam_Sleep(self) -> bool:
+        return self.steam_sleep is not None
+
     def Steam_Think(self) -> None:
+        if ( self.steam_solver is not None ):
+            self.steam_solver.Think(self)
+            return
+
+        if (( self.steam_sleep is not None )
+        and ( not self.demo.Is_Tracing_Steam() )):
+            self.steam_sleep.Think(self)
+            return
+
         for n in self.node_list:
             n.Steam_Think(self)
 
+    def Predict_Equilibrium(self) -> "Dict[map_items.Node, float]":
+        # The charge that each node would settle to if nothing changed.
+        # Nodes and pipes that need work carry no steam.
+        index: Dict[map_items.Node, int] = dict()
+        charge: List[float] = []
+        capacity: List[float] = []
+        source: List[float] = []
+        for node in self.node_list:
+            index[ node ] = len(charge)
+            charge.append(node.steam.charge)
+            capacity.append(node.steam.capacity)
+            if ( node.Is_Broken() ):
+                source.append(0.0)
+            else:
+                source.append(node.Get_Steam_Rate())
+
+        pipes: List[Tuple[int, int, float]] = []
+        for p in self.pipe_list:
+            if (( not p.Is_Broken() )
+            and ( not p.n1.Is_Broken() )
+            and ( not p.n2.Is_Broken() )
+            and ( p.n1 in index ) and ( p.n2 in index )):
+                pipes.append((index[ p.n1 ], index[ p.n2 ], p.resistance))
+
+        out = steam_model.Equilibrium(charge, capacity, source, pipes)
+        return dict([ (node, out[ i ]) for (node, i) in index.items() ])
+
+    def Set_Equilibrium(self) -> None:
+        # Jump straight to the equilibrium (see Predict_Equilibrium)
+        for (node, charge) in self.Predict_Equilibrium().items():
+            node.steam.charge = charge
+            node.steam.voltage = charge / node.steam.capacitance
+            node.Update_Draw_Obj()
+
+        for p in self.pipe_list:
+            if (( not p.Is_Broken() )
+            and ( not p.n1.Is_Broken() )
+            and ( not p.n2.Is_Broken() )):
+                p.current_n1_to_n2 = ( p.n1.steam.voltage - p.n2.steam.voltage ) / p.resistance
+
+        if ( self.steam_solver is not None ):
+            self.steam_solver.Flush()
+        if ( self.steam_sleep is not None ):
+            self.steam_sleep.Wake_All()
+
 
     def Add_Pipe(self, n1: "map_items.Node", n2: "map_items.Node") -> "Optional[map_items.Pipe]":
 
@@ -161,11 +282,14 @@ class Network:
             return None
 
         # What's in the pipe's path?
-        path = self.pipe_grid.Get_Path(n1, n2)
+        # The original algorithm for determining the grid squares intersected by a pipe
+        # was not completely accurate and made some glitches possible. This one is better.
+        # There may be some (invalid) pipe and node placements that are no longer allowed.
+        path = intersect.Line_To_Grid_Positions((n1.pos, n2.pos))
         other_pipes = set()
         other_items = set()
         for gpos in path:
-            other_pipes |= set(self.pipe_grid.Get_Pipes(gpos))
+            other_pipes |= set(self.pipe_index.Get_Square(gpos))
             n = self.ground_grid.get(gpos, None)
             if n is not None:
                 other_items.add(n)
@@ -173,37 +297,54 @@ class Network:
         other_items.discard(n1)
         other_items.discard(n2)
 
-        for n in other_items:
-            if ((not n.Is_Destroyed())
-            and (not isinstance(n, map_items.Well))
-            and intersect.Intersects_Node(n.pos, (n1.pos, n2.pos))):
-                sound.FX(Sounds.error)
-                New_Mail("Pipe collides with other items.")
-                return None
-
-        for p in other_pipes:
-            if not p.Is_Destroyed ():
-                if ((( p.n1 == n1 ) and ( p.n2 == n2 ))
-                or (( p.n1 == n2 ) and ( p.n2 == n1 ))):
-                    sound.FX(Sounds.error)
-                    New_Mail("There is already a pipe there.")
-                    return None
-                if intersect.Lines_Intersect((p.n1.pos, p.n2.pos), (n1.pos, n2.pos)):
-                    sound.FX(Sounds.error)
-                    New_Mail("That crosses an existing pipe.")
-                    return None
+        other_nodes = [ n for n in other_items
+                        if ((not n.Is_Destroyed())
+                            and (not isinstance(n, map_items.Well))) ]
+        geometry = intersect.Line_Geometry((n1.pos, n2.pos))
+        if any(geometry.Near_Line_Many([ n.pos for n in other_nodes ])):
+            sound.FX(Sounds.error)
+            New_Mail("Pipe collides with other items.")
+            return None
+
+        if ( self.Find_Pipe(n1, n2) is not None ):
+            sound.FX(Sounds.error)
+            New_Mail("There is already a pipe there.")
+            return None
+
+        if any(intersect.Lines_Intersect_Many((n1.pos, n2.pos),
+                        [ (p.n1.pos, p.n2.pos) for p in other_pipes ])):
+            sound.FX(Sounds.error)
+            New_Mail("That crosses an existing pipe.")
+            return None
 
         sound.FX(Sounds.bamboo1)
         pipe = map_items.Pipe(n1, n2, self)
         self.pipe_list.append(pipe)
+        self.pipe_ends.setdefault(Ends_Key(n1.pos, n2.pos), []).append(pipe)
+        self.pipe_index.Add(pipe, path)
+        self.draw_index.Add_Pipe(pipe, path)
+        self.topology_version += 1
 
-        self.pipe_grid.Add_Pipe(pipe)
         self.storm_pipe_grid.Add_Pipe(pipe)
+        self.connection_map.Add_Pipe(pipe)
+        pipe.net = self
+        self.Health_Changed(pipe)
 
         return pipe
 
     def Get_Pipe(self, gpos: GridPosition) -> "Optional[map_items.Pipe]":
-        return self.pipe_grid.Get_Pipe_Rotate(gpos)
+        return self.pipe_index.Get_Pipe_Rotate(gpos)
+
+    def Find_Pipe(self, n1: "map_items.Item", n2: "map_items.Item") -> "Optional[map_items.Pipe]":
+        # The pipe joining these two nodes (either way round), if any
+        for pipe in self.pipe_ends.get(Ends_Key(n1.pos, n2.pos), []):
+            if ((( pipe.n1 == n1 ) and ( pipe.n2 == n2 ))
+            or (( pipe.n1 == n2 ) and ( pipe.n2 == n1 ))):
+                return pipe
+        return None
+
+    def Find_Well(self, gpos: GridPosition) -> "Optional[map_items.Well]":
+        return self.well_at.get(gpos, None)
 
     def Destroy(self, node: "map_items.Item", by="") -> None:
         if ( isinstance(node, map_items.Pipe) ):
@@ -229,9 +370,7 @@ class Network:
         # Find the well beneath a well node (if applicable)
         restore_node: Optional[map_items.Item] = None
         if isinstance(node, map_items.Well_Node):
-            for n in self.well_list:
-                if n.pos == gpos:
-                    restore_node = n 
+            restore_node = self.Find_Well(gpos)
 
         self.dirty = True
 
@@ -240,6 +379,10 @@ class Network:
 
         node.Prepare_To_Die()
         List_Destroy(self.node_list, node)
+        self.draw_index.Remove(node)
+        self.connection_map.Remove(node)
+        self.work_scheduler.Remove(node)
+        self.topology_version += 1
 
         # restore the well (if applicable)
         if restore_node is not None:
@@ -253,16 +396,47 @@ class Network:
         self.dirty = True
         pipe.Prepare_To_Die()
         List_Destroy(self.pipe_list, pipe)
+        key = Ends_Key(pipe.n1.pos, pipe.n2.pos)
+        pipes = self.pipe_ends.get(key, [])
+        List_Destroy(pipes, pipe)
+        if ( len(pipes) == 0 ):
+            self.pipe_ends.pop(key, None)
+        self.pipe_index.Remove(pipe)
+        self.draw_index.Remove(pipe)
+        self.storm_pipe_grid.Remove_Pipe(pipe)
         List_Destroy(pipe.n1.pipes, pipe)
         List_Destroy(pipe.n2.pipes, pipe)
+        self.connection_map.Remove(pipe)
+        self.work_scheduler.Remove(pipe)
+        self.topology_version += 1
+
+    def Set_Well_Placement(self, placement: WellPlacement) -> None:
+        if ( placement == WellPlacement.FREE_LIST ):
+            self.ground_grid.Set_Free_Cells(free_cells.Free_Cells(
+                        self.Get_Centre(), WELL_DISTANCE))
+        else:
+            self.ground_grid.Set_Free_Cells(None)
+
+    def Get_Well_Placement(self) -> WellPlacement:
+        if ( self.ground_grid.free is None ):
+            return WellPlacement.RETRY
+        return WellPlacement.FREE_LIST
 
     def Make_Well(self, teaching=False, inhibit_effects=False) -> None:
         self.dirty = True
-        (x, y) = (cx, cy) = GRID_CENTRE
-        (mx, my) = GRID_SIZE
+        (x, y) = (cx, cy) = self.Get_Centre()
+        (mx, my) = self.map_size
+
+        if ( self.ground_grid.free is not None ):
+            # Choose one of the free squares (in the tutorial, only
+            # those right of the city)
+            gpos = self.ground_grid.free.Choose(self.demo, teaching)
+            if ( gpos is not None ):
+                self.Add_Grid_Item(map_items.Well(gpos), inhibit_effects or teaching)
+            return
 
         while (( (x, y) in self.ground_grid )
-        or ( self.demo.hypot( x - cx, y - cy ) < 10 )):
+        or ( self.demo.hypot( x - cx, y - cy ) < WELL_DISTANCE )):
             x = self.demo.randint(0, mx - 1)
             y = self.demo.randint(0, my - 1)
             if ( teaching ):
@@ -272,9 +446,15 @@ class Network:
         w = map_items.Well((x,y))
         self.Add_Grid_Item(w, inhibit_effects or teaching)
 
+    def Get_Centre(self) -> GridPosition:
+        (w, h) = self.map_size
+        return (w // 2, h // 2)
+
     def Pre_Save(self) -> None:
         for p in self.pipe_list:
             p.Pre_Save()
+        if ( self.steam_solver is not None ):
+            self.steam_solver.Flush()
         self.demo.Pre_Save()
 
     def Post_Load(self) -> None:
@@ -283,6 +463,14 @@ class Network:
     def Lose(self) -> None:
         for n in self.node_list:
             n.Lose()
+        if ( self.steam_solver is not None ):
+            self.steam_solver.Flush()
+
+def Ends_Key(pos1: GridPosition, pos2: GridPosition) -> GridLine:
+    # The same for a pipe in either direction
+    if ( pos2 < pos1 ):
+        return (pos2, pos1)
+    return (pos1, pos2)
 
 def List_Destroy(lst: List[typing.Any], itm: typing.Any) -> None:
     if itm in lst:
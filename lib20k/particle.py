@@ -6,6 +6,8 @@
 # A generator for particle animations of various types (pick an appropriate
 # factory class for your application)
 # Particle animations are precomputed and put onto colour-keyed surfaces.
+# They are remembered for the most recent sizes, so they are only made
+# again if the screen is resized to a new height.
 #
 
 import pygame, math, random
@@ -17,6 +19,15 @@ from .game_types import *
 
 MAX_STEAM_SIZE = 20
 MAX_STORM_SIZE = 70
+NUM_FRAMES = 80
+
+# Particle class, size of the frames, size of each particle
+EffectKey = Tuple[typing.Callable[[], "Abstract_Particle"], int, int]
+effect_cache: Dict[EffectKey, List[SurfaceType]] = dict()
+
+# Effects are kept for this many sizes of each particle class
+# (as for draw_obj.CACHE_SQUARE_SIZES)
+CACHE_SIZES = 4
 
 
 class Abstract_Particle:
@@ -73,6 +84,7 @@ class Storm_Particle(Abstract_Particle):
     def __init__(self) -> None:
         scale4 = draw_effects.Get_Scaled_Size(4) # eye of storm radius = 4.
         scale1 = scale4 * 0.25
+        self.centre = self.Max_Size() // 2
         self.radius = scale4 + ( random.random() * scale1 * 1.8 )
         self.angle = random.random() * TWO_PI
         self.dr = (abs(random.normalvariate(0.0,0.15)) + 0.01) * scale1
@@ -84,8 +96,8 @@ class Storm_Particle(Abstract_Particle):
         self.c = stormsample.get_at((x,y))
 
     def Next(self) -> NextParticleType:
-        x = ( self.Max_Size() // 2 ) + ( self.radius * math.cos(self.angle) )
-        y = ( self.Max_Size() // 2 ) + ( self.radius * math.sin(self.angle) )
+        x = self.centre + ( self.radius * math.cos(self.angle) )
+        y = self.centre + ( self.radius * math.sin(self.angle) )
         self.angle += 0.2 # angular velocity
         self.radius += self.dr
         return ((x,y), self.c)
@@ -103,17 +115,34 @@ class Storm_Particle(Abstract_Particle):
 
 def Make_Particle_Effect(particle_class: typing.Callable[[],
                             Abstract_Particle]) -> List[SurfaceType]:
-    # Generate base frames.
-    NUM_FRAMES = 80
-
+    # The frames are shared by everyone using the same effect at this size,
+    # so they must not be drawn on.
     p = particle_class()
-    sz = p.Max_Size()
+    key: EffectKey = (particle_class, p.Max_Size(), p.Particle_Size())
+    particle_effect = effect_cache.get(key, None)
+    if particle_effect is None:
+        effect_cache[key] = particle_effect = Draw_Particle_Effect(particle_class, p)
+        Flush_Particle_Effect_Cache(particle_class)
+    return particle_effect
+
+def Flush_Particle_Effect_Cache(particle_class: typing.Callable[[],
+                                    Abstract_Particle]) -> None:
+    # Forget the effects made for all but the most recent sizes
+    keys = [ key for key in effect_cache.keys() if key[ 0 ] == particle_class ]
+    for key in keys[ :-CACHE_SIZES ]:
+        del effect_cache[ key ]
+
+def Draw_Particle_Effect(particle_class: typing.Callable[[], Abstract_Particle],
+                         p: Abstract_Particle) -> List[SurfaceType]:
+    # Generate base frames.
+    max_size = sz = p.Max_Size()
     particle_effect: List[SurfaceType] = [ pygame.Surface((sz, sz)) for i in range(NUM_FRAMES) ]
 
     for frame in particle_effect:
         frame.set_colorkey((0,0,0))
 
     sz = p.Particle_Size()
+    half = sz // 2
 
     for i in range(p.Num_Particles()):
         # note random starting point. Make transition from
@@ -125,12 +154,12 @@ def Make_Particle_Effect(particle_class: typing.Callable[[],
 
         for k in range(NUM_FRAMES):
             ((x,y),c) = particle.Next()
-            r = pygame.Rect(0, 0, sz, sz)
-            r.center = (int(x), int(y))
-            pygame.draw.rect(particle_effect[ j ], c, r)
+            # (a square of size sz, centred on x, y)
+            pygame.draw.rect(particle_effect[ j ], c,
+                             (int(x) - half, int(y) - half, sz, sz))
 
-            if (( x < 0 ) or ( x >= p.Max_Size() )
-            or ( y < 0 ) or ( y >= p.Max_Size() )):
+            if (( x < 0 ) or ( x >= max_size )
+            or ( y < 0 ) or ( y >= max_size )):
                 break
             j = ( j + 1 ) % NUM_FRAMES
 
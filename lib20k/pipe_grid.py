@@ -3,65 +3,61 @@
 # This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-07.
 #
 
+import functools
+
 from . import map_items, intersect, bresenham
 from .primitives import *
 from .game_types import *
 
 
-class Pipe_Grid:
+class Storm_Pipe_Grid:
+    # The pipes on each grid square, for storm damage. Other questions
+    # about where the pipes are go to the segment index (Network.pipe_index).
     def __init__(self) -> None:
         self.pipe_grid: Dict[GridPosition, List[map_items.Pipe]] = dict()
 
+        # The squares on the path of each pipe (for removing it)
+        self.pipe_cells: Dict[map_items.Pipe, List[GridPosition]] = dict()
+
     def Get_Pipes(self, gpos: GridPosition) -> "List[map_items.Pipe]":
-        # Returns all pipes including ones already destroyed
+        # Returns the pipes on this square, in the order they were added.
+        # Destroyed pipes are removed by Remove_Pipe.
         return self.pipe_grid.get(gpos, [])
 
-    def Get_Pipe_Rotate(self, gpos: GridPosition) -> "Optional[map_items.Pipe]":
-        # Returns one pipe (not destroyed) and rotates the list so that
-        # other pipes can be selected.
-        if not (gpos in self.pipe_grid):
-            return None
-
-        l = self.pipe_grid[gpos]
-
-        while True:
-            if len(l) == 0:
-                return None
-
-            out = l.pop(0)
-            if not out.Is_Destroyed():
-                l.append(out)
-                return out
-
-    def Get_Path(self, n1: "map_items.Node",
-                n2: "map_items.Node") -> List[GridPosition]:
-
-        # The original algorithm for determining the grid squares intersected by a pipe
-        # was not completely accurate and made some glitches possible. This one is better.
-        # There may be some (invalid) pipe and node placements that are no longer allowed.
-        return intersect.Line_To_Grid_Positions((n1.pos, n2.pos))
-
-    def Add_Pipe(self, pipe: "map_items.Pipe") -> None:
-        # Add new pipe and garbage collect destroyed pipes
-        for gpos in self.Get_Path(pipe.n1, pipe.n2):
-            l = self.pipe_grid.get(gpos, [])
-            l = [ p for p in l if not p.Is_Destroyed() ]
-            l.append(pipe)
-            self.pipe_grid[gpos] = l
-
-class Storm_Pipe_Grid(Pipe_Grid):
     def Get_Path(self, n1: "map_items.Node",
                 n2: "map_items.Node") -> List[GridPosition]:
         # Storms do AOE damage and behave differently if they use the new algorithm for
         # determining the grid squares intersected by a pipe. This causes regression tests
         # to fail - the game is subtly different. Therefore we still use the old algorithm
         # just for storm damage.
+        return list(Storm_Path(n1.pos, n2.pos))
 
-        (x1,y1) = n1.pos
-        (x2,y2) = n2.pos
-        def A(i):
-            return ( 2 * i ) + 1
-
-        return [ (x // 2, y // 2) for (x,y) in
-                bresenham.Line((A(x1), A(y1)), (A(x2), A(y2))) ]
+    def Add_Pipe(self, pipe: "map_items.Pipe") -> None:
+        path = self.Get_Path(pipe.n1, pipe.n2)
+        for gpos in path:
+            self.pipe_grid.setdefault(gpos, []).append(pipe)
+        self.pipe_cells[pipe] = path
+
+    def Remove_Pipe(self, pipe: "map_items.Pipe") -> None:
+        # Called when the pipe is destroyed. The other pipes
+        # stay in the same order.
+        for gpos in set(self.pipe_cells.pop(pipe, [])):
+            l = [ p for p in self.pipe_grid[gpos] if p is not pipe ]
+            if len(l) == 0:
+                del self.pipe_grid[gpos]
+            else:
+                self.pipe_grid[gpos] = l
+
+
+@functools.lru_cache(maxsize=intersect.LINE_CACHE_SIZE)
+def Storm_Path(pos1: GridPosition, pos2: GridPosition) -> Tuple[GridPosition, ...]:
+    # The line is drawn at twice the resolution of the grid,
+    # through the centres of the grid squares.
+    (x1,y1) = pos1
+    (x2,y2) = pos2
+    def A(i):
+        return ( 2 * i ) + 1
+
+    return tuple([ (x // 2, y // 2) for (x,y) in
+                bresenham.Line((A(x1), A(y1)), (A(x2), A(y2))) ])
 
@@ -0,0 +1,69 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# Copying the screen to the display.
+#
+# Things are drawn onto the screen surface, and the parts which have
+# changed are collected here with Update_Area. Present then copies only
+# those parts to the display (pygame.display.update), unless they cover
+# so much of the screen that it is no slower to copy all of it
+# (pygame.display.flip).
+
+import pygame
+
+from .primitives import *
+from .game_types import *
+
+# Fraction of the screen above which the whole screen is copied
+FULL_UPDATE_FRACTION = 0.5
+
+# Number of areas above which the whole screen is copied
+FULL_UPDATE_AREAS = 100
+
+
+class Presenter:
+    def __init__(self) -> None:
+        self.full_update = True
+        self.update_area_list: List[RectType] = []
+
+    def Update_All(self) -> None:
+        self.full_update = True
+
+    def Update_Area(self, surf: SurfaceType, area: Optional[RectType]) -> None:
+        # The area is relative to surf, which may be a subsurface of the screen.
+        if ( area is not None ):
+            (x, y) = surf.get_abs_offset()
+            self.update_area_list.append(area.move(x, y))
+
+    def Update_Areas(self, surf: SurfaceType, areas: Optional[List[RectType]]) -> None:
+        # None means that all of surf has changed.
+        if ( areas is None ):
+            self.Update_Area(surf, surf.get_rect())
+        else:
+            for area in areas:
+                self.Update_Area(surf, area)
+
+    def Present(self) -> bool:
+        # Returns True if the whole screen was copied.
+        full_update = self.full_update
+        rect_list: List[RectType] = []
+
+        if ( not full_update ):
+            screen_rect = pygame.display.get_surface().get_rect()
+            rect_list = [ r.clip(screen_rect) for r in self.update_area_list ]
+            rect_list = [ r for r in rect_list if r.width and r.height ]
+            total = sum(( r.width * r.height ) for r in rect_list)
+            full_update = (( len(rect_list) > FULL_UPDATE_AREAS )
+                or ( total > ( screen_rect.width * screen_rect.height
+                                * FULL_UPDATE_FRACTION )))
+
+        if ( full_update ):
+            pygame.display.flip()
+        elif ( len(rect_list) != 0 ):
+            pygame.display.update(rect_list)
+
+        self.full_update = False
+        self.update_area_list = []
+        return full_update
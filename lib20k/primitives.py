@@ -64,6 +64,36 @@ class PlayMode(enum.Enum):
     RECORD = 303
     PLAYTHRU = 304
 
+# Steam simulation engines
+class SteamEngine(enum.Enum):
+    OBJECTS = 501       # each Node computes its own flows (original)
+    SEQUENTIAL = 502    # array-backed, same node order and results as OBJECTS
+    SIMULTANEOUS = 503  # array-backed, all nodes updated together
+
+# Which buildings get work units first (nearest to the city breaks ties)
+class WorkPriority(enum.Enum):
+    NEAREST_FIRST = 601 # nearest to the city first (original)
+    PIPES_FIRST = 602
+    NODES_FIRST = 603
+    REPAIRS_FIRST = 604 # repairs and upgrades before new buildings
+
+# How the steam in the initial network is set up
+class SteamInit(enum.Enum):
+    WARM_UP = 701       # simulate until the city has enough pressure (original)
+    EQUILIBRIUM = 702   # start at the steady state
+
+# How the positions of new wells are chosen
+class WellPlacement(enum.Enum):
+    RETRY = 901         # try random squares until one is suitable (original)
+    FREE_LIST = 902     # choose from a list of the suitable squares
+
+# What is on a grid square (see Ground_Grid)
+class GroundType(enum.Enum):
+    EMPTY = 801
+    WELL = 802
+    BUILDING = 803      # a node of any kind
+    OTHER = 804
+
 # Sound effects
 class Sounds(enum.Enum):
     bamboo = "ack1"
@@ -161,6 +191,8 @@ PRESSURE_GOOD = 10.0
 # the grid:
 GRID_CENTRE = (25,25)
 GRID_SIZE = (50,50)
+MAXIMUM_MAP_SIZE = (500,500) # large-map mode
+WELL_DISTANCE = 10 # minimum distance from a new well to the city
 
 # misc:
 CITY_BOX_SIZE = 10
@@ -170,6 +202,7 @@ MINIMUM_HEIGHT = 690
 EXPECTED_ASPECT_RATIO = 1024 / 768
 CGISCRIPT = "http://www.jwhitham.org/cgi-bin/LYU.cgi?"
 VERSION = (1, 5, 2)
+SAVE_FORMAT = 2 # changed when older saved games can no longer be loaded
 TITLE = "20,000 Light-Years Into Space"
 COPYRIGHT = "Copyright (C) Jack Whitham 2006-26"
 
@@ -54,7 +54,7 @@ class Quake_Season(Quiet_Season):
         elif ( self.state == self.QUAKE ):
             self.__Generate_Quake()
             # bug fix for issue 7
-            while Crosses_Centre(self.fault_lines, 5): # NO-COV
+            while Crosses_Centre(self.fault_lines, 5, self.net.Get_Centre()): # NO-COV
                 self.__Generate_Quake()
         elif ( self.state == self.QUAKE_DAMAGE ):
             self.__Apply_Damage()
@@ -67,7 +67,8 @@ class Quake_Season(Quiet_Season):
 
     def __Generate_Quake(self) -> None:
         # Make start/finish points first.
-        line = typing.cast(List[FloatGridPosition], Make_Quake_SF_Points(self.net.demo, 2))
+        line = typing.cast(List[FloatGridPosition], Make_Quake_SF_Points(self.net.demo, 2,
+                                                                        self.net.map_size))
 
         # Split line, repeatedly, at random locations.
         for i in range(6,1,-1):
@@ -105,13 +106,8 @@ class Quake_Season(Quiet_Season):
         damage_nodes = set([])
         destroy_pipes = set([])
 
-        for i in range(len(self.fault_lines) - 1):
-            gpos1 = self.fault_lines[ i ]
-            gpos2 = self.fault_lines[ i + 1 ]
-            # Any pipes that intersect gpos1 and gpos2 are destroyed.
-            for pipe in self.net.pipe_list:
-                if intersect.Lines_Intersect((pipe.n1.pos,pipe.n2.pos), (gpos1, gpos2)):
-                    destroy_pipes |= set([ pipe ])
+        # Any pipes that intersect the fault line are destroyed.
+        destroy_pipes |= set(self.net.pipe_index.Get_Polyline(self.fault_lines))
 
         for pipe in destroy_pipes:
             damage_nodes |= set([ pipe.n1, pipe.n2 ])
@@ -169,10 +165,11 @@ class Quake_Season(Quiet_Season):
             if ( len(self.fault_lines) > 0 ):
                 self.fault_lines.pop(0) # the reverse of unfurling!
 
-def Crosses_Centre(line: List[Union[FloatGridPosition, GridPosition]], centre_size: int) -> bool:
+def Crosses_Centre(line: List[Union[FloatGridPosition, GridPosition]], centre_size: int,
+                   centre: GridPosition = GRID_CENTRE) -> bool:
     # Determine if a line intersects a zone in the centre of the game area
     # centre_size specifies the number of grid squares to check
-    (x,y) = GRID_CENTRE
+    (x,y) = centre
     check = [ (x - centre_size, y - centre_size),
             (x + centre_size, y + centre_size),
             (x - centre_size, y + centre_size),
@@ -187,11 +184,12 @@ def Crosses_Centre(line: List[Union[FloatGridPosition, GridPosition]], centre_si
 
 # Generate start/finish of a quake line.
 # Also used by storms.
-def Make_Quake_SF_Points(demo: "game_random.Game_Random", off: int) -> List[GridPosition]:
+def Make_Quake_SF_Points(demo: "game_random.Game_Random", off: int,
+                         map_size: GridPosition = GRID_SIZE) -> List[GridPosition]:
     # Quake fault lines must stay well away from the centre:
     # that's enforced here.
     crosses_centre = True
-    (w, h) = GRID_SIZE
+    (w, h) = map_size
 
     while ( crosses_centre ):
         if ( demo.randint(0,1) == 0 ):
@@ -201,7 +199,7 @@ def Make_Quake_SF_Points(demo: "game_random.Game_Random", off: int) -> List[Grid
             start = (-off, demo.randint(0,h - 1))
             finish = (h + off, demo.randint(0,h - 1))
 
-        crosses_centre = Crosses_Centre([start, finish], 7)
+        crosses_centre = Crosses_Centre([start, finish], 7, (w // 2, h // 2))
 
     return [start, finish]
 
@@ -37,7 +37,9 @@ def Load(g: "game.Game_Data", slot: MenuCommand) -> "Tuple[Optional[game.Game_Da
         print(y)
         return (None, y)
 
-    if ( g2.version != g.version ):  # NO-COV
+    # Games saved before save_format was added are format 1
+    if (( g2.version != g.version )
+    or ( getattr(g2, "save_format", 1) != g.save_format )):
         return (None, "Restore error: wrong version")
 
     g2.Post_Load()
@@ -0,0 +1,91 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# The segment index finds the pipes in part of the map. It is used
+# for quake damage (pipes crossing a fault line), for building
+# (pipes in the way of a new node) and for selecting a pipe.
+#
+# Like the draw index, the map is divided into buckets of grid squares
+# (see draw_index.Bucket_Grid) and each pipe is put in every bucket
+# containing a grid square on its path. A query looks at the pipes in
+# the buckets near the area, and then checks each one exactly.
+# Destroyed pipes are removed from the index.
+
+import pygame, math
+
+from .primitives import *
+from .game_types import *
+from . import map_items, intersect, draw_index
+
+
+class Segment_Index:
+    def __init__(self) -> None:
+        self.buckets = draw_index.Bucket_Grid()
+        self.lines: Dict[map_items.Pipe, GridLine] = dict()
+        self.paths: Dict[map_items.Pipe, typing.Set[GridPosition]] = dict()
+
+        # Number of times a pipe has been selected at each grid square
+        self.rotation: Dict[GridPosition, int] = dict()
+
+    def Add(self, pipe: "map_items.Pipe", path: List[GridPosition]) -> None:
+        self.buckets.Add(pipe, path)
+        self.lines[ pipe ] = (pipe.n1.pos, pipe.n2.pos)
+        self.paths[ pipe ] = set(path)
+
+    def Remove(self, pipe: "map_items.Pipe") -> None:
+        self.buckets.Remove(pipe)
+        self.lines.pop(pipe, None)
+        for gpos in self.paths.pop(pipe, set()):
+            if ( len(self.Get_Square(gpos)) == 0 ):
+                self.rotation.pop(gpos, None)
+
+    def Get_Square(self, gpos: GridPosition) -> "List[map_items.Pipe]":
+        # Pipes with this grid square on their path
+        (x, y) = gpos
+        pipes = typing.cast(List[map_items.Pipe], self.buckets.Get(pygame.Rect(x, y, 1, 1)))
+        return [ pipe for pipe in pipes if gpos in self.paths[ pipe ] ]
+
+    def Get_Polyline(self, points: List[FloatGridPosition]) -> "List[map_items.Pipe]":
+        # Pipes that cross the line through the points (as Lines_Intersect)
+        found: typing.Set[map_items.Pipe] = set()
+        for i in range(len(points) - 1):
+            ((x1, y1), (x2, y2)) = line = (points[ i ], points[ i + 1 ])
+
+            # The crossing point is on the path of the pipe, within
+            # one square of the line's bounding box
+            left = int(math.floor(min(x1, x2))) - 1
+            top = int(math.floor(min(y1, y2))) - 1
+            area = pygame.Rect(left, top,
+                               int(math.ceil(max(x1, x2))) + 2 - left,
+                               int(math.ceil(max(y1, y2))) + 2 - top)
+            pipes = typing.cast(List[map_items.Pipe], self.buckets.Get(area))
+            hits = intersect.Lines_Intersect_Many(line,
+                            [ self.lines[ pipe ] for pipe in pipes ])
+            for (pipe, hit) in zip(pipes, hits):
+                if ( hit ):
+                    found.add(pipe)
+
+        return sorted(found, key=lambda pipe: self.buckets.serial[ pipe ])
+
+    def Get_Near_Point(self, pos: GridPosition, radius: float) -> "List[map_items.Pipe]":
+        # Pipes passing less than radius from the grid position
+        (x, y) = pos
+        r = int(math.ceil(radius))
+        area = pygame.Rect(x - r, y - r, ( r * 2 ) + 1, ( r * 2 ) + 1)
+        pipes = typing.cast(List[map_items.Pipe], self.buckets.Get(area))
+        near = intersect.Near_Segments_Many(pos, [ pipe.geometry for pipe in pipes ], radius)
+        return [ pipe for (pipe, hit) in zip(pipes, near) if hit ]
+
+    def Get_Pipe_Rotate(self, gpos: GridPosition) -> "Optional[map_items.Pipe]":
+        # Returns one pipe on this grid square. If there are several,
+        # each one is returned in turn.
+        pipes = self.Get_Square(gpos)
+        if ( len(pipes) == 0 ):
+            return None
+
+        count = self.rotation.get(gpos, 0)
+        self.rotation[ gpos ] = count + 1
+        return pipes[ count % len(pipes) ]
+
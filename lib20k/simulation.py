@@ -0,0 +1,295 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+#
+# The simulation of the game: everything that happens to a Game_Data
+# as time passes, without drawing anything. Game.Main_Loop runs it one
+# frame at a time, drawing the game and handling input between the
+# steps. Run() advances the game by many frames with no display, as
+# fast as possible, which is how --headless plays back a recording.
+#
+# The game module uses this one, so the things needed from it (the
+# Game_Data class and the frame rate) are passed in as arguments.
+
+from . import mail, sound, tutor, review, alien_invasion, storms, quakes
+from . import game_random, ui
+from .primitives import *
+from .game_types import *
+from .quiet_season import Quiet_Season
+from .quakes import Quake_Season
+from .storms import Storm_Season
+from .mail import New_Mail
+from .difficulty import DIFFICULTY
+
+if typing.TYPE_CHECKING:
+    # Only for type annotations: game imports this module
+    from . import game
+
+
+def Start_Game(g: "game.Game_Data",
+               steam_engine: SteamEngine = SteamEngine.OBJECTS,
+               steam_init: SteamInit = SteamInit.WARM_UP,
+               steam_sleep: bool = False) -> None:
+    # Sets up a new Game_Data before the first frame
+    g.net.Set_Steam_Engine(steam_engine)
+
+    # Establish equilibrium with initial network.
+    DIFFICULTY.Set(MenuCommand.INTERMEDIATE)
+    if ( steam_init == SteamInit.EQUILIBRIUM ):
+        g.net.Set_Equilibrium()
+    else:
+        i = 300
+        while i > 0:
+            g.net.Steam_Think()
+            if ( g.net.hub.Get_Pressure() >= PRESSURE_GOOD ):
+                i = 0
+            else:
+                i -= 1
+
+    assert g.net.hub.Get_Pressure() >= PRESSURE_GOOD
+
+    # Switch to the difficulty level requested by the user
+    DIFFICULTY.Set(g.challenge)
+
+    # Steam production depends on the difficulty level, so
+    # sleeping begins afterwards
+    g.net.Set_Steam_Sleep(steam_sleep)
+
+    # always have at least one item in history
+    g.historian.append(review.Analyse_Network(g))
+
+    # initialise mail
+    mail.Initialise()
+    mail.Set_Day(g.game_time.Get_Day())
+
+    tutor.Off()
+
+
+class Simulation:
+    def __init__(self, g: "game.Game_Data", demo: "game_random.Game_Random",
+                 frame_length: float) -> None:
+        self.g = g
+        self.demo = demo
+        self.frame_length = frame_length
+
+        # Called when a recording asks for a screenshot (if there is a screen)
+        self.screenshot: Optional[typing.Callable[[], None]] = None
+
+    def Summary(self) -> None:
+        g = self.g
+        lev = dict()
+        lev[ MenuCommand.TUTORIAL ] = "a Tutorial"
+        lev[ MenuCommand.BEGINNER ] = "a Beginner"
+        lev[ MenuCommand.INTERMEDIATE ] = "an Intermediate"
+        lev[ MenuCommand.EXPERT ] = "an Expert"
+        lev[ MenuCommand.PEACEFUL ] = "a Peaceful"
+
+        assert g.challenge is not None
+        assert lev.get( g.challenge, None )
+        New_Mail("You are playing " + lev[ g.challenge ] + " game.")
+        New_Mail("Win the game by upgrading your city to tech level %u."
+                % DIFFICULTY.CITY_MAX_TECH_LEVEL )
+
+    def Begin_Frame(self, paused: bool) -> None:
+        # Time passes (before the frame is drawn)
+        g = self.g
+        if not paused:
+            g.game_time.Advance(self.frame_length)
+
+        mail.Set_Day(g.game_time.Get_Day())
+
+        if not paused:
+            self.demo.timestamp(g)
+
+    def End_Frame(self, paused: bool) -> bool:
+        # Everything else that happens in a frame (after it is drawn).
+        # Returns True if the game has just been won or lost.
+        g = self.g
+        cur_time = g.game_time.time()
+        wu_unused = g.net.hub.Get_Avail_Work_Units() - g.work_units_used
+
+        if not paused:
+            g.season_fx.Per_Frame(self.frame_length)
+
+        # Timing effects
+        if ( g.work_timer <= cur_time ):
+            # Fixed periodic effects
+            g.work_timer = cur_time + 0.1
+            g.wu_integral += wu_unused
+            g.work_units_used = g.net.Work_Pulse(g.net.hub.Get_Avail_Work_Units())
+
+            g.net.Steam_Think()
+            g.net.Expire_Popups()
+            mail.Expire_Messages()
+            tutor.Examine_Game(g)
+
+        if ( g.season_effect <= cur_time ):
+            # Seasonal periodic effects
+            g.season_effect = cur_time + g.season_fx.Get_Period()
+            g.season_fx.Per_Period()
+
+        if ((( not tutor.Permit_Season_Change() ) and ( g.season == Season.QUIET ))
+        or ( g.challenge == MenuCommand.PEACEFUL )):
+            # Never-ending season
+            g.season_ends = cur_time + 2.0
+
+        elif ( g.season_ends <= cur_time ):
+            self.__Season_Change(cur_time)
+
+        just_ended = False
+        if (( g.game_ends_at is not None )
+        and ( g.game_ends_at <= cur_time )
+        and ( g.game_running )):
+            # Game over - you lose
+            New_Mail("The City ran out of steam.", (255,0,0))
+            New_Mail("Game Over!", (255,255,0))
+            sound.FX(Sounds.krankor)
+            just_ended = True
+
+        elif (( g.net.hub.tech_level >= DIFFICULTY.CITY_MAX_TECH_LEVEL )
+        and ( g.game_running )):
+            # Game over - you win!
+            g.win = True
+            New_Mail("The City is now fully upgraded!", (255,255,255))
+            New_Mail("You have won the game!", (255,255,255))
+            sound.FX(Sounds.applause)
+            just_ended = True
+
+        if ( just_ended ):
+            # final record from the game:
+            g.game_running = False
+            g.historian.append(review.Analyse_Network(g))
+
+        return just_ended
+
+    def User_Actions(self, user_interface: "ui.User_Interface", paused: bool) -> None:
+        # Actions from a recording being played back
+        if not paused:
+            self.demo.do_user_actions(user_interface, self)
+
+    def Record_History(self, paused: bool) -> None:
+        # After the user's own actions
+        g = self.g
+        cur_time = g.game_time.time()
+        if (( g.historian_time <= cur_time )
+        and ( not paused )):
+            g.historian.append(review.Analyse_Network(g))
+            g.historian_time = cur_time + 4
+
+    def Frame(self, user_interface: "ui.User_Interface") -> None:
+        paused = not self.g.game_running
+        self.Begin_Frame(paused)
+        self.Check_Pressure()
+        self.End_Frame(paused)
+        self.User_Actions(user_interface, paused)
+        self.Record_History(paused)
+
+    def Run(self, frames: int, user_interface: "ui.User_Interface") -> int:
+        # Advance by up to 'frames' frames, stopping if the game ends.
+        # Returns the number of frames run.
+        for i in range(frames):
+            if not self.g.game_running:
+                return i
+            self.Frame(user_interface)
+        return frames
+
+    def Special_Action(self, name: str) -> None:
+        if name == "ADVANCE":
+            New_Mail("SEASON ADVANCE CHEAT")
+            self.g.season_ends = 0
+
+        else:
+            assert name == "SCREENSHOT"
+            if ( self.screenshot is not None ):
+                self.screenshot()
+
+    def Check_Pressure(self) -> None:
+        # While the frame is drawn, before messages are shown
+        g = self.g
+        cur_time = g.game_time.time()
+        if ( g.net.hub.Get_Pressure() < PRESSURE_DANGER ):
+            # You'll lose the game if you stay in this zone
+            # for longer than a timeout. Also, an
+            # alarm will sound.
+
+            if ( g.game_ends_at is None ):
+                sound.FX(Sounds.steamcrit)
+                g.warning_given = True
+
+                New_Mail("Danger! The City needs more steam!", (255,0,0))
+                g.game_ends_at = cur_time + DIFFICULTY.GRACE_TIME
+                assert g.game_ends_at is not None
+                New_Mail("Game will end on Day %u unless supplies are increased." % (
+                    int(g.game_ends_at) ), (255,0,0))
+
+        elif ( g.net.hub.Get_Pressure() < PRESSURE_WARNING ):
+            g.game_ends_at = None
+
+        else:
+            if ( g.warning_given ):
+                sound.FX(Sounds.steamres)
+                g.warning_given = False
+
+            g.game_ends_at = None
+
+    def __Season_Change(self, cur_time: float) -> None:
+        g = self.g
+        if (( g.season == Season.QUIET )
+        or ( g.season == Season.STORM )):
+            g.season = Season.ALIEN
+            g.season_fx = alien_invasion.Alien_Season(g.net, g.difficulty_level)
+            sound.FX(Sounds.aliensappr)
+        elif ( g.season == Season.ALIEN ):
+            g.season = Season.QUAKE
+            g.season_fx = Quake_Season(g.net, g.difficulty_level)
+            if ( not tutor.Active() ): # hack...
+                sound.FX(Sounds.quakewarn)
+        elif ( g.season == Season.QUAKE ):
+            g.season = Season.STORM
+            g.season_fx = Storm_Season(g.net, g.difficulty_level)
+            g.difficulty_level *= 1.2 # 20% harder..
+            sound.FX(Sounds.stormwarn)
+        else:
+            assert g.season == Season.START
+            g.season = Season.QUIET
+            g.season_fx = Quiet_Season(g.net)
+
+        g.season_ends = cur_time + LENGTH_OF_SEASON
+        g.season_effect = cur_time + ( g.season_fx.Get_Period() / 2 )
+
+        # can't ever be PEACEFUL as seasons never end in peaceful mode
+        assert g.challenge != MenuCommand.PEACEFUL
+        New_Mail("The " + g.season_fx.name +
+                 " season has started.", (200,200,200))
+
+
+def Playback(playback_file: str,
+             new_game_data: "typing.Callable[[game_random.Game_Random, MenuCommand], game.Game_Data]",
+             frame_rate: int,
+             steam_engine: SteamEngine = SteamEngine.OBJECTS) -> int:
+    # Play back a recording with no display, fonts or sounds.
+    # Returns the number of frames played.
+    alien_invasion.Init_Aliens()
+    quakes.Init_Quakes()
+    storms.Init_Storms()
+
+    demo = game_random.Play_and_Record()
+    challenge = demo.begin_read(playback_file)
+    g = new_game_data(demo, challenge)
+    Start_Game(g, steam_engine)
+    sim = Simulation(g, demo, 1.0 / frame_rate)
+    sim.Summary()
+    if ( g.challenge == MenuCommand.TUTORIAL ):
+        tutor.On()
+
+    user_interface = ui.User_Interface(g.net, demo)
+    frames = 0
+    try:
+        while ( g.game_running ):
+            frames += sim.Run(frame_rate, user_interface)
+    except game_random.PlaybackEOF:
+        pass
+
+    tutor.Off()
+    return frames
@@ -75,3 +75,185 @@ class Steam_Model:
     def Lose(self) -> None:
         self.charge = 0.0
 
+
+
+# Steady state
+#
+# If nothing changes, the network settles into a state where the charge
+# at each node stops changing. At a node that is neither full nor empty,
+# the steam coming in (from pipes and from its source) equals the steam
+# going out. A node that is full vents its excess, and a node that is
+# empty can't supply all of its demand. Equilibrium finds that state
+# directly, rather than by simulating many ticks.
+#
+# The steady state is worked out for the ideal model, in which steam
+# flows however small the pressure difference, so it can differ very
+# slightly from the state that Think settles to.
+
+def Equilibrium(charge: List[float], capacity: List[float], source: List[float],
+                pipes: List[Tuple[int, int, float]]) -> List[float]:
+    """Return the steady-state charge of each node (capacitance 1).
+
+    charge, capacity and source (steam added per unit time, negative for
+    demand) are indexed by node. pipes lists (n1, n2, resistance) for each
+    working pipe. Nodes that are not connected to any others keep their
+    charge unless they have a source."""
+
+    n = len(charge)
+    neighbours: List[List[Tuple[int, float]]] = [ [] for i in range(n) ]
+    for (a, b, resist) in pipes:
+        neighbours[ a ].append((b, 1.0 / resist))
+        neighbours[ b ].append((a, 1.0 / resist))
+
+    out = list(charge)
+    seen = [ False ] * n
+    for start in range(n):
+        if ( seen[ start ] ):
+            continue
+
+        # Find a connected component
+        component = [ start ]
+        seen[ start ] = True
+        for i in component:
+            for (j, _) in neighbours[ i ]:
+                if ( not seen[ j ] ):
+                    seen[ j ] = True
+                    component.append(j)
+
+        for (i, v) in zip(component,
+                          _Component_Equilibrium(component, neighbours,
+                                                 charge, capacity, source)):
+            out[ i ] = v
+    return out
+
+# Each node in a component is FREE, FULL (venting) or EMPTY
+_FREE = 0
+_FULL = 1
+_EMPTY = 2
+
+def _Component_Equilibrium(component: List[int],
+                           neighbours: List[List[Tuple[int, float]]],
+                           charge: List[float], capacity: List[float],
+                           source: List[float]) -> List[float]:
+    # An active set method: guess which nodes are full or empty, solve
+    # the linear equations for the rest, then correct the worst mistake
+    # in the guess, and repeat.
+    n = len(component)
+    local = dict([ (i, k) for (k, i) in enumerate(component) ])
+    adj = [ [ (local[ j ], g) for (j, g) in neighbours[ i ] ] for i in component ]
+    cap = [ float(capacity[ i ]) for i in component ]
+    s = [ source[ i ] for i in component ]
+    tol = 1e-6 * ( max(cap) + 1.0 )
+
+    state = [ _FREE ] * n
+    v = [ float(charge[ i ]) for i in component ]
+    for iteration in range(( 4 * n ) + 10):
+        fixed = [ state[ k ] != _FREE for k in range(n) ]
+        for k in range(n):
+            if ( state[ k ] == _FULL ):
+                v[ k ] = cap[ k ]
+            elif ( state[ k ] == _EMPTY ):
+                v[ k ] = 0.0
+
+        total = sum(s)
+        if ( not any(fixed) ):
+            # Steam is conserved, unless the sources don't balance,
+            # in which case every node rises (or falls) together until
+            # one of them fills up (or runs out).
+            mean = total / n
+            v = _Solve(adj, [ x - mean for x in s ], fixed, [ 0.0 ] * n)
+            if ( total > tol ):
+                k = max(range(n), key=lambda k: v[ k ] - cap[ k ])
+                state[ k ] = _FULL
+                continue
+            elif ( total < - tol ):
+                k = min(range(n), key=lambda k: v[ k ])
+                state[ k ] = _EMPTY
+                continue
+
+            shift = ( sum([ charge[ i ] for i in component ]) - sum(v) ) / n
+            v = [ x + shift for x in v ]
+        else:
+            v = _Solve(adj, s, fixed, v)
+
+        # The worst node that is over capacity or below zero is fixed...
+        worst = tol
+        change: Optional[Tuple[int, int]] = None
+        for k in range(n):
+            if ( fixed[ k ] ):
+                continue
+            if ( v[ k ] - cap[ k ] > worst ):
+                worst = v[ k ] - cap[ k ]
+                change = (k, _FULL)
+            elif ( - v[ k ] > worst ):
+                worst = - v[ k ]
+                change = (k, _EMPTY)
+
+        # ... otherwise, the worst full node that isn't venting, or
+        # empty node that has steam to spare, is freed.
+        if ( change is None ):
+            for k in range(n):
+                if ( not fixed[ k ] ):
+                    continue
+                excess = s[ k ] - sum([ g * ( v[ k ] - v[ j ] ) for (j, g) in adj[ k ] ])
+                if ( state[ k ] == _EMPTY ):
+                    excess = - excess
+                if ( - excess > worst ):
+                    worst = - excess
+                    change = (k, _FREE)
+
+        if ( change is None ):
+            break
+
+        (k, state[ k ]) = change
+
+    return [ min(max(x, 0.0), c) for (x, c) in zip(v, cap) ]
+
+def _Solve(adj: List[List[Tuple[int, float]]], s: List[float],
+           fixed: List[bool], v: List[float]) -> List[float]:
+    # Solve the flow equations for the nodes that aren't fixed,
+    #    sum over pipes of (v[k] - v[j]) / resistance = s[k],
+    # by the conjugate gradient method. v gives the fixed values
+    # and a starting point for the others.
+    n = len(adj)
+    free = [ k for k in range(n) if not fixed[ k ] ]
+    v = list(v)
+
+    def Apply(x: List[float]) -> List[float]:
+        # Flow out of each free node, for free values x (fixed ones are 0)
+        y = [ 0.0 ] * n
+        for k in free:
+            y[ k ] = sum([ g * ( x[ k ] - x[ j ] ) for (j, g) in adj[ k ] ])
+        return y
+
+    # Right-hand side: sources, plus flow in from the fixed nodes
+    b = [ 0.0 ] * n
+    for k in free:
+        b[ k ] = s[ k ] + sum([ g * v[ j ] for (j, g) in adj[ k ] if fixed[ j ] ])
+
+    x = [ ( 0.0 if fixed[ k ] else v[ k ] ) for k in range(n) ]
+    ax = Apply(x)
+    r = [ ( b[ k ] - ax[ k ] ) if not fixed[ k ] else 0.0 for k in range(n) ]
+    p = list(r)
+    rr = sum([ y * y for y in r ])
+    limit = 1e-24 * ( sum([ y * y for y in b ]) + 1.0 )
+    for iteration in range(( 2 * len(free) ) + 10):
+        if ( rr <= limit ):
+            break
+        ap = Apply(p)
+        pap = sum([ p[ k ] * ap[ k ] for k in free ])
+        if ( pap <= 0.0 ):
+            break
+        alpha = rr / pap
+        for k in free:
+            x[ k ] += alpha * p[ k ]
+            r[ k ] -= alpha * ap[ k ]
+        rr2 = sum([ y * y for y in r ])
+        beta = rr2 / rr
+        rr = rr2
+        for k in free:
+            p[ k ] = r[ k ] + ( beta * p[ k ] )
+
+    for k in free:
+        v[ k ] = x[ k ]
+    return v
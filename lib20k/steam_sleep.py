@@ -0,0 +1,98 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# Sleeping parts of the steam network.
+#
+# Once a group of connected nodes has settled, each tick computes
+# the same flows again. If no charge has changed by a negligible
+# amount for a while, the group is put to sleep: its nodes stop
+# thinking, and the charges and pipe currents stay as they are. It
+# wakes up again when anything in it changes: a pipe is added or
+# destroyed, a building is damaged, upgraded or worked on (which
+# covers changes in steam production and city demand).
+#
+# Components with no steam maker and no city are not simulated at all.
+#
+# Sleeping changes the results very slightly, so it can't be used
+# while recording or playing back.
+
+from .primitives import *
+from .game_types import *
+from . import map_items, network, steam_model, components
+
+
+class Steam_Group:
+    def __init__(self, component: "components.Component") -> None:
+        self.component = component
+        self.quiet_ticks = 0
+        self.asleep = False
+
+    def Wake(self) -> None:
+        self.quiet_ticks = 0
+        self.asleep = False
+
+
+class Steam_Sleep:
+    # Ticks without any change before a group goes to sleep
+    QUIET_TICKS = 20
+
+    def __init__(self) -> None:
+        self.version = -1
+        self.groups: List[Steam_Group] = []
+        self.group_of: Dict[components.Component, Steam_Group] = dict()
+
+    def Wake_All(self) -> None:
+        for group in self.groups:
+            group.Wake()
+
+    def Wake(self, net: "network.Network", item: "map_items.Building") -> None:
+        component = net.components.Get_Component(net, item)
+        group = self.group_of.get(typing.cast(components.Component, component), None)
+        if ( group is not None ):
+            group.Wake()
+
+    def Count_Asleep(self) -> int:
+        return sum([ len(group.component.nodes) for group in self.groups
+                     if group.asleep ])
+
+    def Think(self, net: "network.Network") -> None:
+        # Each group is a component of the network
+        if ( self.version != net.topology_version ):
+            self.groups = [ Steam_Group(component) for component
+                            in net.components.Get_Components(net) ]
+            self.group_of = dict([ (group.component, group) for group in self.groups ])
+            self.version = net.topology_version
+
+        # A charge change that is negligible over a whole unit of time
+        negligible = ( steam_model.Steam_Model.NEGLIGIBLE *
+                       steam_model.Steam_Model.TIME_CONSTANT )
+        for group in self.groups:
+            nodes = group.component.nodes
+            if ( group.asleep ):
+                # The city still uses steam
+                for node in nodes:
+                    if ( isinstance(node, map_items.City_Node) ):
+                        node.Steam_Source()
+                continue
+
+            if ( not group.component.active ):
+                # Without steam makers or the city, the component can't
+                # affect the rest of the network, so it isn't simulated.
+                # Its nodes only need to look damaged or repaired.
+                for node in nodes:
+                    node.Update_Draw_Obj()
+                group.asleep = True
+                continue
+
+            before = [ node.steam.charge for node in nodes ]
+            for node in nodes:
+                node.Steam_Think(net)
+
+            if all([ abs(node.steam.charge - charge) < negligible
+                     for (node, charge) in zip(nodes, before) ]):
+                group.quiet_ticks += 1
+                group.asleep = ( group.quiet_ticks >= self.QUIET_TICKS )
+            else:
+                group.quiet_ticks = 0
@@ -0,0 +1,328 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# An array-backed engine for the steam model. The state of the network
+# is kept in flat lists indexed by node number: charge, voltage,
+# capacity, and which nodes and pipes are broken, with a table of edges.
+# The lists stay alive between ticks. The tables are rebuilt when the
+# topology changes, and a single entry is updated when a building's
+# health changes (see Health_Changed). Each tick, only the new charges,
+# voltages and pipe currents are written back to the map items, which
+# are read when drawing.
+#
+# There are two update orders:
+#  * SEQUENTIAL visits nodes in node_list order, so a node sees the
+#    voltages already computed for earlier nodes in the same tick (as
+#    Node.Steam_Think does). The results are identical to the original
+#    code, including the calls to Game_Random.Steam used by recordings.
+#  * SIMULTANEOUS computes every flow from the voltages at the start of
+#    the tick and then applies all of them at once. Only the working
+#    pipes are visited. The results differ slightly from the original
+#    code, so recordings can't be played back.
+#
+# Charges changed by anything other than the solver are not seen
+# until Flush is called.
+
+from .primitives import *
+from .game_types import *
+from . import map_items, network, steam_model
+
+# A working pipe: the index of each end, the resistance and the pipe
+Steam_Link = Tuple[int, int, float, "map_items.Pipe"]
+
+
+class Steam_Solver:
+    def __init__(self, engine: SteamEngine) -> None:
+        assert engine in (SteamEngine.SEQUENTIAL, SteamEngine.SIMULTANEOUS)
+        self.engine = engine
+        self.Flush()
+
+    def Flush(self) -> None:
+        # Forget the tables: they are rebuilt from the map items
+        # on the next tick
+        self.version = -1
+
+        # Nodes: the first num_thinking come from node_list, in order.
+        # Any others are at the far end of a pipe but not on the map.
+        self.nodes: List[map_items.Node] = []
+        self.models: List[steam_model.Steam_Model] = []
+        self.node_index: Dict[map_items.Node, int] = dict()
+        self.num_thinking = 0
+
+        # Pipes, each listed once, with the index of each end
+        self.pipes: List[map_items.Pipe] = []
+        self.pipe_index: Dict[map_items.Pipe, int] = dict()
+        self.pipe_n1: List[int] = []
+        self.pipe_n2: List[int] = []
+
+        # Edges: the exits of node i are edges first[i] .. first[i + 1] - 1,
+        # in the same order as node.pipes.
+        self.first: List[int] = []
+        self.edge_pipe: List[int] = []
+        self.edge_other: List[int] = []
+        self.edge_from_n1: List[bool] = []
+
+        # State of each node
+        self.charge: List[float] = []
+        self.voltage: List[float] = []
+        self.capacity: List[float] = []
+        self.capacitance: List[float] = []
+        self.broken: List[bool] = []
+
+        # Nodes which add or remove steam, and the steam they added
+        # on this tick (None for the others)
+        self.source_nodes: List[int] = []
+        self.sources: List[Optional[float]] = []
+
+        # State of each pipe
+        self.pipe_broken: List[bool] = []
+        self.resist: List[float] = []
+
+        # Working pipes between working nodes, or None if this must be
+        # worked out again (SIMULTANEOUS only)
+        self.links: Optional[List[Steam_Link]] = None
+
+        # Nodes whose draw_obj may have changed
+        self.draw_pending: typing.Set[map_items.Node] = set()
+
+    def Health_Changed(self, item: "map_items.Building") -> None:
+        # Called when a building is damaged, repaired or upgraded
+        if ( isinstance(item, map_items.Pipe) ):
+            k = self.pipe_index.get(item, None)
+            if ( k is None ):
+                return # not in the table
+            if (( self.pipe_broken[ k ] != item.Is_Broken() )
+            or ( self.resist[ k ] != item.resistance )):
+                self.pipe_broken[ k ] = item.Is_Broken()
+                self.resist[ k ] = item.resistance
+                self.links = None
+
+        elif ( isinstance(item, map_items.Node) ):
+            i = self.node_index.get(item, None)
+            if ( i is None ):
+                return # not in the table
+            self.capacity[ i ] = item.steam.capacity
+            if ( self.broken[ i ] != item.Is_Broken() ):
+                self.broken[ i ] = item.Is_Broken()
+                self.links = None
+            self.draw_pending.add(item)
+
+    def Think(self, net: "network.Network") -> None:
+        if ( self.version != net.topology_version ):
+            self.__Build(net)
+            self.version = net.topology_version
+
+        if ( self.engine == SteamEngine.SEQUENTIAL ):
+            self.__Sequential(net)
+        else:
+            self.__Simultaneous()
+
+        for node in self.draw_pending:
+            node.Update_Draw_Obj()
+        self.draw_pending = set()
+
+    def __Build(self, net: "network.Network") -> None:
+        self.Flush()
+        nodes = self.nodes
+        index = self.node_index
+        pipe_index = self.pipe_index
+
+        for node in net.node_list:
+            index[ node ] = len(nodes)
+            nodes.append(node)
+        self.num_thinking = len(nodes)
+
+        for i in range(self.num_thinking):
+            node = nodes[ i ]
+            self.first.append(len(self.edge_pipe))
+            for p in node.Exits():
+                if ( p.n1 == node ):
+                    other = p.n2
+                else:
+                    other = p.n1
+
+                j = index.get(other, None)
+                if ( j is None ):
+                    j = index[ other ] = len(nodes)
+                    nodes.append(other)
+
+                k = pipe_index.get(p, None)
+                if ( k is None ):
+                    k = pipe_index[ p ] = len(self.pipes)
+                    self.pipes.append(p)
+
+                self.edge_pipe.append(k)
+                self.edge_other.append(j)
+                self.edge_from_n1.append(p.n1 == node)
+
+        self.first.append(len(self.edge_pipe))
+
+        # Every node has an index now, including the far ends of pipes
+        self.pipe_n1 = [ index[ p.n1 ] for p in self.pipes ]
+        self.pipe_n2 = [ index[ p.n2 ] for p in self.pipes ]
+        self.pipe_broken = [ p.Is_Broken() for p in self.pipes ]
+        self.resist = [ p.resistance for p in self.pipes ]
+
+        self.models = [ node.steam for node in nodes ]
+        self.charge = [ m.charge for m in self.models ]
+        self.voltage = [ m.voltage for m in self.models ]
+        self.capacity = [ m.capacity for m in self.models ]
+        self.capacitance = [ m.capacitance for m in self.models ]
+        self.broken = [ node.Is_Broken() for node in nodes ]
+
+        # Only the nodes which override Node.Steam_Source are asked
+        # for steam on each tick
+        self.sources = [ None ] * len(nodes)
+        self.source_nodes = [ i for i in range(self.num_thinking)
+                if ( type(nodes[ i ]).Steam_Source
+                        is not map_items.Node.Steam_Source ) ]
+
+        self.draw_pending = set(nodes[ :self.num_thinking ])
+
+    def __Sequential(self, net: "network.Network") -> None:
+        # Same arithmetic, in the same order, as Steam_Model.Source,
+        # Steam_Model.Think and Node.Steam_Think.
+        time_constant = steam_model.Steam_Model.TIME_CONSTANT
+        negligible = steam_model.Steam_Model.NEGLIGIBLE
+        first = self.first
+        edge_pipe = self.edge_pipe
+        edge_other = self.edge_other
+        edge_from_n1 = self.edge_from_n1
+        charge = self.charge
+        voltage = self.voltage
+        capacity = self.capacity
+        capacitance = self.capacitance
+        broken = self.broken
+        sources = self.sources
+        pipe_broken = self.pipe_broken
+        resist = self.resist
+        models = self.models
+        pipes = self.pipes
+        trace = net.demo.Is_Tracing_Steam()
+
+        for i in self.source_nodes:
+            sources[ i ] = self.nodes[ i ].Steam_Source()
+
+        for i in range(self.num_thinking):
+            q = charge[ i ]
+            source = sources[ i ]
+            if ( source is not None ):
+                q += source * time_constant
+                if ( q < 0 ):
+                    q = 0
+                elif ( q > capacity[ i ] ):
+                    q = capacity[ i ] # vent
+
+            v = voltage[ i ] = q / capacitance[ i ]
+            currents: List[float] = []
+            active: List[int] = []
+
+            for e in range(first[ i ], first[ i + 1 ]):
+                k = edge_pipe[ e ]
+                j = edge_other[ e ]
+                if ( pipe_broken[ k ] or broken[ j ] ):
+                    continue
+
+                if ( trace ):
+                    active.append(e)
+                dv = v - voltage[ j ]
+                if ( dv >= negligible ):
+                    current = dv / resist[ k ]
+                    dq = current * time_constant
+                    q -= dq
+                    charge[ j ] += dq
+                    currents.append(current)
+                else:
+                    currents.append(0.0)
+
+            if ( q < 0 ):
+                q = 0
+            elif ( q > capacity[ i ] ):
+                q = capacity[ i ] # vent
+            charge[ i ] = q
+
+            if ( trace ):
+                net.demo.Steam([ (models[ edge_other[ e ]], resist[ edge_pipe[ e ]])
+                                    for e in active ],
+                               v, q, capacitance[ i ], currents)
+
+            # Node.Steam_Think pairs the currents with all of the exits,
+            # including broken ones, and so must we.
+            e = first[ i ]
+            for current in currents:
+                if ( current > 0.0 ):
+                    if ( edge_from_n1[ e ] ):
+                        pipes[ edge_pipe[ e ]].current_n1_to_n2 = current
+                    else:
+                        pipes[ edge_pipe[ e ]].current_n1_to_n2 = - current
+                e += 1
+
+        for (m, q, v) in zip(models, charge, voltage):
+            m.charge = q
+            m.voltage = v
+
+    def __Make_Links(self) -> List[Steam_Link]:
+        # No steam flows through the other pipes
+        links: List[Steam_Link] = []
+        broken = self.broken
+        for (k, p) in enumerate(self.pipes):
+            a = self.pipe_n1[ k ]
+            b = self.pipe_n2[ k ]
+            if ( self.pipe_broken[ k ] or broken[ a ] or broken[ b ] ):
+                p.current_n1_to_n2 = 0.0
+            else:
+                links.append((a, b, self.resist[ k ], p))
+        return links
+
+    def __Simultaneous(self) -> None:
+        time_constant = steam_model.Steam_Model.TIME_CONSTANT
+        negligible = steam_model.Steam_Model.NEGLIGIBLE
+        charge = self.charge
+        voltage = self.voltage
+        capacity = self.capacity
+        capacitance = self.capacitance
+        models = self.models
+        n = self.num_thinking
+
+        if ( self.links is None ):
+            self.links = self.__Make_Links()
+
+        # Sources
+        for i in self.source_nodes:
+            source = self.nodes[ i ].Steam_Source()
+            if ( source is not None ):
+                charge[ i ] = min(max(charge[ i ] + ( source * time_constant ),
+                                      0.0), capacity[ i ])
+
+        # Voltages at the start of the tick
+        for i in range(n):
+            voltage[ i ] = charge[ i ] / capacitance[ i ]
+
+        # Flows through each working pipe
+        dq = [ 0.0 ] * len(charge)
+        for (a, b, resist, p) in self.links:
+            dv = voltage[ a ] - voltage[ b ]
+            if (( dv < negligible ) and ( dv > - negligible )):
+                p.current_n1_to_n2 = 0.0
+            else:
+                current = p.current_n1_to_n2 = dv / resist
+                dq[ b ] += current * time_constant
+                dq[ a ] -= current * time_constant
+
+        # Apply all flows at once; nodes that think are bounded
+        for i in range(n):
+            q = charge[ i ] + dq[ i ]
+            if ( q < 0.0 ):
+                q = 0.0
+            elif ( q > capacity[ i ] ):
+                q = capacity[ i ]
+            charge[ i ] = q
+            m = models[ i ]
+            m.charge = q
+            m.voltage = voltage[ i ]
+
+        for i in range(n, len(charge)):
+            charge[ i ] += dq[ i ]
+            models[ i ].charge = charge[ i ]
@@ -10,7 +10,7 @@ from . import partial_vector, particle, sound, quakes
 from .quiet_season import Quiet_Season
 from .primitives import *
 from .game_types import *
-from . import network
+from . import network, map_items
 from .grid import Float_Grid_To_Scr
 
 
@@ -25,8 +25,8 @@ class Storm_Season(Quiet_Season):
         self.storms: List[Storm] = []
         self.storm_difficulty = storm_difficulty
 
-        global storm_graphics
-        assert ( storm_graphics is not None )
+        global storm_sound
+        assert ( storm_sound is not None )
 
     def Get_Period(self) -> int:
         return 20
@@ -58,7 +58,12 @@ class Storm:
         self.difficulty = difficulty
         self.storm_frame = 0
 
-        [a, b] = quakes.Make_Quake_SF_Points(self.net.demo, 5)
+        # Buildings that may be damaged (see Think)
+        self.window: List[map_items.Building] = []
+        self.window_centre: Optional[GridPosition] = None
+        self.window_version = -1
+
+        [a, b] = quakes.Make_Quake_SF_Points(self.net.demo, 5, self.net.map_size)
         if ( self.net.demo.randint(0,1) == 0 ):
             (a, b) = (b, a) # flip - ensures start point is not always on top or left
 
@@ -83,7 +88,7 @@ class Storm:
     def Draw(self, output: SurfaceType, update_area: UpdateAreaMethod) -> None:
         global storm_graphics
         assert storm_graphics is not None
-        sfx = storm_graphics[ self.storm_frame ]
+        sfx = storm_graphics[ self.storm_frame % len(storm_graphics) ]
 
         r = sfx.get_rect()
         (x, y) = Float_Grid_To_Scr(self.pos)
@@ -103,29 +108,20 @@ class Storm:
         cx = int(cx)
         cy = int(cy)
 
-        dmg = STORM_DAMAGE * self.difficulty
-
-        for x in range(cx - 1, cx + 2):
-            for y in range(cy - 1, cy + 2):
-                key = (x,y)
-
-                global storm_sound
-                assert storm_sound is not None
+        if (( self.window_centre != (cx, cy) )
+        or ( self.window_version != self.net.topology_version )):
+            self.__Find_Window((cx, cy))
 
-    
-                for pipe in self.net.storm_pipe_grid.Get_Pipes(key):
-                    if (( not pipe.Is_Destroyed() )
-                    and ( pipe.Take_Damage(dmg) )):
-                        self.net.Destroy(pipe, "storms")
-                        storm_sound.Set(1.0)
+        dmg = STORM_DAMAGE * self.difficulty
 
-                if ( self.net.ground_grid.get(key, None) ):
-                    node = self.net.ground_grid[ key ]
+        global storm_sound
+        assert storm_sound is not None
 
-                    if (( not node.Is_Destroyed() )
-                    and ( node.Take_Damage(dmg) )):
-                        self.net.Destroy(node, "storms")
-                        storm_sound.Set(1.0)
+        for item in self.window:
+            if (( not item.Is_Destroyed() )
+            and ( item.Take_Damage(dmg) )):
+                self.net.Destroy(item, "storms")
+                storm_sound.Set(1.0)
 
         # Move
         (px,py) = self.pos
@@ -133,21 +129,44 @@ class Storm:
         dx *= frame_time
         dy *= frame_time
         self.pos = (px + dx, py + dy)
-
-        global storm_graphics
-        assert storm_graphics is not None
-        self.storm_frame = ( self.storm_frame + 1 ) % len(storm_graphics)
+        self.storm_frame += 1
 
         self.countdown -= frame_time
 
     def Is_Offscreen(self) -> bool:
         return ( self.countdown < 0 )
 
+    def __Find_Window(self, centre: GridPosition) -> None:
+        # The storm damages the pipes and nodes in the 3x3 grid squares
+        # around its centre, in this order, once per square (so a pipe
+        # crossing several squares is damaged several times). This only
+        # changes when the storm moves to another square or pipes and
+        # nodes are added or removed, which is much less often than Think
+        # is called. Wells can't be damaged.
+        (cx, cy) = centre
+        self.window = []
+        for x in range(cx - 1, cx + 2):
+            for y in range(cy - 1, cy + 2):
+                key = (x,y)
+                self.window.extend(self.net.storm_pipe_grid.Get_Pipes(key))
+
+                node = self.net.ground_grid.get(key, None)
+                if (( isinstance(node, map_items.Building) )
+                and ( not node.Is_Destroyed() )):
+                    self.window.append(node)
+
+        self.window_centre = centre
+        self.window_version = self.net.topology_version
+
 
 def Set_Screen_Height(height: int) -> None:
     global storm_graphics
     storm_graphics = particle.Make_Particle_Effect(particle.Storm_Particle)
+    Init_Storms()
+
 
+def Init_Storms() -> None:
+    # Storms can happen without graphics (see simulation.Playback)
     global storm_sound
     if storm_sound is None:
         storm_sound = sound.Persisting_Sound(Sounds.stormdmg, Sounds.stormbeeps)
@@ -8,11 +8,11 @@
 import pygame, random
 
 
-from . import stats, menu, draw_obj, mail, particle, tutor
+from . import stats, menu, draw_obj, mail, particle, tutor, dirty_region
 from .primitives import *
 from .game_types import *
-from . import game_random, network, resource, quiet_season, map_items
-from .grid import Grid_To_Scr, Grid_To_Scr_Rect, Scr_To_Grid
+from . import game_random, network, resource, quiet_season, map_items, grid
+from .grid import Grid_To_Scr, Grid_To_Scr_Rect, Scr_To_Grid, Get_Grid_Size
 
 
 class User_Interface:
@@ -20,7 +20,7 @@ class User_Interface:
         self.net = net
         self.demo = demo
         self.control_menu: Optional[menu.Menu] = None
-        self.update_area_list: List[RectType] = []
+        self.update_region = dirty_region.Dirty_Region()
         self.stats_hash: int = 0
         self.selection: Optional[map_items.Building] = None
         self.mouse_pos: Optional[GridPosition] = None
@@ -33,6 +33,16 @@ class User_Interface:
         self.background: SurfaceType = pygame.Surface((1, 1))
         self.background.fill((0, 0, 0))
 
+        # The parts of the map which are the same from one frame to
+        # the next (see __Draw_Static_Layer)
+        self.static_layer: Optional[SurfaceType] = None
+        self.static_key: Optional[typing.Tuple] = None
+        self.static_broken: typing.Set[map_items.Pipe] = set()
+        self.static_well_pipes: List[map_items.Pipe] = []
+
+        # Screen position of the map and grid size when last drawn
+        self.view: Optional[typing.Tuple] = None
+
         self.steam_effect: List[SurfaceType] = [pygame.Surface((1, 1))]
         self.steam_effect_frame = 0
 
@@ -41,18 +51,9 @@ class User_Interface:
         if ( area is not None ):
             self.partial_update = True
 
-            # pygame.Rect is rather good.
-
-            if ( len(self.update_area_list) == 0 ):
-                self.update_area_list = [area]
-            else:
-                ci = area.collidelist(self.update_area_list)
-                if ( ci < 0 ):
-                    # New area!
-                    self.update_area_list.append(area)
-                else:
-                    # Area overlaps an existing area, which gets expanded.
-                    self.update_area_list[ ci ].union_ip(area)
+            # Overlapping areas are merged by the dirty region,
+            # which gives rectangles to draw in the next frame.
+            self.update_region.Add(area)
 
     def Update_Game(self) -> None:
         self.full_update = True
@@ -72,9 +73,12 @@ class User_Interface:
 
     def Draw_Game(self, output: SurfaceType,
                   season_fx: quiet_season.Quiet_Season,
-                  paused: bool) -> None:
+                  paused: bool) -> Optional[List[RectType]]:
+        # Returns the areas of the output which have changed, or
+        # None if all of it has been drawn again.
         blink = self.blink
         r: Optional[RectType]
+        size = output.get_size()
 
         if ( season_fx.Is_Shaking() and not paused ):
             # Earthquake effect
@@ -86,7 +90,33 @@ class User_Interface:
             output = output.subsurface(r)
             self.Update_Game()
 
-        if ( self.net.dirty ):
+        # On a large map, only things that can be seen are drawn
+        # (see Draw_Index). The margin allows for things larger than
+        # one grid square, such as the city and steam effects.
+        margin = 3 + ( self.steam_effect[ 0 ].get_rect().height // Get_Grid_Size() )
+        visible = grid.Get_Visible_Area(margin)
+        pipes = self.net.draw_index.Get_Pipes(visible)
+
+        # When the camera moves, the dots on the pipes are not erased
+        # from their old screen positions: everything is drawn again.
+        view = (Grid_To_Scr((0, 0)), Get_Grid_Size())
+        if ( view != self.view ):
+            for p in self.net.pipe_list:
+                p.Forget_Dots()
+            self.view = view
+
+        # The static layer is redrawn if anything on it has changed:
+        # the view, the background, the items on the map, or a pipe
+        # which has been damaged or repaired.
+        key = (self.net.topology_version, view, size, self.background,
+               self.steam_effect[ 0 ].get_size())
+        if (( self.net.dirty )
+        or ( key != self.static_key )
+        or ( self.static_layer is None )
+        or ( any(( p.Needs_Work() != ( p in self.static_broken ))
+                 for p in pipes) )):
+            self.__Draw_Static_Layer(size, visible, pipes)
+            self.static_key = key
             self.Update_Game()
             self.net.dirty = False
 
@@ -96,38 +126,44 @@ class User_Interface:
         # These things may not need to be redrawn
         # as they are never animated and can't be selected.
 
-        if ( self.full_update ):
-            output.blit(self.background,(0,0))
-
-            self.__Update_Reset()
-
-            for w in self.net.well_list:
-                w.Draw(output)
-                self.Add_Steam_Effect(output, w.pos)
-
+        assert self.static_layer is not None
+        full_update = self.full_update
+        changed = dirty_region.Dirty_Region()
+        if ( full_update ):
+            output.blit(self.static_layer,(0,0))
         else:
-            for u in self.update_area_list:
-                output.blit(self.background, u.topleft, u)
-
-            self.__Update_Reset()
-
-            for w in self.net.well_list:
-                w.Draw(output)
-                self.Add_Steam_Effect(output, w.pos)
+            for u in self.update_region.Get_Rects():
+                output.blit(self.static_layer, u.topleft, u)
+                changed.Add(u)
 
+        self.__Update_Reset()
 
         # Everything else needs to be redrawn every turn.
 
+        # Steam from the wells, below the pipes
+        for w in self.net.draw_index.Get_Wells(visible):
+            self.Add_Steam_Effect(output, w.pos)
+        redraw = set(self.static_well_pipes)
+
         if ( self.selection is not None ):
-            # highlight selection
+            # highlight selection, below the pipes
             r = self.selection.Draw_Selected(output, (blink, blink, 0))
             self.Update_Area(r)
+            if ( r is not None ):
+                redraw |= self.__Get_Pipes_Near(r)
 
-        for p in self.net.pipe_list:
-            p.Draw(output)
+        for p in pipes:
+            if ( p in redraw ):
+                p.Draw_Body(output)
+
+        for p in pipes:
+            for r in p.Draw_Dots(output):
+                changed.Add(r)
 
-        for n in self.net.node_list:
-            n.Draw(output)
+        for n in self.net.draw_index.Get_Nodes(visible):
+            r = n.Draw(output)
+            if ( r is not None ):
+                changed.Add(r)
             if ( n.emits_steam ):
                 self.Add_Steam_Effect(output, n.pos)
 
@@ -166,7 +202,50 @@ class User_Interface:
             self.steam_effect_frame = (
                 self.steam_effect_frame + 1 ) % len(self.steam_effect)
 
-    def Draw_Stats(self, output: SurfaceType, default_stats: List[StatTuple]) -> None:
+        if ( full_update ):
+            return None
+
+        # The areas drawn in this frame are restored in the next frame,
+        # so they are both shown now and remembered for later.
+        for u in self.update_region.Get_Rects():
+            changed.Add(u)
+        return changed.Get_Rects()
+
+    def __Draw_Static_Layer(self, size: SurfacePosition, visible: RectType,
+                            pipes: "List[map_items.Pipe]") -> None:
+        # The background, the wells and the pipes (without their dots)
+        # are drawn once here, and copied to the screen as needed
+        # instead of being drawn again in every frame.
+        self.static_layer = pygame.Surface(size)
+        self.static_layer.blit(self.background, (0,0))
+
+        for w in self.net.draw_index.Get_Wells(visible):
+            w.Draw(self.static_layer)
+
+        self.static_broken = set()
+        for p in pipes:
+            p.Draw_Body(self.static_layer)
+            if ( p.Needs_Work() ):
+                self.static_broken.add(p)
+
+        # The steam from the wells is animated, so it is drawn in
+        # every frame, and then these pipes are drawn over it again
+        near: typing.Set[map_items.Pipe] = set()
+        for w in self.net.draw_index.Get_Wells(visible):
+            r = self.steam_effect[ 0 ].get_rect()
+            r.midbottom = Grid_To_Scr(w.pos)
+            near |= self.__Get_Pipes_Near(r)
+        self.static_well_pipes = [ p for p in pipes if p in near ]
+
+    def __Get_Pipes_Near(self, r: RectType) -> "typing.Set[map_items.Pipe]":
+        # Pipes which may be drawn within the area of the screen
+        (x1, y1) = Scr_To_Grid(r.topleft)
+        (x2, y2) = Scr_To_Grid(r.bottomright)
+        area = pygame.Rect(x1 - 1, y1 - 1, x2 - x1 + 3, y2 - y1 + 3)
+        return set(self.net.draw_index.Get_Pipes(area))
+
+    def Draw_Stats(self, output: SurfaceType, default_stats: List[StatTuple]) -> Optional[RectType]:
+        # Returns the area which has changed, if any
         if ( self.selection is None ):
             l = default_stats
         else:
@@ -180,13 +259,16 @@ class User_Interface:
             output.fill((0,0,0))
             stats.Draw_Stats_Window(output, l)
             self.stats_hash = h
+            return output.get_rect()
 
+        return None
 
-    def Draw_Controls(self, output: SurfaceType) -> None:
+
+    def Draw_Controls(self, output: SurfaceType) -> Optional[RectType]:
         if ( self.control_menu is None ):
             self.__Make_Control_Menu(output.get_rect().width)
         assert self.control_menu is not None
-        self.control_menu.Draw(output)
+        return self.control_menu.Draw(output)
 
     def Control_Mouse_Move(self, spos: SurfacePosition) -> None:
         if ( self.control_menu is not None ):
@@ -211,10 +293,40 @@ class User_Interface:
                     self.__Clear_Control_Selection()
 
     def Key_Press(self, k: int) -> None:
+        if ( grid.Is_Large_Map() ):
+            # The camera is moved with the arrow keys, and zoomed with + and -
+            step = Get_Grid_Size() * 5
+            moved = False
+            if ( k == pygame.K_LEFT ):
+                moved = grid.Scroll((-step, 0))
+            elif ( k == pygame.K_RIGHT ):
+                moved = grid.Scroll((step, 0))
+            elif ( k == pygame.K_UP ):
+                moved = grid.Scroll((0, -step))
+            elif ( k == pygame.K_DOWN ):
+                moved = grid.Scroll((0, step))
+            elif ( k in ( pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS )):
+                moved = grid.Zoom(1)
+            elif ( k in ( pygame.K_MINUS, pygame.K_KP_MINUS )):
+                moved = grid.Zoom(-1)
+
+            if ( moved ):
+                self.Update_Game()
+                return
+
         if ( self.control_menu is not None ):
             self.control_menu.Key_Press(k)
             self.mode = self.control_menu.Get_Command()
 
+    def Game_Mouse_Wheel(self, spos: SurfacePosition, steps: int) -> bool:
+        # Zoom a large map around the mouse pointer.
+        # Returns False if the map can't be zoomed.
+        if ( not grid.Is_Large_Map() ):
+            return False
+        if ( grid.Zoom(steps, spos) ):
+            self.Update_Game()
+        return True
+
     def Right_Mouse_Down(self) -> None:
         self.selection = None
         self.mouse_pos = None
@@ -240,7 +352,7 @@ class User_Interface:
     def __Update_Reset(self) -> None:
         self.full_update = False
         self.partial_update = False
-        self.update_area_list = []
+        self.update_region.Clear()
 
     def Is_Menu_Open(self) -> bool:
         return ( self.mode == MenuCommand.OPEN_MENU )
@@ -396,12 +508,7 @@ class User_Interface:
             if i == 0:
                 self.selection = typing.cast(map_items.Building, obj)
             if i == 2:
-                self.selection = None
-                for pipe in self.net.pipe_list:
-                    if (((pipe.n1 == objects[0]) and (pipe.n2 == objects[1]))
-                    or ((pipe.n1 == objects[1]) and (pipe.n2 == objects[0]))):
-                        self.selection = pipe
-                        break
+                self.selection = self.net.Find_Pipe(objects[0], objects[1])
 
         if name == "Destroy":
             if not self.selection:  # NO-COV
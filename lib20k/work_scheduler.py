@@ -0,0 +1,136 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+# The work scheduler decides which buildings get the city's work units.
+# Only buildings that need work are considered. They are kept in a heap,
+# ordered by the player's priority and then by distance from the city
+# (the order given by Connection_Map.Get_Order), so each work pulse only
+# looks at the buildings that actually get work.
+#
+# Buildings tell the network when they may need work (see
+# Building.Health_Changed). Buildings that are finished, destroyed or
+# disconnected are dropped when they reach the top of the heap.
+# When pipes are added or buildings destroyed, only the buildings
+# whose distance from the city changed are given new heap entries.
+
+import heapq
+
+from .primitives import *
+from .game_types import *
+from . import map_items, connection_map
+
+
+class Work_Scheduler:
+    def __init__(self, connections: "connection_map.Connection_Map") -> None:
+        self.connections = connections
+        self.priority = WorkPriority.NEAREST_FIRST
+
+        # Buildings that may need work, whether connected or not
+        self.pending: typing.Set[map_items.Building] = set()
+
+        # Connected buildings that may need work, ordered by
+        # (priority, key), where key is the Connection_Map.Get_Key
+        # sort key. An entry is out of date if the key has changed.
+        self.heap: List[Tuple[int, connection_map.Order_Key, map_items.Building]] = []
+        self.queued: typing.Set[map_items.Building] = set()
+        self.key: Dict[map_items.Building, connection_map.Order_Key] = dict()
+
+        # The heap is rebuilt when the priority changes or the
+        # connection map is rebuilt
+        self.version = -1
+
+    def Set_Priority(self, priority: WorkPriority) -> None:
+        self.priority = priority
+        self.version = -1
+
+    def Get_Priority(self) -> WorkPriority:
+        return self.priority
+
+    def Add(self, item: "map_items.Building") -> None:
+        # The building may need work
+        if ( item.Is_Destroyed() or not item.Needs_Work() ):
+            return
+
+        self.pending.add(item)
+        if (( self.version == self.connections.version )
+        and ( item in self.key )
+        and ( item not in self.queued )):
+            self.__Push(item)
+
+    def Remove(self, item: "map_items.Building") -> None:
+        # The building no longer exists (any heap entry is dropped later)
+        self.pending.discard(item)
+
+    def Get_Work(self, work_points: int) -> "List[map_items.Building]":
+        # Remove and return (up to) work_points buildings that need work,
+        # highest priority first. Each building appears at most once:
+        # call Add again after doing the work.
+        if ( self.version != self.connections.version ):
+            self.__Rebuild()
+        else:
+            self.__Update()
+
+        out: List[map_items.Building] = []
+        while (( len(out) < work_points ) and ( len(self.heap) != 0 )):
+            (_, key, item) = heapq.heappop(self.heap)
+            if ( self.key.get(item, None) != key ):
+                continue # moved or disconnected
+
+            self.queued.discard(item)
+            if (( item not in self.pending )
+            or item.Is_Destroyed()
+            or ( not item.Needs_Work() )):
+                self.pending.discard(item)
+                continue # stale entry
+
+            out.append(item)
+        return out
+
+    def __Priority(self, item: "map_items.Building") -> int:
+        if ( self.priority == WorkPriority.PIPES_FIRST ):
+            return 0 if isinstance(item, map_items.Pipe) else 1
+        elif ( self.priority == WorkPriority.NODES_FIRST ):
+            return 1 if isinstance(item, map_items.Pipe) else 0
+        elif ( self.priority == WorkPriority.REPAIRS_FIRST ):
+            return 0 if ( item.complete or item.was_once_complete ) else 1
+        return 0
+
+    def __Push(self, item: "map_items.Building") -> None:
+        heapq.heappush(self.heap, (self.__Priority(item), self.key[ item ], item))
+        self.queued.add(item)
+
+    def __Update(self) -> None:
+        # New heap entries for buildings that were connected or moved
+        for item in self.connections.Take_Changes():
+            key = self.connections.Get_Key(item)
+            if key is None:
+                self.key.pop(item, None)
+                self.queued.discard(item)
+            elif key != self.key.get(item, None):
+                self.key[ item ] = key
+                self.queued.discard(item)
+                if item in self.pending:
+                    self.__Push(item)
+
+        if ( len(self.heap) > ( 2 * len(self.queued) ) + 100 ):
+            # Too many out of date entries
+            self.heap = [ (p, key, item) for (p, key, item) in self.heap
+                          if self.key.get(item, None) == key ]
+            heapq.heapify(self.heap)
+
+    def __Rebuild(self) -> None:
+        self.connections.Take_Changes()
+        self.key = dict()
+        for item in self.connections.Get_Order():
+            key = self.connections.Get_Key(item)
+            assert key is not None
+            self.key[ item ] = key
+        self.pending = set([ item for item in self.pending
+                             if ( not item.Is_Destroyed() ) and item.Needs_Work() ])
+        self.queued = set([ item for item in self.pending if item in self.key ])
+        self.heap = [ (self.__Priority(item), self.key[ item ], item)
+                      for item in self.queued ]
+        heapq.heapify(self.heap)
+        self.version = self.connections.version
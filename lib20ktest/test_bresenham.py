@@ -0,0 +1,69 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+from lib20k import bresenham, pipe_grid
+from lib20k.primitives import *
+from lib20k.game_types import *
+
+
+def Old_Line(arg1: GridPosition, arg2: GridPosition) -> List[GridPosition]:
+    # bresenham.Line as it was (recursive, producing a list)
+    (x1,y1) = arg1
+    (x2,y2) = arg2
+    dx = x2 - x1
+    dy = y2 - y1
+
+    if ( abs(dx) < abs(dy) ):
+        return [ (x,y) for (y,x) in Old_Line((y1,x1),(y2,x2)) ]
+
+    if ( dx < 0 ):
+        l = Old_Line((x2,y2),(x1,y1))
+        l.reverse()
+        return l
+
+    if ( dy < 0 ):
+        direction = -1
+        dy = - dy
+    else:
+        direction = 1
+
+    d = ( 2 * dy ) - dx
+    incr_e = 2 * dy
+    incr_ne = 2 * ( dy - dx )
+    y = y1
+    l = [(x1,y)]
+
+    for x in range(x1, x2 + 1):
+        if ( d <= 0 ):
+            d += incr_e # move east
+        else:
+            d += incr_ne # move northeast
+            y += direction
+        l.append((x,y))
+
+    if ( y != y2 ):
+        l.append((x2,y2))
+
+    return l
+
+
+def test_Line() -> None:
+    """The line generator produces the same points as the
+    original version, in every direction."""
+    r = range(-8, 9)
+    for x1 in r:
+        for y1 in r:
+            for x2 in r:
+                for y2 in r:
+                    assert list(bresenham.Line((x1, y1), (x2, y2))) == Old_Line((x1, y1), (x2, y2))
+
+    assert list(bresenham.Line((0, 0), (1000, -999))) == Old_Line((0, 0), (1000, -999))
+
+
+def test_Storm_Path() -> None:
+    """Storm paths are remembered, and can't be changed by the caller."""
+    path = pipe_grid.Storm_Path((3, 4), (20, 9))
+    assert path == tuple([ (x // 2, y // 2) for (x, y) in Old_Line((7, 9), (41, 19)) ])
+    assert pipe_grid.Storm_Path((3, 4), (20, 9)) is path
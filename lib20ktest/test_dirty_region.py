@@ -0,0 +1,68 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import pygame, random
+from lib20k import dirty_region
+from lib20k.dirty_region import TILE_SIZE
+from lib20k.primitives import *
+from lib20k.game_types import *
+
+
+def test_Dirty_Region() -> None:
+    """Areas are merged into rectangles of whole tiles which cover
+    them and don't overlap each other."""
+    region = dirty_region.Dirty_Region()
+    assert region.Is_Empty()
+    assert region.Get_Rects() == []
+
+    # Empty areas are ignored
+    region.Add(pygame.Rect(10, 10, 0, 5))
+    assert region.Is_Empty()
+
+    # One area inside one tile
+    region.Add(pygame.Rect(1, 1, 5, 5))
+    assert region.Get_Rects() == [ pygame.Rect(0, 0, TILE_SIZE, TILE_SIZE) ]
+
+    # Overlapping areas become one rectangle
+    region.Add(pygame.Rect(3, 3, TILE_SIZE * 2, 5))
+    assert region.Get_Rects() == [ pygame.Rect(0, 0, TILE_SIZE * 3, TILE_SIZE) ]
+
+    # Rows with the same run of tiles are joined, others are not
+    region.Add(pygame.Rect(0, TILE_SIZE, TILE_SIZE * 3, TILE_SIZE * 2))
+    region.Add(pygame.Rect(0, TILE_SIZE * 4, 1, 1))
+    assert region.Get_Rects() == [
+            pygame.Rect(0, 0, TILE_SIZE * 3, TILE_SIZE * 3),
+            pygame.Rect(0, TILE_SIZE * 4, TILE_SIZE, TILE_SIZE) ]
+
+    # Negative positions
+    region.Clear()
+    assert region.Is_Empty()
+    region.Add(pygame.Rect(-1, -1, 2, 2))
+    assert region.Get_Rects() == [ pygame.Rect(-TILE_SIZE, -TILE_SIZE,
+                                        TILE_SIZE * 2, TILE_SIZE * 2) ]
+
+    # Many random areas
+    rng = random.Random(1)
+    for test in range(20):
+        region.Clear()
+        areas = [ pygame.Rect(rng.randint(-50, 500), rng.randint(-50, 500),
+                              rng.randint(1, 100), rng.randint(1, 100))
+                  for i in range(rng.randint(1, 50)) ]
+        for area in areas:
+            region.Add(area)
+        rects = region.Get_Rects()
+
+        for area in areas:
+            for (x, y) in [ area.topleft, area.bottomright ]:
+                x = min(x, area.right - 1)
+                y = min(y, area.bottom - 1)
+                assert pygame.Rect(x, y, 1, 1).collidelist(rects) >= 0
+
+        for i in range(len(rects)):
+            assert rects[ i ].collidelist(rects[ i + 1: ]) < 0
+            assert rects[ i ].left % TILE_SIZE == 0
+            assert rects[ i ].top % TILE_SIZE == 0
+            assert any(rects[ i ].colliderect(area.inflate(TILE_SIZE * 2, TILE_SIZE * 2))
+                       for area in areas)
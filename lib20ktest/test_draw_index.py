@@ -0,0 +1,75 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import pygame
+
+from lib20k import game_random, map_items, network, draw_index, intersect
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+
+
+def test_Draw_Index() -> None:
+    """The draw index finds the items in part of the map,
+    in the same order as the network's lists."""
+    unit_test.Setup_For_Unit_Test()
+    net = network.Network(game_random.Game_Random(1), False)
+    everything = pygame.Rect(-10, -10, 100, 100)
+
+    def Check_All() -> None:
+        assert net.draw_index.Get_Wells(everything) == net.well_list
+        assert net.draw_index.Get_Pipes(everything) == net.pipe_list
+        assert net.draw_index.Get_Nodes(everything) == net.node_list
+
+    Check_All()
+
+    # Repeated queries are not sorted again
+    pipes = net.draw_index.Get_Pipes(everything)
+    assert net.draw_index.Get_Pipes(everything) is pipes
+    assert net.draw_index.Get_Pipes(everything.inflate(1, 1)) is pipes
+
+    # A long pipe from one corner to the other
+    n1 = map_items.Node((1, 1))
+    n2 = map_items.Node((40, 44))
+    assert net.Add_Grid_Item(n1)
+    assert net.Add_Grid_Item(n2)
+    pipe = net.Add_Pipe(n1, n2)
+    assert pipe is not None
+    Check_All()
+
+    # Only the nearby items are found
+    area = pygame.Rect(0, 0, 3, 3)
+    assert net.draw_index.Get_Nodes(area) == [ n1 ]
+    assert net.draw_index.Get_Pipes(area) == [ pipe ]
+    assert net.hub not in net.draw_index.Get_Nodes(area)
+
+    # The pipe is found in the middle, although its ends are far away
+    (x, y) = intersect.Line_To_Grid_Positions((n1.pos, n2.pos))[ 20 ]
+    area = pygame.Rect(x, y, 1, 1)
+    assert net.draw_index.Get_Pipes(area) == [ pipe ]
+    assert net.draw_index.Get_Nodes(area) == []
+
+    # Nothing at all
+    area = pygame.Rect(1000, 1000, 5, 5)
+    assert net.draw_index.Get_Pipes(area) == []
+
+    # Destroyed items are removed
+    net.Destroy(n1)
+    assert net.draw_index.Get_Nodes(pygame.Rect(0, 0, 3, 3)) == []
+    assert net.draw_index.Get_Pipes(pygame.Rect(0, 0, 3, 3)) == []
+    Check_All()
+
+    # Large areas are searched by bucket
+    grid = draw_index.Bucket_Grid()
+    grid.Add(n2, [ n2.pos ])
+    assert grid.Get(pygame.Rect(-100000, -100000, 200000, 200000)) == [ n2 ]
+    grid.Remove(n2)
+    assert grid.Get(everything) == []
+    assert grid.buckets == dict()
+
+    # Only the most recent queries are kept
+    for i in range(draw_index.CACHE_SIZE * 2):
+        grid.Get(pygame.Rect(i * draw_index.BUCKET_SIZE, 0, 1, 1))
+    assert len(grid.cache) == draw_index.CACHE_SIZE
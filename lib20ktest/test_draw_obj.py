@@ -0,0 +1,50 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import pygame
+
+from lib20k import draw_obj, resource, game_random
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+
+
+def test_Colour_Substitute() -> None:
+    """The lights are recoloured in the same way as looking at
+    every pixel, for the game's images and for every colour near the
+    threshold."""
+    unit_test.Setup_For_Unit_Test()
+    r = game_random.Game_Random(1)
+    test = pygame.Surface((40, 30), pygame.SRCALPHA)
+    for y in range(30):
+        for x in range(40):
+            test.set_at((x, y), (r.randint(195, 255) if r.randint(0, 2) else r.randint(0, 255),
+                                 r.randint(0, 35), r.randint(0, 35), r.randint(0, 255)))
+
+    images = [ test ]
+    for img_name in [ Images.city1, Images.node, Images.maker ]:
+        img = resource.Load_Image(img_name)
+        images.append(pygame.transform.scale(img, (35, 35)))
+
+    for img in images:
+        frames = draw_obj.Colour_Substitute(img, draw_obj.LIGHT_LEVELS)
+        assert len(frames) == len(draw_obj.LIGHT_LEVELS)
+        for (frame, sub) in zip(frames, draw_obj.LIGHT_LEVELS):
+            expect = draw_obj.Colour_Substitute_Per_Pixel(img, sub)
+            assert (pygame.image.tostring(frame, "RGBA") ==
+                    pygame.image.tostring(expect, "RGBA"))
+
+def test_Flush_Draw_Obj_Cache() -> None:
+    """Objects for the most recent sizes of grid square are kept."""
+    unit_test.Setup_For_Unit_Test()
+    draw_obj.cache.clear()
+    for square_size in [ 5, 6, 7, 8, 9, 6 ]:
+        key = (Images.node, 1, square_size)
+        draw_obj.cache.pop(key, None)
+        draw_obj.cache[ key ] = draw_obj.Make_Cache_Item(key)
+
+    draw_obj.Flush_Draw_Obj_Cache()
+    assert sorted([ key[ 2 ] for key in draw_obj.cache ]) == [ 6, 7, 8, 9 ]
+    draw_obj.cache.clear()
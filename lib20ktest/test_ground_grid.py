@@ -0,0 +1,62 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import pygame, pickle, copy
+
+from lib20k import game_random, map_items, ground_grid
+from lib20k.primitives import *
+from lib20k.game_types import *
+
+
+def test_Ground_Grid() -> None:
+    """The ground grid behaves like a dictionary, and finds
+    the same items and free squares as looking at every square."""
+    r = game_random.Game_Random(3)
+    (w, h) = size = (20, 15)
+    grid = ground_grid.Ground_Grid(size)
+    expect: Dict[GridPosition, map_items.Item] = dict()
+
+    for cycle in range(500):
+        gpos = (r.randint(-2, w + 1), r.randint(-2, h + 1))
+        choice = r.randint(0, 3)
+        if ( choice == 0 ):
+            if ( gpos in expect ):
+                del grid[ gpos ]
+                del expect[ gpos ]
+        elif ( choice == 1 ):
+            grid[ gpos ] = expect[ gpos ] = map_items.Well(gpos)
+        else:
+            grid[ gpos ] = expect[ gpos ] = map_items.Node(gpos)
+
+        assert grid.get(gpos) is expect.get(gpos)
+        assert ( gpos in grid ) == ( gpos in expect )
+        assert grid.Get_Type(gpos) == ground_grid.Ground_Type(expect.get(gpos))
+        assert len(grid) == len(expect)
+
+    assert sorted(grid) == sorted(expect)
+    assert sorted(grid.items(), key=repr) == sorted(expect.items(), key=repr)
+    assert grid.get((-1, -1), None) is expect.get((-1, -1), None)
+    try:
+        grid[ (w + 5, h + 5) ]
+        assert False
+    except KeyError:
+        pass
+
+    # Questions about an area
+    for cycle in range(50):
+        area = pygame.Rect(r.randint(-3, w), r.randint(-3, h), r.randint(0, 8), r.randint(0, 8))
+        squares = [ (x, y) for y in range(area.top, area.bottom)
+                            for x in range(area.left, area.right)
+                            if (( 0 <= x < w ) and ( 0 <= y < h )) ]
+        assert grid.Get_Free(area) == [ gpos for gpos in squares if gpos not in expect ]
+
+    # Saved with the game
+    grid2 = pickle.loads(pickle.dumps(grid))
+    assert len(grid2) == len(grid)
+    assert grid2.types == grid.types
+    assert grid2.Get_Free(pygame.Rect(0, 0, w, h)) == grid.Get_Free(pygame.Rect(0, 0, w, h))
+    grid3 = copy.deepcopy(grid)
+    assert sorted(grid3) == sorted(grid)
+    assert grid3.types == grid.types
@@ -6,6 +6,9 @@
 import random, math
 
 from lib20k.intersect import Lines_Intersect, Intersects_Grid_Square, Line_To_Grid_Positions
+from lib20k.intersect import GridRect, Walk_Grid_Line, Lines_Intersect_Many
+from lib20k.intersect import Line_Geometry, Near_Segments_Many
+from lib20k.intersect import Distance_From_Point_To_Line, Intersects_Node
 from lib20k.primitives import *
 from lib20k.game_types import *
 from lib20k import grid
@@ -38,6 +41,63 @@ def test_Intersect() -> None:
     for i in range(10000):
         Rnd()
 
+def test_Intersect_Many() -> None:
+    """Lines_Intersect_Many tests each line against the fixed line, with
+    the arguments the same way round as Lines_Intersect, including for
+    lines that share an end or are parallel."""
+    r = random.Random(1)
+    def RP() -> FloatGridPosition:
+        return (r.randint(0, 6) * 0.5, r.randint(0, 6) * 0.5)
+
+    lines: List[FloatGridLine] = [ (RP(), RP()) for i in range(300) ]
+    crossings = 0
+    for line in lines[ : 100 ]:
+        expect = [ Lines_Intersect(other, line) for other in lines ]
+        assert Lines_Intersect_Many(line, lines) == expect
+        crossings += expect.count(True)
+    assert crossings > 100
+
+    assert Lines_Intersect_Many(((0, 0), (1, 1)), []) == []
+    assert Lines_Intersect_Many(((0, 0), (2, 2)), [
+            ((0, 2), (2, 0)),       # crossing
+            ((0, 0), (2, 0)),       # shared end
+            ((1, 0), (3, 2)),       # parallel
+            ((1, 1), (3, 3)) ]) == [ True, False, False, False ]   # overlapping
+
+def test_Line_Geometry() -> None:
+    """Distances from a line worked out in advance are the same as
+    Distance_From_Point_To_Line, and the nearest point on a line segment
+    is no further away than any point along it."""
+    r = random.Random(1)
+    def RP() -> GridPosition:
+        return (r.randint(0, 20), r.randint(0, 20))
+
+    lines: List[GridLine] = []
+    while len(lines) < 100:
+        line = (RP(), RP())
+        if line[ 0 ] != line[ 1 ]:
+            lines.append(line)
+    geometry = [ Line_Geometry(line) for line in lines ]
+
+    points = [ RP() for i in range(100) ]
+    for (line, g) in zip(lines, geometry):
+        for gpos in points:
+            assert g.Distance_To_Line(gpos) == Distance_From_Point_To_Line(gpos, line)
+            assert g.Distance_To_Segment(gpos) >= g.Distance_To_Line(gpos) - 1e-9
+            ((x1, y1), (x2, y2)) = line
+            (x0, y0) = gpos
+            for i in range(11):
+                (x, y) = (x1 + (( x2 - x1 ) * i / 10.0 ), y1 + (( y2 - y1 ) * i / 10.0 ))
+                assert g.Distance_To_Segment(gpos) <= math.hypot(x - x0, y - y0) + 1e-9
+
+        assert g.Near_Line_Many(points) == [ Intersects_Node(gpos, line) for gpos in points ]
+
+    for gpos in points:
+        for radius in [ 0.5, 2.0 ]:
+            assert Near_Segments_Many(gpos, geometry, radius) == [
+                    g.Distance_To_Segment(gpos) < radius for g in geometry ]
+
+
 def test_Intersect_Grid_Square() -> None:
     surround = [(-1, -1), (0, -1), (1, -1),
                 (1, 0), (1, 1), (0, 1),
@@ -80,6 +140,40 @@ def test_Intersect_Grid_Square() -> None:
         assert Intersects_Grid_Square((0, 0), ((0, 0), outside))
 
 
+def test_Walk_Grid_Line() -> None:
+    """Walking along a line finds the same grid squares as recursive
+    subdivision of its bounding box, for every pair of squares on the
+    grid. Both methods only depend on the difference between the two
+    squares, so each difference is checked once, at a random place."""
+    (width, height) = GRID_SIZE
+    r = random.Random(1)
+    for dx in range(1 - width, width):
+        for dy in range(1 - height, height):
+            x1 = r.randrange(max(0, -dx), min(width, width - dx))
+            y1 = r.randrange(max(0, -dy), min(height, height - dy))
+            (x2, y2) = (x1 + dx, y1 + dy)
+            line = ((x1, y1), (x2, y2))
+
+            walk = list(Walk_Grid_Line(line))
+            assert len(walk) == len(set(walk))
+            if ( dx == dy == 0 ):
+                assert walk == []
+                continue
+
+            bbox = GridRect((min(x1, x2), min(y1, y2)),
+                            (max(x1, x2) + 1, max(y1, y2) + 1))
+            assert set(walk) == set(bbox.RecursiveSubdivide(line)), line
+
+            # The walk goes from one end to the other
+            assert walk[0] == (x1, y1)
+            assert (x2, y2) in walk[-2:]
+
+    # Cached paths can't be changed by the caller
+    path = Line_To_Grid_Positions(((1, 1), (10, 5)))
+    path.clear()
+    assert Line_To_Grid_Positions(((1, 1), (10, 5))) == list(Walk_Grid_Line(((1, 1), (10, 5))))
+
+
 def test_Pipe_Grid_Paths() -> None:
     test_surface = unit_test.Setup_For_Unit_Test()
 
@@ -4,7 +4,7 @@
 #
 
 import pygame
-from lib20k import main, mail, version, config
+from lib20k import main, mail, version, config, grid
 from lib20k.primitives import *
 from lib20k.game_types import *
 from .unit_test import *
@@ -193,3 +193,62 @@ def test_Update_Feature() -> None:
 
     main.Main(data_dir="data", args=[], event=Fake_Update_Events(Bad_Update_2))
     assert not ("OPEN URL" in mail.Get_Messages())
+
+def test_Main_Steam_Init() -> None:
+    """Start a game with the steam already at equilibrium,
+    and with settled parts of the network allowed to sleep."""
+    event_list = [Push(pygame.K_t), # tutorial
+                  NoEvent(),
+                  Quit(),
+                  NoEvent()]
+    main.Main(data_dir="data", args=["--steam-init=equilibrium", "--steam-sleep"],
+              event=Fake_Events(event_list))
+    assert "You are playing a Tutorial game" in mail.Get_Messages()
+
+def test_Main_Well_Placement() -> None:
+    """Start a game choosing wells from the list of free squares."""
+    event_list = [Push(pygame.K_t), # tutorial
+                  NoEvent(),
+                  Quit(),
+                  NoEvent()]
+    main.Main(data_dir="data", args=["--well-placement=free-list"],
+              event=Fake_Events(event_list))
+    assert "You are playing a Tutorial game" in mail.Get_Messages()
+
+    # Can't be recorded
+    assert main.Main(data_dir="data", args=["--well-placement=free-list", "--playback=x"],
+                     event=Fake_Events([])) == 1
+
+def test_Main_Large_Map() -> None:
+    """Start a game on a large map, then move the camera around."""
+    event_list = [Push(pygame.K_t), # tutorial
+                  NoEvent(),
+                  Push(pygame.K_RIGHT),
+                  Push(pygame.K_MINUS),
+                  Wheel((200, 200), 4),
+                  Wheel((200, 200), 5),
+                  NoEvent(),
+                  Quit(),
+                  NoEvent()]
+    main.Main(data_dir="data", args=["--map-size=150"],
+              event=Fake_Events(event_list))
+    assert "You are playing a Tutorial game" in mail.Get_Messages()
+    assert grid.Get_Map_Size() == (150, 150)
+    grid.Set_Map_Size(GRID_SIZE)
+
+    # Can't be recorded, and has a maximum size
+    assert main.Main(data_dir="data", args=["--map-size=150", "--playback=x"],
+                     event=Fake_Events([])) == 1
+    assert main.Main(data_dir="data", args=["--map-size=501"],
+                     event=Fake_Events([])) == 1
+
+def test_Main_Headless() -> None:
+    """Play back a recording without a display."""
+    assert main.Main(data_dir="data",
+                     args=["--headless", "--playback=tests/recordings/placement"],
+                     event=Fake_Events([])) == 0
+    assert "Can't build there - pipe in the way!" in mail.Get_Messages()
+
+    # Only for playback
+    assert main.Main(data_dir="data", args=["--headless"],
+                     event=Fake_Events([])) == 1
@@ -127,10 +127,10 @@ def test_Simple_Menu_Loop() -> None:
 
     # force drawing a selection
     test_menu.Select(MenuCommand.SAVE1)
-    test_menu.Draw(test_screen)
+    assert test_menu.Draw(test_screen) == test_menu.bbox
 
     # force drawing when no update required
-    test_menu.Draw(test_screen)
+    assert test_menu.Draw(test_screen) is None
 
     # Add a picture to some item
     test_menu = menu.Enhanced_Menu(menu_options, force_width=200,
@@ -3,6 +3,8 @@
 # This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
 #
 
+import math
+
 from lib20k import game_random, map_items, network
 from lib20k.primitives import *
 from lib20k.game_types import *
@@ -145,3 +147,256 @@ def test_Network() -> None:
 
 
 
+def Flood_From_Hub(net: network.Network) -> Dict[map_items.Building, int]:
+    # The original way of finding connected buildings: a wavefront
+    # spreading out from the city.
+    hops: Dict[map_items.Building, int] = dict()
+    now: typing.Set[map_items.Building] = set([ net.hub ])
+    distance = 0
+    while len(now) != 0:
+        next: typing.Set[map_items.Building] = set()
+        for item in now:
+            if item not in hops:
+                hops[ item ] = distance
+                next |= set(item.Exits())
+        now = next
+        distance += 1
+    return hops
+
+def test_Connection_Map() -> None:
+    """Test for connection_map.py.
+
+    Random pipes are added and random buildings destroyed. After
+    each change, the connection map must match a flood from the city."""
+
+    unit_test.Setup_For_Unit_Test()
+    r = game_random.Game_Random(2)
+    net = network.Network(game_random.Game_Random(1), False)
+    (cx, cy) = GRID_CENTRE
+    for i in range(60):
+        net.Add_Grid_Item(map_items.Node((cx + r.randint(-9, 9),
+                                          cy + r.randint(-9, 9))), True)
+
+    for cycle in range(400):
+        nodes = net.node_list
+        if r.randint(0, 5) != 0:
+            n1 = nodes[ r.randint(0, len(nodes) - 1) ]
+            n2 = nodes[ r.randint(0, len(nodes) - 1) ]
+            if n1 != n2:
+                net.Add_Pipe(n1, n2)
+        elif r.randint(0, 2) == 0:
+            net.Destroy(nodes[ r.randint(0, len(nodes) - 1) ])
+        elif len(net.pipe_list) != 0:
+            net.Destroy(net.pipe_list[ r.randint(0, len(net.pipe_list) - 1) ])
+
+        hops = Flood_From_Hub(net)
+        assert hops == net.connection_map.hops
+        assert set(net.pipe_index.lines.keys()) == set(net.pipe_list)
+        assert sum([ len(pipes) for pipes in net.pipe_ends.values() ]) == len(net.pipe_list)
+        for pipe in net.pipe_list:
+            assert net.Find_Pipe(pipe.n1, pipe.n2) == pipe
+            assert net.Find_Pipe(pipe.n2, pipe.n1) == pipe
+        for well in net.well_list:
+            assert net.Find_Well(well.pos) == well
+        grid = net.storm_pipe_grid
+        assert set(grid.pipe_cells.keys()) == set(net.pipe_list)
+        for pipes in grid.pipe_grid.values():
+            assert len(pipes) != 0
+            assert not any([ pipe.Is_Destroyed() for pipe in pipes ])
+        for item in net.node_list + net.pipe_list:
+            assert net.Is_Connected(item) == (item in hops)
+
+        # Work is done nearest first
+        order = net.connection_map.Get_Order()
+        assert len(order) == len(hops)
+        for (a, b) in zip(order, order[ 1: ]):
+            assert ((hops[ a ], a.Manhattan_Distance_From(net.hub), a.pos) <=
+                    (hops[ b ], b.Manhattan_Distance_From(net.hub), b.pos))
+
+def test_Work_Scheduler() -> None:
+    """Test for work_scheduler.py.
+
+    Buildings are added, damaged, upgraded and destroyed at random.
+    Each work pulse must go to the same buildings as the original
+    Work_Pulse, which visited every connected building, nearest first."""
+
+    unit_test.Setup_For_Unit_Test()
+    r = game_random.Game_Random(3)
+    net = network.Network(game_random.Game_Random(1), False)
+    (cx, cy) = GRID_CENTRE
+    for i in range(40):
+        net.Add_Grid_Item(map_items.Node((cx + r.randint(-9, 9),
+                                          cy + r.randint(-9, 9))), True)
+
+    def Health() -> Dict[map_items.Building, int]:
+        h: Dict[map_items.Building, int] = dict()
+        for item in net.node_list + net.pipe_list:
+            h[ item ] = item.health
+        h[ net.hub ] = net.hub.city_upgrade
+        return h
+
+    for cycle in range(600):
+        nodes = net.node_list
+        items = nodes + net.pipe_list
+        action = r.randint(0, 9)
+        if action < 5:
+            n1 = nodes[ r.randint(0, len(nodes) - 1) ]
+            n2 = nodes[ r.randint(0, len(nodes) - 1) ]
+            if n1 != n2:
+                net.Add_Pipe(n1, n2)
+        elif action < 7:
+            item = items[ r.randint(0, len(items) - 1) ]
+            if item.Take_Damage():
+                net.Destroy(item)
+        elif action < 8:
+            items[ r.randint(0, len(items) - 1) ].Begin_Upgrade()
+        elif action < 9:
+            net.Destroy(items[ r.randint(0, len(items) - 1) ])
+        else:
+            net.Add_Grid_Item(map_items.Node((cx + r.randint(-9, 9),
+                                              cy + r.randint(-9, 9))), True)
+
+        if net.Get_Work_Priority() == WorkPriority.NEAREST_FIRST:
+            work_points = r.randint(1, 4)
+            expect = [ item for item in net.connection_map.Get_Order()
+                       if item.Needs_Work() ][ :work_points ]
+            before = Health()
+            assert net.Work_Pulse(work_points) == len(expect)
+            after = Health()
+            assert set([ item for item in before
+                         if before[ item ] != after[ item ] ]) == set(expect)
+
+            # Only the buildings that moved were updated
+            sched = net.work_scheduler
+            assert sched.version == net.connection_map.version
+            assert sched.key == dict([ (item, net.connection_map.Get_Key(item))
+                                       for item in net.connection_map.Get_Order() ])
+
+        # Player priorities
+        if cycle == 400:
+            net.Set_Work_Priority(WorkPriority.PIPES_FIRST)
+        if cycle >= 400:
+            pipes = [ pipe for pipe in net.pipe_list
+                      if pipe.Needs_Work() and net.Is_Connected(pipe) ]
+            before = Health()
+            net.Work_Pulse(2)
+            after = Health()
+            done = [ item for item in before if before[ item ] != after[ item ] ]
+            if len(pipes) >= 2:
+                assert all([ isinstance(item, map_items.Pipe) for item in done ])
+            elif len(pipes) == 1:
+                assert pipes[ 0 ] in done
+
+def test_Components() -> None:
+    """Test for components.py.
+
+    Random changes are made to the network. Two nodes must be
+    in the same component if and only if a path of pipes joins them."""
+
+    unit_test.Setup_For_Unit_Test()
+    r = game_random.Game_Random(4)
+    net = network.Network(game_random.Game_Random(1), False)
+    (cx, cy) = GRID_CENTRE
+    for i in range(40):
+        net.Add_Grid_Item(map_items.Node((cx + r.randint(-12, 12),
+                                          cy + r.randint(-12, 12))), True)
+
+    for cycle in range(200):
+        nodes = net.node_list
+        if r.randint(0, 4) != 0:
+            n1 = nodes[ r.randint(0, len(nodes) - 1) ]
+            n2 = nodes[ r.randint(0, len(nodes) - 1) ]
+            if n1 != n2:
+                net.Add_Pipe(n1, n2)
+        else:
+            net.Destroy(nodes[ r.randint(0, len(nodes) - 1) ])
+
+        components = net.Get_Components()
+        assert sum([ len(c.nodes) for c in components ]) == len(net.node_list)
+        for c in components:
+            # every node in the component is reachable from the first
+            reach = set([ c.nodes[ 0 ] ])
+            todo = [ c.nodes[ 0 ] ]
+            for node in todo:
+                for pipe in node.pipes:
+                    for other in pipe.Exits():
+                        if other not in reach:
+                            reach.add(other)
+                            todo.append(other)
+            assert reach == set(c.nodes)
+            assert c.active == any([ isinstance(n, (map_items.City_Node, map_items.Well_Node))
+                                     for n in c.nodes ])
+            for n in c.nodes:
+                assert net.components.Get_Component(net, n) is c
+            for (a, b) in zip(c.nodes, c.nodes[ 1: ]):
+                assert net.node_list.index(a) < net.node_list.index(b)
+
+        assert net.components.Get_Component(net, net.hub) is not None
+
+def test_Large_Map() -> None:
+    """A large map has the same density of wells as a normal one,
+    all of them on the map and away from the city."""
+    unit_test.Setup_For_Unit_Test()
+    net = network.Network(game_random.Game_Random(1), False, (300, 300))
+    assert net.Get_Centre() == (150, 150)
+    assert net.hub.pos == (150, 150)
+
+    # 10 wells per 50x50, plus the bootstrap well near the city
+    assert len(net.well_list) == ( 10 * 6 * 6 ) + 1
+    assert len(set([ w.pos for w in net.well_list ])) == len(net.well_list)
+    for w in net.well_list:
+        (x, y) = w.pos
+        assert 0 <= x < 300
+        assert 0 <= y < 300
+        assert math.hypot(x - 150, y - 150) >= 5
+
+    net.Make_Well()
+    assert len(net.well_list) == ( 10 * 6 * 6 ) + 2
+
+def test_Well_Placement() -> None:
+    """Wells chosen from the list of free squares are on free squares
+    away from the city, and the list is kept up to date."""
+    unit_test.Setup_For_Unit_Test()
+    for teaching in [ False, True ]:
+        net = network.Network(game_random.Game_Random(2), teaching, GRID_SIZE,
+                              WellPlacement.FREE_LIST)
+        assert net.Get_Well_Placement() == WellPlacement.FREE_LIST
+        free = net.ground_grid.free
+        assert free is not None
+        (cx, cy) = net.Get_Centre()
+        for w in net.well_list[ :-1 ]: # the last is the bootstrap well
+            (x, y) = w.pos
+            assert math.hypot(x - cx, y - cy) >= WELL_DISTANCE
+            assert ( x >= cx ) or not teaching
+
+        def Check() -> None:
+            (w, h) = GRID_SIZE
+            expect = set([ (x, y) for x in range(w) for y in range(h)
+                            if (( (x, y) not in net.ground_grid )
+                                and ( math.hypot(x - cx, y - cy) >= WELL_DISTANCE )) ])
+            assert free is not None
+            assert set(free.left + free.right) == expect
+            assert len(free) == len(expect)
+
+        Check()
+        for i in range(100):
+            net.Make_Well()
+            Check()
+
+        # A node on a free square, then destroyed
+        n = map_items.Node(free.right[ 0 ])
+        assert net.Add_Grid_Item(n)
+        Check()
+        net.Destroy(n)
+        Check()
+
+        # Fill the map
+        while len(free) != 0:
+            net.Make_Well()
+        num_wells = len(net.well_list)
+        net.Make_Well()
+        assert len(net.well_list) == num_wells
+
+        net.Set_Well_Placement(WellPlacement.RETRY)
+        assert net.ground_grid.free is None
+        assert net.Get_Well_Placement() == WellPlacement.RETRY
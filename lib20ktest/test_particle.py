@@ -0,0 +1,46 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+from lib20k import particle, draw_effects
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+
+
+def test_Make_Particle_Effect() -> None:
+    """Particle effects are made once for each size, and only
+    the most recent sizes are remembered."""
+    unit_test.Setup_For_Unit_Test()
+    particle.effect_cache.clear()
+    steam = particle.Make_Particle_Effect(particle.Steam_Particle)
+    storm = particle.Make_Particle_Effect(particle.Storm_Particle)
+    assert len(steam) == len(storm) == particle.NUM_FRAMES
+    assert particle.Make_Particle_Effect(particle.Steam_Particle) is steam
+    assert particle.Make_Particle_Effect(particle.Storm_Particle) is storm
+
+    draw_effects.Set_Screen_Height(MINIMUM_HEIGHT * 2)
+    try:
+        steam2 = particle.Make_Particle_Effect(particle.Steam_Particle)
+        assert steam2 is not steam
+        assert steam2[ 0 ].get_rect().width == steam[ 0 ].get_rect().width * 2
+    finally:
+        draw_effects.Set_Screen_Height(MINIMUM_HEIGHT)
+
+    assert particle.Make_Particle_Effect(particle.Steam_Particle) is steam
+
+    # Effects for older sizes are forgotten
+    try:
+        for i in range(particle.CACHE_SIZES + 2):
+            draw_effects.Set_Screen_Height(MINIMUM_HEIGHT * ( i + 3 ))
+            particle.Make_Particle_Effect(particle.Steam_Particle)
+        assert len([ key for key in particle.effect_cache
+                     if key[ 0 ] == particle.Steam_Particle ]) == particle.CACHE_SIZES
+    finally:
+        draw_effects.Set_Screen_Height(MINIMUM_HEIGHT)
+
+    # (the storm effect was not made again, so it is still there)
+    assert particle.Make_Particle_Effect(particle.Storm_Particle) is storm
+
+    assert particle.Make_Particle_Effect(particle.Steam_Particle) is not steam
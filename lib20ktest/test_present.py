@@ -0,0 +1,53 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import pygame
+from lib20k import present
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+
+
+def test_Presenter() -> None:
+    """Only the changed parts of the screen are copied to the display,
+    unless most of the screen has changed."""
+    screen = unit_test.Setup_For_Unit_Test()
+    presenter = present.Presenter()
+
+    # Everything is copied the first time
+    assert presenter.Present()
+
+    # Small areas are copied on their own, relative to the screen
+    surf = screen.subsurface(pygame.Rect(100, 50, 200, 200))
+    presenter.Update_Area(surf, pygame.Rect(10, 10, 20, 20))
+    presenter.Update_Area(surf, None)
+    assert presenter.update_area_list == [ pygame.Rect(110, 60, 20, 20) ]
+    assert not presenter.Present()
+    assert presenter.update_area_list == []
+
+    # Nothing has changed
+    assert not presenter.Present()
+
+    # All of a subsurface
+    presenter.Update_Areas(surf, None)
+    assert presenter.update_area_list == [ pygame.Rect(100, 50, 200, 200) ]
+    assert not presenter.Present()
+
+    # Most of the screen
+    presenter.Update_Area(screen, screen.get_rect().inflate(-10, -10))
+    assert presenter.Present()
+
+    # Too many small areas
+    presenter.Update_Areas(screen, [ pygame.Rect(i, i, 1, 1)
+                for i in range(present.FULL_UPDATE_AREAS + 1) ])
+    assert presenter.Present()
+
+    # Areas off the screen don't count
+    presenter.Update_Area(screen, pygame.Rect(-1000, -1000, 900, 900))
+    assert not presenter.Present()
+
+    # Forced
+    presenter.Update_All()
+    assert presenter.Present()
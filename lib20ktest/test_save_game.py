@@ -46,6 +46,14 @@ def test_Save_Restore() -> None:
     assert "Game restored" in mail.Get_Messages()
     g = g2
 
+    # A game saved in an older format can't be restored
+    del g.save_format
+    assert save_game.Save(g, MenuCommand.SAVE9, "old save") is None
+    g.save_format = SAVE_FORMAT
+    (g3, error) = save_game.Load(g, MenuCommand.SAVE9)
+    assert g3 is None
+    assert error == "Restore error: wrong version"
+
     # Overwrite save game with nonsense
     name = save_game.Make_Save_Name(MenuCommand.SAVE9)
     open(name, "wb").write(b"INVALID")
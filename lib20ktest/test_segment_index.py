@@ -0,0 +1,73 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+from lib20k import game_random, map_items, network, intersect
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+
+
+def test_Segment_Index() -> None:
+    """The segment index finds the same pipes as looking
+    at every pipe, while pipes are added and destroyed."""
+    unit_test.Setup_For_Unit_Test()
+    r = game_random.Game_Random(4)
+    net = network.Network(game_random.Game_Random(1), False)
+    (cx, cy) = GRID_CENTRE
+    for i in range(60):
+        net.Add_Grid_Item(map_items.Node((cx + r.randint(-12, 12),
+                                          cy + r.randint(-12, 12))), True)
+
+    def RP() -> FloatGridPosition:
+        return (cx + r.randint(-150, 150) / 10.0, cy + r.randint(-150, 150) / 10.0)
+
+    for cycle in range(200):
+        nodes = net.node_list
+        if r.randint(0, 4) != 0:
+            n1 = nodes[ r.randint(0, len(nodes) - 1) ]
+            n2 = nodes[ r.randint(0, len(nodes) - 1) ]
+            if n1 != n2:
+                net.Add_Pipe(n1, n2)
+        elif len(net.pipe_list) != 0:
+            net.Destroy(net.pipe_list[ r.randint(0, len(net.pipe_list) - 1) ])
+
+        # Pipes crossing a fault line
+        points = [ RP() for i in range(4) ]
+        expect = set()
+        for i in range(len(points) - 1):
+            for pipe in net.pipe_list:
+                if intersect.Lines_Intersect((pipe.n1.pos, pipe.n2.pos),
+                                             (points[ i ], points[ i + 1 ])):
+                    expect.add(pipe)
+        assert set(net.pipe_index.Get_Polyline(points)) == expect
+
+        # Pipes passing through a grid square
+        gpos = (cx + r.randint(-12, 12), cy + r.randint(-12, 12))
+        on_square = set([ pipe for pipe in net.pipe_list
+                if gpos in intersect.Line_To_Grid_Positions((pipe.n1.pos, pipe.n2.pos)) ])
+        assert set(net.pipe_index.Get_Square(gpos)) == on_square
+
+        # Pipes in the way of a new node
+        expect = set([ pipe for pipe in on_square
+                if intersect.Intersects_Node(gpos, (pipe.n1.pos, pipe.n2.pos)) ])
+        assert set(net.pipe_index.Get_Near_Point(gpos, 0.5)) == expect
+
+        # Selection only remembers squares with pipes on them
+        for gpos in net.pipe_index.rotation:
+            assert len(net.pipe_index.Get_Square(gpos)) != 0
+
+    # Selection goes through each pipe in the square in turn
+    for gpos in net.ground_grid:
+        pipes = net.pipe_index.Get_Square(gpos)
+        if len(pipes) > 1:
+            selected = [ net.Get_Pipe(gpos) for pipe in pipes ]
+            assert set(selected) == set(pipes)
+
+    # Once the pipes have gone, so has the selection
+    for pipe in list(net.pipe_list):
+        net.Destroy(pipe)
+    assert net.pipe_index.rotation == {}
+
+    assert net.Get_Pipe((-10, -10)) is None
@@ -0,0 +1,89 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import copy
+
+from lib20k import game_random, map_items, network
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+from .test_steam_solver import Make_Test_Network, Run
+
+
+def test_Steam_Sleep() -> None:
+    """Settled parts of the network go to sleep, and wake up
+    when something changes."""
+    unit_test.Setup_For_Unit_Test()
+    net1 = Make_Test_Network()
+    net1.demo = game_random.Game_Random(1) # not tracing
+
+    # an island, not connected to the rest
+    island = [ map_items.Node((5, 5)), map_items.Node((5, 9)) ]
+    for n in island:
+        assert net1.Add_Grid_Item(n)
+    assert net1.Add_Pipe(island[ 0 ], island[ 1 ]) is not None
+    net2 = copy.deepcopy(net1)
+    net2.Set_Steam_Sleep(True)
+    assert net2.Is_Steam_Sleep()
+    assert not net1.Is_Steam_Sleep()
+
+    # Everything settles
+    Run(net1, 1500)
+    Run(net2, 1500)
+    assert net2.steam_sleep is not None
+    assert net2.steam_sleep.Count_Asleep() == len(net2.node_list)
+    for (n1, n2) in zip(net1.node_list, net2.node_list):
+        assert abs(n1.Get_Pressure() - n2.Get_Pressure()) < 1.0
+
+    # The city still uses steam while asleep
+    total = net2.hub.total_steam
+    Run(net2, 10)
+    charges = [ n.Get_Pressure() for n in net2.node_list ]
+    Run(net2, 10)
+    assert abs(net2.hub.total_steam - total
+               - ( 20 * net2.hub.Get_Steam_Demand() )) < 1e-6
+    assert charges == [ n.Get_Pressure() for n in net2.node_list ]
+
+    # Damage wakes up the group containing the damaged pipe, but
+    # not the group of nodes that isn't connected to it
+    net2.hub.pipes[ 0 ].Take_Damage()
+    Run(net2, 1)
+    assert 0 < net2.steam_sleep.Count_Asleep() < len(net2.node_list)
+    Run(net2, 1500)
+    assert net2.steam_sleep.Count_Asleep() == len(net2.node_list)
+
+    # An upgrade wakes it up too
+    net2.hub.Begin_Upgrade()
+    Run(net2, 1)
+    assert net2.steam_sleep.Count_Asleep() < len(net2.node_list)
+
+    # The island has no steam maker, so it isn't simulated
+    island = net2.node_list[ 8: ]
+    component = net2.components.Get_Component(net2, island[ 0 ])
+    assert component is not None
+    assert not component.active
+    island[ 0 ].steam.charge = 10.0
+    Run(net2, 10)
+    assert island[ 0 ].steam.charge == 10.0
+    assert island[ 1 ].steam.charge == 0.0
+
+    # As does a new pipe
+    Run(net2, 1500)
+    assert net2.steam_sleep.Count_Asleep() == len(net2.node_list)
+    assert net2.Add_Pipe(net2.node_list[ 2 ], net2.node_list[ 8 ]) is not None
+    Run(net2, 1)
+    assert net2.steam_sleep.Count_Asleep() == 0
+
+def test_Steam_Sleep_Tracing() -> None:
+    """Nothing sleeps if the steam is being traced for a recording."""
+    unit_test.Setup_For_Unit_Test()
+    net = Make_Test_Network()
+    net.Set_Steam_Sleep(True)
+    Run(net, 1500)
+    assert net.steam_sleep is not None
+    assert net.steam_sleep.Count_Asleep() == 0
+
+    net.Set_Steam_Sleep(False)
+    assert net.steam_sleep is None
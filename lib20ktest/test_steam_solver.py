@@ -0,0 +1,333 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import copy, time
+
+from lib20k import game_random, map_items, network, steam_model
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+
+
+class Steam_Trace(game_random.Game_Random):
+    """Keeps a copy of everything that would go into a recording."""
+    def __init__(self) -> None:
+        game_random.Game_Random.__init__(self, 1)
+        self.trace: List[typing.Any] = []
+
+    def Steam(self, neighbour_list: "List[Tuple[steam_model.Steam_Model, float]]",
+              voltage: float, charge: float, capacitance: float,
+              currents: List[float]) -> None:
+        self.trace.append((voltage, charge, capacitance,
+                           [ resist for (_, resist) in neighbour_list ], currents))
+
+    def Is_Tracing_Steam(self) -> bool:
+        return True
+
+
+def Make_Test_Network() -> network.Network:
+    """A network with some unfinished, broken and unconnected parts."""
+    net = network.Network(Steam_Trace(), False)
+    (cx, cy) = GRID_CENTRE
+    nodes = []
+    for pos in [ (cx - 4, cy), (cx - 4, cy - 4), (cx, cy - 4),
+                 (cx + 4, cy - 6), (cx - 8, cy + 3), (cx - 1, cy + 6) ]:
+        n = map_items.Node(pos)
+        assert net.Add_Grid_Item(n)
+        nodes.append(n)
+
+    pipes = [ net.Add_Pipe(net.hub, nodes[0]),
+              net.Add_Pipe(nodes[0], nodes[1]),
+              net.Add_Pipe(nodes[1], nodes[2]),
+              net.Add_Pipe(nodes[2], net.hub),
+              net.Add_Pipe(nodes[2], nodes[3]),
+              net.Add_Pipe(nodes[0], nodes[4]) ]
+
+    for item in nodes[:4] + pipes[:4]:
+        assert item is not None
+        while item.Needs_Work():
+            item.Do_Work()
+
+    # a node and pipe that are damaged
+    assert pipes[4] is not None
+    pipes[4].Do_Work()
+    nodes[3].Do_Work()
+
+    # a node with a broken pipe first in its list of exits
+    assert net.Add_Pipe(nodes[5], nodes[0]) is not None
+    p = net.Add_Pipe(nodes[5], net.hub)
+    assert p is not None
+    while p.Needs_Work():
+        p.Do_Work()
+    while nodes[5].Needs_Work():
+        nodes[5].Do_Work()
+    return net
+
+def Run(net: network.Network, ticks: int) -> List[typing.Any]:
+    for i in range(ticks):
+        net.Steam_Think()
+    return ([ n.steam.charge for n in net.node_list ] +
+            [ n.steam.voltage for n in net.node_list ] +
+            [ p.current_n1_to_n2 for p in net.pipe_list ])
+
+def test_Sequential_Engine() -> None:
+    """The sequential engine must give exactly the same results as
+    the original code, including the steam trace used by recordings."""
+    unit_test.Setup_For_Unit_Test()
+    net1 = Make_Test_Network()
+    net2 = copy.deepcopy(net1)
+    net2.Set_Steam_Engine(SteamEngine.SEQUENTIAL)
+    assert net1.Get_Steam_Engine() == SteamEngine.OBJECTS
+    assert net2.Get_Steam_Engine() == SteamEngine.SEQUENTIAL
+
+    assert Run(net1, 200) == Run(net2, 200)
+
+    # change the topology, then continue
+    for net in [ net1, net2 ]:
+        net.Destroy(net.node_list[ 3 ])
+        net.node_list[ 2 ].Take_Damage()
+        assert net.Add_Grid_Item(map_items.Node((5, 5)))
+
+    assert Run(net1, 100) == Run(net2, 100)
+    assert isinstance(net1.demo, Steam_Trace)
+    assert isinstance(net2.demo, Steam_Trace)
+    assert len(net1.demo.trace) > 1000
+    assert net1.demo.trace == net2.demo.trace
+
+def test_Sequential_Health_Changes() -> None:
+    """The sequential engine keeps its state between ticks; it must
+    still follow the original code while buildings are damaged,
+    repaired, upgraded, added and destroyed."""
+    unit_test.Setup_For_Unit_Test()
+    net1 = Make_Test_Network()
+    net2 = copy.deepcopy(net1)
+    net2.Set_Steam_Engine(SteamEngine.SEQUENTIAL)
+    r = game_random.Game_Random(7)
+
+    for cycle in range(300):
+        action = r.randint(0, 9)
+        choice = r.randint(0, 1000)
+        for net in [ net1, net2 ]:
+            items: List[map_items.Building] = []
+            items += net.node_list
+            items += net.pipe_list
+            item = items[ choice % len(items) ]
+            if ( action == 0 ):
+                if ( item.Take_Damage() ):
+                    net.Destroy(item)
+            elif ( action == 1 ):
+                item.Begin_Upgrade()
+            elif ( action == 2 ):
+                n1 = net.node_list[ choice % len(net.node_list) ]
+                n2 = net.node_list[ ( choice // 7 ) % len(net.node_list) ]
+                if ( n1 != n2 ):
+                    net.Add_Pipe(n1, n2)
+            elif ( action < 6 ):
+                item.Do_Work()
+                item.Health_Changed()
+            else:
+                net.Work_Pulse(2)
+
+        assert Run(net1, 1) == Run(net2, 1)
+        assert ([ n.draw_obj is n.draw_obj_finished for n in net1.node_list ] ==
+                [ n.draw_obj is n.draw_obj_finished for n in net2.node_list ])
+
+    assert isinstance(net1.demo, Steam_Trace)
+    assert isinstance(net2.demo, Steam_Trace)
+    assert net1.demo.trace == net2.demo.trace
+
+def test_Simultaneous_Engine() -> None:
+    """The simultaneous engine should reach a similar equilibrium."""
+    unit_test.Setup_For_Unit_Test()
+    net1 = Make_Test_Network()
+    net2 = copy.deepcopy(net1)
+    net2.Set_Steam_Engine(SteamEngine.SIMULTANEOUS)
+
+    Run(net1, 500)
+    Run(net2, 500)
+    assert net2.hub.Get_Pressure() >= PRESSURE_GOOD
+    for (n1, n2) in zip(net1.node_list, net2.node_list):
+        assert abs(n1.Get_Pressure() - n2.Get_Pressure()) < 1.0
+        assert 0.0 <= n2.Get_Pressure() <= n2.steam.Get_Capacity()
+
+    # The simultaneous engine doesn't use the steam trace
+    assert isinstance(net2.demo, Steam_Trace)
+    assert len(net2.demo.trace) == 0
+
+    # Return to the original engine
+    net2.Set_Steam_Engine(SteamEngine.OBJECTS)
+    Run(net2, 1)
+    assert len(net2.demo.trace) > 0
+
+def Make_Large_Network() -> network.Network:
+    """Nodes on an 11 by 11 grid, each joined to its neighbours,
+    and the nodes nearest to the city joined to it."""
+    net = network.Network(game_random.Game_Random(1), False)
+    (cx, cy) = GRID_CENTRE
+    nodes: Dict[Tuple[int, int], map_items.Node] = dict()
+    for x in range(11):
+        for y in range(11):
+            n = map_items.Node((cx - 20 + ( x * 4 ), cy - 20 + ( y * 4 )))
+            if ( net.Add_Grid_Item(n, True) ):
+                nodes[ (x, y) ] = n
+
+    pipes = []
+    for ((x, y), n) in nodes.items():
+        for other in [ (x + 1, y), (x, y + 1) ]:
+            if ( other in nodes ):
+                pipes.append(net.Add_Pipe(n, nodes[ other ]))
+    for n in sorted(nodes.values(),
+                    key=lambda n: net.hub.Manhattan_Distance_From(n))[:4]:
+        pipes.append(net.Add_Pipe(net.hub, n))
+
+    for item in list(nodes.values()) + pipes:
+        while (( item is not None ) and item.Needs_Work() ):
+            item.Do_Work()
+    return net
+
+def Time_Steam_Think(engine: SteamEngine) -> float:
+    net = Make_Large_Network()
+    assert len(net.node_list) > 100
+    assert len(net.pipe_list) > 200
+    net.Set_Steam_Engine(engine)
+    net.Steam_Think()
+    best = None
+    for repeat in range(5):
+        start = time.perf_counter()
+        for i in range(100):
+            net.Steam_Think()
+        t = time.perf_counter() - start
+        if ( best is None ) or ( t < best ):
+            best = t
+    assert best is not None
+    return best
+
+def test_Large_Network_Speed() -> None:
+    """The simultaneous engine should be faster than the nodes
+    simulating themselves on a large network."""
+    unit_test.Setup_For_Unit_Test()
+    objects = Time_Steam_Think(SteamEngine.OBJECTS)
+    simultaneous = Time_Steam_Think(SteamEngine.SIMULTANEOUS)
+    assert simultaneous < objects
+
+def test_Equilibrium() -> None:
+    """The predicted equilibrium should be where the simulation settles.
+    It can't be exact, because flows below NEGLIGIBLE are ignored and
+    because venting happens before the outflow on each tick."""
+    unit_test.Setup_For_Unit_Test()
+    net1 = Make_Test_Network()
+    net2 = copy.deepcopy(net1)
+    net2.Set_Steam_Engine(SteamEngine.SIMULTANEOUS)
+
+    predict = net1.Predict_Equilibrium()
+    Run(net1, 3000)
+    Run(net2, 3000)
+    for (n1, n2) in zip(net1.node_list, net2.node_list):
+        assert abs(predict[ n1 ] - n1.Get_Pressure()) < 1.0
+        assert abs(predict[ n1 ] - n2.Get_Pressure()) < 1.0
+
+    # Once there, the network stays there
+    net3 = Make_Test_Network()
+    net3.Set_Equilibrium()
+    net3.Set_Steam_Engine(SteamEngine.SIMULTANEOUS)
+    before = [ n.Get_Pressure() for n in net3.node_list ]
+    Run(net3, 100)
+    for (n, charge) in zip(net3.node_list, before):
+        assert abs(n.Get_Pressure() - charge) < 1.0
+
+def test_Equilibrium_Cases() -> None:
+    """Simple networks with known steady states."""
+    # 0: source, 1: demand, 2 and 3: plain nodes with some charge
+    charge = [ 0.0, 0.0, 10.0, 30.0 ]
+    capacity = [ 50.0, 50.0, 50.0, 50.0 ]
+    source = [ 8.0, -5.0, 0.0, 0.0 ]
+
+    # Not connected: the source fills up, the demand empties,
+    # the others keep their steam
+    assert steam_model.Equilibrium(charge, capacity, source, []) == [
+                50.0, 0.0, 10.0, 30.0 ]
+
+    # Plain nodes share their steam
+    out = steam_model.Equilibrium(charge, capacity, source, [ (2, 3, 1.0) ])
+    assert abs(out[ 2 ] - 20.0) < 1e-6
+    assert abs(out[ 3 ] - 20.0) < 1e-6
+
+    # Excess from the source is vented at the source: 5 units flow
+    # through resistance 2, so the pressure drops by 10
+    out = steam_model.Equilibrium(charge, capacity, source, [ (0, 1, 2.0) ])
+    assert abs(out[ 0 ] - 50.0) < 1e-6
+    assert abs(out[ 1 ] - 40.0) < 1e-6
+
+    # Too little supply: the demand runs out
+    out = steam_model.Equilibrium(charge, capacity, [ 3.0, -5.0, 0.0, 0.0 ],
+                                  [ (0, 1, 2.0), (1, 2, 1.0) ])
+    assert out[ 1 ] == 0.0
+    assert out[ 2 ] == 0.0
+    assert abs(out[ 0 ] - 6.0) < 1e-6
+
+def Legacy_Steam_Think(net: network.Network) -> None:
+    # Node.Steam_Think as it was before the adjacency table
+    for node in net.node_list:
+        source = node.Steam_Source()
+        if ( source is not None ):
+            node.steam.Source(source)
+
+        nl: List[Tuple[steam_model.Steam_Model, float]] = []
+        for p in node.Exits():
+            if ( not p.Is_Broken() ):
+                if ( p.n1 == node ):
+                    if ( not p.n2.Is_Broken() ):
+                        nl.append((p.n2.steam, p.resistance))
+                else:
+                    if ( not p.n1.Is_Broken() ):
+                        nl.append((p.n1.steam, p.resistance))
+
+        nd = node.steam.Think(nl, net)
+        for (p, current) in zip(node.Exits(), nd):
+            if ( current > 0.0 ):
+                if ( node == p.n1 ):
+                    p.current_n1_to_n2 = current
+                else:
+                    p.current_n1_to_n2 = - current
+
+def test_Adjacency() -> None:
+    """The cached adjacency table must give the same results as
+    looking at every pipe on every tick, while buildings are damaged,
+    repaired, upgraded, added and destroyed."""
+    unit_test.Setup_For_Unit_Test()
+    net1 = Make_Test_Network()
+    net2 = copy.deepcopy(net1)
+    r = game_random.Game_Random(5)
+
+    for cycle in range(300):
+        action = r.randint(0, 9)
+        choice = r.randint(0, 1000)
+        for net in [ net1, net2 ]:
+            items: List[map_items.Building] = []
+            items += net.node_list
+            items += net.pipe_list
+            item = items[ choice % len(items) ]
+            if ( action == 0 ):
+                if ( item.Take_Damage() ):
+                    net.Destroy(item)
+            elif ( action == 1 ):
+                item.Begin_Upgrade()
+            elif ( action == 2 ):
+                n1 = net.node_list[ choice % len(net.node_list) ]
+                n2 = net.node_list[ ( choice // 7 ) % len(net.node_list) ]
+                if ( n1 != n2 ):
+                    net.Add_Pipe(n1, n2)
+            elif ( action < 6 ):
+                item.Do_Work()
+            else:
+                net.Work_Pulse(2)
+
+        net1.Steam_Think()
+        Legacy_Steam_Think(net2)
+        assert Run(net1, 0) == Run(net2, 0)
+
+    assert isinstance(net1.demo, Steam_Trace)
+    assert isinstance(net2.demo, Steam_Trace)
+    assert net1.demo.trace == net2.demo.trace
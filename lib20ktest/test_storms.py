@@ -0,0 +1,80 @@
+#
+# 20,000 Light Years Into Space
+# This game is licensed under GPL v2, and copyright (C) Jack Whitham 2006-21.
+#
+
+import pickle
+
+from lib20k import game_random, map_items, network, storms, game
+from lib20k.primitives import *
+from lib20k.game_types import *
+from . import unit_test
+
+
+def Old_Think(storm: storms.Storm, frame_time: float) -> None:
+    # Storm.Think as it was, looking at every square every frame
+    (cx,cy) = storm.pos
+    cx = int(cx)
+    cy = int(cy)
+    dmg = STORM_DAMAGE * storm.difficulty
+    for x in range(cx - 1, cx + 2):
+        for y in range(cy - 1, cy + 2):
+            key = (x,y)
+            for pipe in storm.net.storm_pipe_grid.Get_Pipes(key):
+                if (( not pipe.Is_Destroyed() )
+                and ( pipe.Take_Damage(dmg) )):
+                    storm.net.Destroy(pipe, "storms")
+
+            if ( storm.net.ground_grid.get(key, None) ):
+                node = storm.net.ground_grid[ key ]
+                if (( not node.Is_Destroyed() )
+                and ( node.Take_Damage(dmg) )):
+                    storm.net.Destroy(node, "storms")
+
+    (px,py) = storm.pos
+    (dx,dy) = storm.velocity
+    storm.pos = (px + ( dx * frame_time ), py + ( dy * frame_time ))
+    storm.countdown -= frame_time
+
+
+def test_Storm_Damage() -> None:
+    """Storms damage the same buildings as they used to, although
+    they only look at the grid squares when they move to another one."""
+    unit_test.Setup_For_Unit_Test()
+    r = game_random.Game_Random(5)
+    for seed in range(4):
+        net = network.Network(game_random.Game_Random(seed), False)
+        (w, h) = GRID_SIZE
+        for i in range(300):
+            net.Add_Grid_Item(map_items.Node((r.randint(0, w - 1), r.randint(0, h - 1))), True)
+        nodes = net.node_list
+        for i in range(600):
+            n1 = nodes[ r.randint(0, len(nodes) - 1) ]
+            n2 = nodes[ r.randint(0, len(nodes) - 1) ]
+            if (( n1 != n2 ) and ( n1.Manhattan_Distance_From(n2) < 12 )):
+                net.Add_Pipe(n1, n2)
+        for item in net.node_list + net.pipe_list:
+            item.health = item.max_health
+
+        num_pipes = len(net.pipe_list)
+        storm_list = [ storms.Storm(net, 2.0) for i in range(4) ]
+        (net2, storm_list2) = pickle.loads(pickle.dumps((net, storm_list)))
+
+        for frame in range(2000):
+            for storm in storm_list:
+                storm.Think(game.RT_FRAME_LENGTH)
+            for storm in storm_list2:
+                Old_Think(storm, game.RT_FRAME_LENGTH)
+
+            if ( frame % 100 ) == 0:
+                # New nodes appear
+                (x, y) = (r.randint(0, w - 1), r.randint(0, h - 1))
+                net.Add_Grid_Item(map_items.Node((x, y)), True)
+                net2.Add_Grid_Item(map_items.Node((x, y)), True)
+
+        def Health(n: network.Network) -> List[Tuple[str, int, bool]]:
+            return sorted([ (repr(item.pos), item.health, item.Is_Destroyed())
+                            for item in n.node_list + n.pipe_list ])
+
+        assert Health(net) == Health(net2)
+        assert len(net.pipe_list) < num_pipes # some were destroyed
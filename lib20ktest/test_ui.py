@@ -226,3 +226,131 @@ def test_UI() -> None:
     assert net.ground_grid[grid.Scr_To_Grid(n4pos)] == n4well # well is still there
     Draw_Things(False)
 
+
+def test_Large_Map() -> None:
+    """On a large map, the game area is a camera that can be scrolled
+    and zoomed, and things that can't be seen are not drawn."""
+    test_screen = Setup_For_Unit_Test()
+    demo = game_random.Game_Random(1)
+    net = network.Network(demo, False, (200, 200))
+    ui = User_Interface(net, demo)
+    season_fx = quiet_season.Quiet_Season(net)
+    grid.Set_Map_Size(net.map_size)
+    assert grid.Is_Large_Map()
+
+    # Begins at the normal scale, looking at the city
+    size = grid.Get_Grid_Size()
+    assert size == MINIMUM_HEIGHT // GRID_SIZE[1]
+    (x, y) = grid.Grid_To_Scr(net.hub.pos)
+    assert abs(x - ( MINIMUM_HEIGHT // 2 )) <= size
+    assert abs(y - ( MINIMUM_HEIGHT // 2 )) <= size
+    for gpos in [ (0, 0), (123, 45), (199, 199), net.hub.pos ]:
+        assert grid.Scr_To_Grid(grid.Grid_To_Scr(gpos)) == gpos
+    ui.Draw_Game(test_screen, season_fx, False)
+
+    # Only part of the map can be seen
+    visible = grid.Get_Visible_Area(0)
+    assert visible.collidepoint(net.hub.pos)
+    assert not visible.collidepoint((0, 0))
+    assert not visible.collidepoint((199, 199))
+
+    # Scrolling
+    (x, y) = grid.Scr_To_Grid((0, 0))
+    ui.Key_Press(pygame.K_LEFT)
+    assert grid.Scr_To_Grid((0, 0)) == (x - 5, y)
+    ui.Key_Press(pygame.K_DOWN)
+    assert grid.Scr_To_Grid((0, 0)) == (x - 5, y + 5)
+    ui.Key_Press(pygame.K_RIGHT)
+    ui.Key_Press(pygame.K_UP)
+    assert grid.Scr_To_Grid((0, 0)) == (x, y)
+    ui.Draw_Game(test_screen, season_fx, False)
+
+    # Dots on the pipes are not erased from where they were before
+    # the camera moved
+    pipe = net.hub.pipes[ 0 ]
+    spos = (5, 5)
+    pipe.dot_positions = [ (float(spos[ 0 ]), float(spos[ 1 ])) ]
+    ui.Key_Press(pygame.K_LEFT)
+    ui.Draw_Game(test_screen, season_fx, False)
+    assert ui.static_layer is not None
+    assert test_screen.get_at(spos) == ui.static_layer.get_at(spos)
+    ui.Key_Press(pygame.K_RIGHT)
+
+    # The camera stops at the edge of the map
+    for i in range(100):
+        ui.Key_Press(pygame.K_UP)
+    assert grid.Scr_To_Grid((0, 0))[1] == 0
+
+    # Zooming out until the whole map can be seen
+    ui.Key_Press(pygame.K_MINUS)
+    assert grid.Get_Grid_Size() < size
+    for i in range(10):
+        assert ui.Game_Mouse_Wheel((100, 100), -1)
+    assert grid.Get_Grid_Size() == MINIMUM_HEIGHT // 200
+    assert grid.Scr_To_Grid((0, 0)) == (0, 0)
+    visible = grid.Get_Visible_Area(0)
+    assert visible.collidepoint((0, 0))
+    assert visible.collidepoint((199, 199))
+    ui.Draw_Game(test_screen, season_fx, False)
+
+    # Zooming in keeps the square under the mouse in the same place
+    spos = (300, 200)
+    gpos = grid.Scr_To_Grid(spos)
+    assert ui.Game_Mouse_Wheel(spos, 1)
+    assert grid.Get_Grid_Size() == 2 * ( MINIMUM_HEIGHT // 200 )
+    assert abs(grid.Scr_To_Grid(spos)[0] - gpos[0]) <= 1
+    assert abs(grid.Scr_To_Grid(spos)[1] - gpos[1]) <= 1
+    ui.Key_Press(pygame.K_PLUS)
+    ui.Draw_Game(test_screen, season_fx, False)
+
+    # The normal map can't be moved
+    grid.Set_Map_Size(GRID_SIZE)
+    assert not grid.Is_Large_Map()
+    assert not ui.Game_Mouse_Wheel((100, 100), 1)
+    assert grid.Grid_To_Scr((0, 0)) == (size // 2, size // 2)
+    ui.Key_Press(pygame.K_LEFT)
+    assert grid.Grid_To_Scr((0, 0)) == (size // 2, size // 2)
+
+
+def test_Static_Layer() -> None:
+    """The background, wells and pipe bodies are drawn once onto a static
+    layer, which is only drawn again when something on it changes."""
+    test_screen = Setup_For_Unit_Test()
+    demo = game_random.Game_Random(1)
+    net = network.Network(demo, False)
+    ui = User_Interface(net, demo)
+    season_fx = quiet_season.Quiet_Season(net)
+
+    ui.Draw_Game(test_screen, season_fx, False)
+    layer = ui.static_layer
+    assert layer is not None
+    assert not net.dirty
+
+    # The pipe from the city to the first steam maker passes through
+    # the well's steam, so it is drawn again over the steam
+    assert net.hub.pipes[ 0 ] in ui.static_well_pipes
+
+    # Nothing has changed, so the layer is kept
+    ui.Draw_Game(test_screen, season_fx, False)
+    assert ui.static_layer is layer
+
+    # A new pipe is drawn onto a new layer
+    n1 = map_items.Node((10, 10))
+    n2 = map_items.Node((20, 10))
+    assert net.Add_Grid_Item(n1)
+    assert net.Add_Grid_Item(n2)
+    pipe = net.Add_Pipe(n1, n2)
+    assert pipe is not None
+    ui.Draw_Game(test_screen, season_fx, False)
+    assert ui.static_layer is not layer
+    layer = ui.static_layer
+    assert pipe in ui.static_broken
+
+    # When the pipe is finished, it is drawn again in green
+    pipe.health = pipe.max_health
+    ui.Draw_Game(test_screen, season_fx, False)
+    assert ui.static_layer is not layer
+    assert pipe not in ui.static_broken
+    layer = ui.static_layer
+    ui.Draw_Game(test_screen, season_fx, False)
+    assert ui.static_layer is layer
@@ -30,6 +30,11 @@ class RightClick(events.Event):
         events.Event.__init__(self, pos=pos,
                               t=pygame.MOUSEBUTTONDOWN, button=2)
 
+class Wheel(events.Event):
+    def __init__(self, pos: SurfacePosition, button: int) -> None:
+        events.Event.__init__(self, pos=pos,
+                              t=pygame.MOUSEBUTTONDOWN, button=button)
+
 class Release(events.Event):
     def __init__(self, pos: SurfacePosition) -> None:
         events.Event.__init__(self, pos=pos,
@@ -126,5 +126,11 @@ def test_tutorial_die_2() -> None:
 def test_placement() -> None:
     run_a_test("placement")
 
+def test_sequential_steam_engine() -> None:
+    run_a_test("intermediate_die", ["--steam-engine=sequential"])
+
+def test_headless() -> None:
+    run_a_test("beginner", ["--headless"])
+
 if __name__ == "__main__":
     main()